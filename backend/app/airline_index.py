@@ -0,0 +1,69 @@
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class AirlineIndex:
+    """Airline records by code plus a sorted prefix index for autocomplete.
+
+    Records keep the supplier shape (``AirLineCode``, ``AirLineName``,
+    ``AirLineLogo``). Codes are matched case-insensitively and the first
+    record wins when the list repeats a code. The prefix index holds every
+    code, full name and name word lowercased, so a query is one bisect plus
+    a walk over at most the matches it returns.
+    """
+
+    def __init__(self, airlines: Iterable[Dict[str, Any]]):
+        self.airlines: List[Dict[str, Any]] = list(airlines)
+        self.by_code: Dict[str, Dict[str, Any]] = {}
+
+        entries = set()
+        for pos, airline in enumerate(self.airlines):
+            code = str(airline.get("AirLineCode") or "").upper()
+            name = str(airline.get("AirLineName") or "").lower()
+            self.by_code.setdefault(code, airline)
+            for term in (code.lower(), name, *name.split()):
+                if term:
+                    entries.add((term, pos))
+
+        ordered = sorted(entries)
+        self._terms = [term for term, _ in ordered]
+        self._positions = [pos for _, pos in ordered]
+
+    def __len__(self) -> int:
+        return len(self.airlines)
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """Return the airline with this code, or ``None``"""
+        return self.by_code.get(code.upper())
+
+    def name(self, code: str, default: str = "") -> str:
+        """Return the airline's name, or ``default`` for an unknown code"""
+        airline = self.by_code.get(code.upper())
+        return (airline.get("AirLineName") or default) if airline else default
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` airlines whose code or a name word starts with ``query``.
+
+        An exact code match ranks first; the rest follow in alphabetical
+        order of the matching term.
+        """
+        prefix = query.strip().lower()
+        if not prefix:
+            return self.airlines[:limit]
+
+        matches = []
+        seen = set()
+        exact = self.by_code.get(prefix.upper())
+        if exact is not None:
+            matches.append(exact)
+            seen.add(id(exact))
+
+        terms = self._terms
+        i = bisect_left(terms, prefix)
+        while i < len(terms) and len(matches) < limit and terms[i].startswith(prefix):
+            airline = self.airlines[self._positions[i]]
+            if id(airline) not in seen:
+                seen.add(id(airline))
+                matches.append(airline)
+            i += 1
+        return matches
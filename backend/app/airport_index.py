@@ -0,0 +1,60 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .fare_store import ColumnarFareStore
+
+
+class AirportIndex:
+    """Per-airport flight counts and reachable destinations for one catalog.
+
+    Built from the interned airport columns of the fare store whenever a
+    catalog snapshot is created, so it always matches the flights being
+    served. Codes are uppercased and kept sorted for prefix search.
+    """
+
+    def __init__(self, fares: ColumnarFareStore):
+        codes = fares.airports.codes
+        n = len(codes)
+        departures = np.bincount(fares.origin, minlength=n).tolist()
+        arrivals = np.bincount(fares.destination, minlength=n).tolist()
+        self.departures: Dict[str, int] = {code: departures[i] for i, code in enumerate(codes) if code}
+        self.arrivals: Dict[str, int] = {code: arrivals[i] for i, code in enumerate(codes) if code}
+        self.codes: List[str] = sorted(self.departures)
+
+        # Distinct (origin, destination) routes with their flight counts
+        routes, counts = np.unique(
+            fares.origin.astype(np.int64) * n + fares.destination, return_counts=True)
+        self.destinations: Dict[str, List[Dict[str, Any]]] = {code: [] for code in self.codes}
+        for route, count in zip(routes.tolist(), counts.tolist()):
+            origin, destination = codes[route // n], codes[route % n]
+            if origin and destination:
+                self.destinations[origin].append({"code": destination, "flights": count})
+        for routes_from in self.destinations.values():
+            routes_from.sort(key=lambda r: (-r["flights"], r["code"]))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code.upper() in self.departures
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Return airport codes starting with ``query`` in alphabetical order"""
+        prefix = query.strip().upper()
+        start = bisect_left(self.codes, prefix)
+        end = len(self.codes) if limit is None else start + limit
+        return [code for code in self.codes[start:end] if code.startswith(prefix)]
+
+    def summary(self, code: str) -> Optional[Dict[str, Any]]:
+        """Counts and reachable destinations of one airport, or ``None``"""
+        code = code.upper()
+        if code not in self.departures:
+            return None
+        return {
+            "code": code,
+            "departures": self.departures[code],
+            "arrivals": self.arrivals[code],
+            "destinations": self.destinations[code],
+        }
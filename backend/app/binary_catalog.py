@@ -0,0 +1,255 @@
+"""Precompiled binary snapshot of the flight catalog and airline list.
+
+Parsing flights.json costs seconds per process. ``python -m
+app.binary_catalog`` compiles the normalized catalog into a single file of
+fixed-width little-endian columns that every uvicorn worker memory-maps
+read-only, so all workers share the same physical pages and startup is a
+header parse.
+
+Layout: ``MAGIC``, a ``<II`` pair of format version and header length, a
+UTF-8 JSON header, then 8-byte aligned column sections. The header records
+the size, mtime and SHA-256 of each source file; a snapshot whose sources
+no longer match is ignored and the caller falls back to JSON. The airline
+list is kept verbatim as one UTF-8 JSON section.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from .fare_store import CodeTable, ColumnarFareStore
+from .itinerary import Itinerary
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SKYCAT\0\0"
+FORMAT_VERSION = 4
+_PREAMBLE = struct.Struct("<II")
+_ALIGN = 8
+
+# Fare store columns, mapped straight into the ColumnarFareStore
+FARE_COLUMNS = {
+    "price_cents": "<i8",
+    "stops": "<i4",
+    "duration": "<i4",
+    "departure_epoch": "<i8",
+    "arrival_epoch": "<i8",
+    "departure_day": "<i4",
+    "origin": "<i4",
+    "destination": "<i4",
+    "airline": "<i4",
+}
+
+# Itinerary string attributes, stored as ids into the string table
+STRING_FIELDS = (
+    "airline_code", "airline_name", "flight_number", "departure_airport",
+    "arrival_airport", "departure_time", "arrival_time", "currency", "cabin_class",
+)
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_stamp(path: Path) -> Optional[Dict[str, Any]]:
+    """Size, mtime and hash identifying one version of a source file"""
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+
+
+def sources_match(recorded: Mapping[str, Any], sources: Mapping[str, Path]) -> bool:
+    """Check that every source file is the one the snapshot was built from.
+
+    An unchanged size and mtime is trusted as-is; otherwise the file is
+    hashed, so a copy or touch of identical content still matches.
+    """
+    if set(recorded) != set(sources):
+        return False
+    for name, path in sources.items():
+        stamp = recorded[name]
+        if not path.exists() or stamp is None:
+            if path.exists() or stamp is not None:
+                return False
+            continue
+        stat = path.stat()
+        if stat.st_size != stamp["size"]:
+            return False
+        if stat.st_mtime_ns != stamp["mtime_ns"] and file_sha256(path) != stamp["sha256"]:
+            return False
+    return True
+
+
+class MappedItineraries(Sequence):
+    """Read-only sequence of Itinerary records backed by snapshot columns.
+
+    Records are built on access, so the catalog itself stays in the shared
+    mapping and only the rows a request touches become Python objects.
+    """
+
+    def __init__(self, columns: Mapping[str, np.ndarray], strings: List[str]):
+        self._strings = strings
+        self._index = columns["index"]
+        self._price_cents = columns["price_cents"]
+        self._stops = columns["stops"]
+        self._duration = columns["duration"]
+        self._fields = [(name, columns[name]) for name in STRING_FIELDS]
+        self._dates: Dict[date, date] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        strings = self._strings
+        return Itinerary(
+            index=int(self._index[pos]),
+            duration=int(self._duration[pos]),
+            price_cents=int(self._price_cents[pos]),
+            stops=int(self._stops[pos]),
+            dates=self._dates,
+            **{name: strings[column[pos]] for name, column in self._fields},
+        )
+
+
+class MappedCatalog:
+    """Catalog records, fare columns and airline list loaded from a snapshot"""
+
+    def __init__(self, records: MappedItineraries, fares: ColumnarFareStore,
+                 airlines: List[Dict[str, Any]], sources: Dict[str, Any]):
+        self.records = records
+        self.fares = fares
+        self.airlines = airlines
+        self.sources = sources
+
+
+def _string_sections(strings: CodeTable) -> Dict[str, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings.codes]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {
+        "string_offsets": offsets,
+        "string_data": np.frombuffer(b"".join(encoded), dtype="u1"),
+    }
+
+
+def write_snapshot(path: Path, records: List[Itinerary], airlines: List[Dict[str, Any]],
+                   stamps: Mapping[str, Optional[Dict[str, Any]]]) -> Path:
+    """Compile records and the airline list into a snapshot file at ``path``.
+
+    ``stamps`` should be taken with ``source_stamp`` before the sources are
+    read, so a source that changes during the build never matches the
+    written snapshot. The file is written beside ``path`` and renamed into
+    place, so workers never map a half-written snapshot.
+    """
+    n = len(records)
+    fares = ColumnarFareStore(records)
+    strings = CodeTable()
+
+    sections: Dict[str, np.ndarray] = {
+        name: getattr(fares, name).astype(dtype, copy=False) for name, dtype in FARE_COLUMNS.items()
+    }
+    sections["index"] = np.fromiter((r.index for r in records), dtype="<i8", count=n)
+    for name in STRING_FIELDS:
+        sections[name] = np.fromiter(
+            (strings.intern(getattr(r, name)) for r in records), dtype="<i4", count=n)
+    sections.update(_string_sections(strings))
+    sections["airline_list"] = np.frombuffer(json.dumps(airlines).encode("utf-8"), dtype="u1")
+
+    offset = 0
+    layout = {}
+    for name, array in sections.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "length": len(array)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    header = json.dumps({
+        "records": n,
+        "sources": dict(stamps),
+        "airports": fares.airports.codes,
+        "airlines": fares.airlines.codes,
+        "sections": layout,
+    }).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + _PREAMBLE.size + len(header)) % _ALIGN)
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + _PREAMBLE.pack(FORMAT_VERSION, len(header)) + header)
+        for array in sections.values():
+            data = array.tobytes()
+            f.write(data + b"\0" * (-len(data) % _ALIGN))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_snapshot(path: Path, sources: Mapping[str, Path]) -> Optional[MappedCatalog]:
+    """Memory-map a snapshot, or return ``None`` if its sources have changed.
+
+    Raises ``ValueError`` if the file is not a snapshot of this format.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    start = len(MAGIC) + _PREAMBLE.size
+    if len(mapped) < start or mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a catalog snapshot")
+    version, header_len = _PREAMBLE.unpack_from(mapped, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+    header = json.loads(mapped[start:start + header_len])
+
+    if not sources_match(header["sources"], sources):
+        logger.info("Catalog snapshot %s is stale, falling back to JSON", path)
+        return None
+
+    base = start + header_len
+    columns = {}
+    for name, section in header["sections"].items():
+        if base + section["offset"] + section["length"] * np.dtype(section["dtype"]).itemsize > len(mapped):
+            raise ValueError(f"{path} is truncated in section {name!r}")
+        # Zero-copy, read-only views of the shared mapping
+        columns[name] = np.frombuffer(
+            mapped, dtype=section["dtype"], count=section["length"], offset=base + section["offset"])
+
+    data = columns["string_data"].tobytes()
+    offsets = columns["string_offsets"].tolist()
+    strings = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    fares = ColumnarFareStore.from_columns(
+        {name: columns[name] for name in FARE_COLUMNS}, header["airports"], header["airlines"])
+    airlines = json.loads(columns["airline_list"].tobytes())
+    return MappedCatalog(MappedItineraries(columns, strings), fares, airlines, header["sources"])
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    from .flight_catalog import FlightCatalog
+
+    parser = argparse.ArgumentParser(description="Compile the flight catalog into a binary snapshot")
+    parser.add_argument("--data-dir", default="data", help="Data directory relative to the backend")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = FlightCatalog(data_dir=args.data_dir, preload=False)
+    print(f"Wrote {catalog.build_snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any
+
+# Turns a stored booking into the exact bytes of its API representation
+BookingEncoder = Callable[[Dict[str, Any]], bytes]
+
+
+def encode_json(booking: Dict[str, Any]) -> bytes:
+    """Default encoder: the stored booking as compact JSON"""
+    return json.dumps(booking, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def read_journal(path: Path) -> List[Dict[str, Any]]:
+    """Read journal entries, skipping any torn line"""
+    if not path.exists():
+        return []
+    entries = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def replay_json_bookings(data_dir: Path) -> List[Dict[str, Any]]:
+    """Read all bookings: the JSON snapshot replayed with any journal tail"""
+    bookings_file = data_dir / "bookings.json"
+    if bookings_file.exists():
+        with open(bookings_file, 'r') as f:
+            snapshot = json.load(f)
+    else:
+        snapshot = {"bookings": []}
+
+    # Keyed by id so entries already folded by an interrupted compaction replay once
+    bookings = {b["id"]: b for b in snapshot.get("bookings", [])}
+    for path in (data_dir / "bookings.journal.compacting", data_dir / "bookings.journal"):
+        for booking in read_journal(path):
+            bookings[booking["id"]] = booking
+    return list(bookings.values())
+
+
+class BookingStore(ABC):
+    """Persistence backend for bookings.
+
+    Besides booking dicts, stores hand out each booking pre-encoded by
+    ``encode``, so reads can return response bytes without revalidating.
+    ``encoding`` fingerprints the encoder's output format: a store that
+    persists encodings records it with each one and re-encodes any made
+    under another. New bookings are encoded before they are persisted, so
+    one the encoder rejects is never stored. ``reads_block is set by stores whose reads
+    wait on the disk, so async callers run them off the event loop.
+    """
+
+    encode: BookingEncoder = staticmethod(encode_json)
+    encoding = "json"
+    reads_block = False
+
+    @abstractmethod
+    def append(self, bookings: List[Dict[str, Any]]):
+        """Durably store a batch of new bookings in one commit"""
+
+    @abstractmethod
+    def get_by_pnr(self, pnr: str) -> Optional[Dict[str, Any]]:
+        """Return the booking with this PNR, compared case-insensitively"""
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> List[Dict[str, Any]]:
+        """Return all bookings for a passenger email, compared case-insensitively"""
+
+    def get_encoded_by_pnr(self, pnr: str) -> Optional[bytes]:
+        """Return the encoded booking with this PNR"""
+        booking = self.get_by_pnr(pnr)
+        return None if booking is None else self.encode(booking)
+
+    def get_encoded_by_email(self, email: str) -> List[bytes]:
+        """Return the encoded bookings for a passenger email"""
+        return [self.encode(booking) for booking in self.get_by_email(email)]
+
+    def _set_encoder(self, encode: Optional[BookingEncoder], encoding: Optional[str]):
+        if encode is not None:
+            self.encode = encode
+            self.encoding = encoding or getattr(encode, "__qualname__", "custom")
+
+    def _try_encode(self, booking: Dict[str, Any]) -> Optional[bytes]:
+        """Encode history leniently: a booking the encoder rejects stays unencoded"""
+        try:
+            return self.encode(booking)
+        except ValueError:
+            return None
+
+    def close(self):
+        """Release any resources held by the store"""
+
+
+class JsonBookingStore(BookingStore):
+    """Bookings in a snapshot file plus an append-only journal.
+
+    ``bookings.json`` holds a compacted snapshot; every new booking is
+    appended to ``bookings.journal`` as one JSON line, so a write costs the
+    same regardless of history size. Once ``compact_every`` entries have
+    accumulated the journal is folded into the snapshot in the background.
+
+    All bookings are replayed into memory at startup and indexed by
+    normalized PNR and lowercased passenger email, so lookups never touch
+    the disk. Encoded bookings are kept in memory only, by id: new bookings
+    are encoded when written, replayed ones on first read, so a restart
+    always encodes with the current encoder.
+    """
+
+    def __init__(self, data_dir: Path, fsync: bool = False, compact_every: int = 1000,
+                 encode: Optional[BookingEncoder] = None, encoding: Optional[str] = None):
+        self.data_dir = data_dir
+        self.bookings_file = self.data_dir / "bookings.json"
+        self.journal_file = self.data_dir / "bookings.journal"
+        self.compacting_file = self.data_dir / "bookings.journal.compacting"
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self._journal_lock = threading.Lock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._ensure_bookings_file()
+        self._repair_journal()
+        self._journal_entries = len(read_journal(self.journal_file))
+        self._by_pnr: Dict[str, Dict[str, Any]] = {}
+        self._by_email: Dict[str, List[Dict[str, Any]]] = {}
+        self._encoded: Dict[str, bytes] = {}
+        self._set_encoder(encode, encoding)
+        for booking in self._read_bookings()["bookings"]:
+            self._index_booking(booking)
+
+    def _ensure_bookings_file(self):
+        """Create bookings file if it doesn't exist"""
+        self.data_dir.mkdir(exist_ok=True)
+        if not self.bookings_file.exists():
+            with open(self.bookings_file, 'w') as f:
+                json.dump({"bookings": []}, f, indent=2)
+
+    def _repair_journal(self):
+        """Drop a partially written last line left behind by a crash"""
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _read_bookings(self) -> Dict[str, Any]:
+        """Read all bookings from disk"""
+        return {"bookings": replay_json_bookings(self.data_dir)}
+
+    def _index_booking(self, booking: Dict[str, Any]):
+        """Add a booking to the PNR and email lookup indexes"""
+        # The first booking wins on a PNR collision, as the linear scan did
+        self._by_pnr.setdefault(booking.get("pnr", "").lower(), booking)
+        self._by_email.setdefault(booking.get("passenger_email", "").lower(), []).append(booking)
+
+    def _write_bookings(self, data: Dict[str, Any]):
+        """Atomically replace the bookings snapshot"""
+        tmp_file = self.bookings_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.bookings_file)
+
+    def _append_journal(self, bookings: List[Dict[str, Any]]):
+        """Append a batch of bookings to the journal in a single write"""
+        data = "".join(json.dumps(booking) + "\n" for booking in bookings)
+        with self._journal_lock:
+            with open(self.journal_file, 'a') as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._journal_entries += len(bookings)
+            due = self._journal_entries >= self.compact_every
+        if due:
+            self._start_compaction()
+
+    def _start_compaction(self):
+        """Fold the journal into the snapshot on a background thread"""
+        with self._journal_lock:
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """Fold journaled bookings into the snapshot file.
+
+        The live journal is rotated aside under the append lock so new
+        bookings keep flowing into a fresh journal while the snapshot is
+        rewritten.
+        """
+        with self._compaction_lock:
+            with self._journal_lock:
+                if not self.compacting_file.exists():
+                    if not self.journal_file.exists():
+                        return
+                    os.replace(self.journal_file, self.compacting_file)
+                    self._journal_entries = 0
+
+            with open(self.bookings_file, 'r') as f:
+                snapshot = json.load(f)
+            bookings = {b["id"]: b for b in snapshot.get("bookings", [])}
+            for booking in read_journal(self.compacting_file):
+                bookings[booking["id"]] = booking
+
+            self._write_bookings({"bookings": list(bookings.values())})
+            os.remove(self.compacting_file)
+
+    def append(self, bookings: List[Dict[str, Any]]):
+        encoded = [self.encode(booking) for booking in bookings]
+        self._append_journal(bookings)
+        for booking, body in zip(bookings, encoded):
+            self._index_booking(booking)
+            self._encoded[booking["id"]] = body
+
+    def get_by_pnr(self, pnr: str) -> Optional[Dict[str, Any]]:
+        return self._by_pnr.get(pnr.lower())
+
+    def get_by_email(self, email: str) -> List[Dict[str, Any]]:
+        return list(self._by_email.get(email.lower(), []))
+
+    def _encoded_booking(self, booking: Dict[str, Any]) -> bytes:
+        body = self._encoded.get(booking["id"])
+        if body is None:
+            body = self._encoded[booking["id"]] = self.encode(booking)
+        return body
+
+    def get_encoded_by_pnr(self, pnr: str) -> Optional[bytes]:
+        booking = self._by_pnr.get(pnr.lower())
+        return None if booking is None else self._encoded_booking(booking)
+
+    def get_encoded_by_email(self, email: str) -> List[bytes]:
+        return [self._encoded_booking(b) for b in self._by_email.get(email.lower(), [])]
+
+
+class SqliteBookingStore(BookingStore):
+    """Bookings in a SQLite database running in WAL mode.
+
+    Each thread gets its own connection, so readers proceed concurrently
+    with the single writer. Lookup columns hold lowercased PNR and email and
+    are indexed; the full booking is kept as JSON next to its encoded
+    response and the ``encoding`` that produced it. A response made under
+    any other encoding, such as before a change to the response model, is
+    ignored and the booking re-encoded from its JSON. A new database is seeded from any existing JSON bookings so
+    switching backends keeps history.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS bookings (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            pnr TEXT NOT NULL,
+            passenger_email TEXT NOT NULL,
+            data TEXT NOT NULL,
+            response BLOB,
+            encoding TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_pnr ON bookings (pnr)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_passenger_email ON bookings (passenger_email)",
+    )
+    INSERT = ("INSERT OR IGNORE INTO bookings (id, pnr, passenger_email, data, response, encoding) "
+              "VALUES (?, ?, ?, ?, ?, ?)")
+    SELECT_BY_PNR = ("SELECT data, response, encoding FROM bookings "
+                     "WHERE pnr = ? ORDER BY seq LIMIT 1")
+    SELECT_BY_EMAIL = ("SELECT data, response, encoding FROM bookings "
+                       "WHERE passenger_email = ? ORDER BY seq")
+    reads_block = True
+
+    def __init__(self, data_dir: Path, fsync: bool = False, filename: str = "bookings.db",
+                 encode: Optional[BookingEncoder] = None, encoding: Optional[str] = None):
+        self.data_dir = data_dir
+        self.db_file = self.data_dir / filename
+        self.fsync = fsync
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._set_encoder(encode, encoding)
+
+        self.data_dir.mkdir(exist_ok=True)
+        created = not self.db_file.exists()
+        conn = self._connection()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+        if created:
+            history = replay_json_bookings(self.data_dir)
+            self._insert([self._row(b, self._try_encode(b)) for b in history])
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _row(self, booking: Dict[str, Any], response: Optional[bytes]) -> tuple:
+        return (
+            booking["id"],
+            booking.get("pnr", "").lower(),
+            booking.get("passenger_email", "").lower(),
+            json.dumps(booking),
+            response,
+            self.encoding,
+        )
+
+    def _insert(self, rows: List[tuple]):
+        conn = self._connection()
+        with conn:
+            conn.executemany(self.INSERT, rows)
+
+    def _response(self, row: tuple) -> bytes:
+        data, response, encoding = row
+        if response is not None and encoding == self.encoding:
+            return response
+        return self.encode(json.loads(data))
+
+    def append(self, bookings: List[Dict[str, Any]]):
+        self._insert([self._row(b, self.encode(b)) for b in bookings])
+
+    def get_by_pnr(self, pnr: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(self.SELECT_BY_PNR, (pnr.lower(),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_by_email(self, email: str) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(self.SELECT_BY_EMAIL, (email.lower(),)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_encoded_by_pnr(self, pnr: str) -> Optional[bytes]:
+        row = self._connection().execute(self.SELECT_BY_PNR, (pnr.lower(),)).fetchone()
+        return self._response(row) if row else None
+
+    def get_encoded_by_email(self, email: str) -> List[bytes]:
+        rows = self._connection().execute(self.SELECT_BY_EMAIL, (email.lower(),)).fetchall()
+        return [self._response(row) for row in rows]
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+BACKENDS = {
+    "json": JsonBookingStore,
+    "sqlite": SqliteBookingStore,
+}
+
+
+def create_store(backend: str, data_dir: Path, **options) -> BookingStore:
+    """Instantiate the booking store registered under ``backend``"""
+    try:
+        store_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown booking backend {backend!r}; expected one of {sorted(BACKENDS)}")
+    return store_class(data_dir, **options)
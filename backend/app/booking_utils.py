@@ -1,66 +1,161 @@
-import json
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
 import uuid
 
+from .booking_storage import BookingStore, create_store
+from .metrics import BATCH_BUCKETS, registry
+
+commit_seconds = registry.histogram(
+    "skyscan_booking_commit_duration_seconds", "Time to persist one group commit", ("backend",))
+commit_sizes = registry.histogram(
+    "skyscan_booking_commit_batch_size", "Bookings persisted per group commit", ("backend",),
+    BATCH_BUCKETS)
+commit_failures = registry.counter(
+    "skyscan_booking_commit_failures_total", "Group commits that failed", ("backend",))
+
 class BookingManager:
-    def __init__(self, data_dir: str = "data"):
+    """Creates bookings and group-commits them to a pluggable store.
+
+    ``backend`` selects the store (``"json"`` or ``"sqlite"``); extra
+    keyword arguments are passed through to it. Store writes are owned by a
+    single writer thread. Bookings submitted within ``commit_window``
+    seconds of each other are committed in one store write (and one fsync),
+    and each caller is released once the batch holding its booking is
+    durable.
+    """
+
+    def __init__(self, data_dir: str = "data", backend: str = "json", fsync: bool = False,
+                 commit_window: float = 0.002, max_batch: int = 256, **store_options):
         self.base_dir = Path(__file__).parent.parent
         self.data_dir = self.base_dir / data_dir
-        self.bookings_file = self.data_dir / "bookings.json"
-        self._ensure_bookings_file()
-    
-    def _ensure_bookings_file(self):
-        """Create bookings file if it doesn't exist"""
-        self.data_dir.mkdir(exist_ok=True)
-        if not self.bookings_file.exists():
-            with open(self.bookings_file, 'w') as f:
-                json.dump({"bookings": []}, f, indent=2)
-    
-    def _read_bookings(self) -> Dict[str, Any]:
-        """Read all bookings from file"""
-        with open(self.bookings_file, 'r') as f:
-            return json.load(f)
-    
-    def _write_bookings(self, data: Dict[str, Any]):
-        """Write bookings to file"""
-        with open(self.bookings_file, 'w') as f:
-            json.dump(data, f, indent=2)
-    
-    def create_booking(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new booking"""
-        bookings_data = self._read_bookings()
-        
+        self.backend = backend
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self.store: BookingStore = create_store(backend, self.data_dir, fsync=fsync, **store_options)
+        self._commit_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+
+    def _writer_loop(self):
+        """Drain the commit queue, group-committing bookings that arrive together"""
+        while True:
+            item = self._commit_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.commit_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._commit_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._commit_queue.put(None)
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: List[tuple]):
+        """Persist one group of pending bookings and release their callers"""
+        bookings = [booking for pending, _ in batch for booking in pending]
+        started = time.perf_counter()
+        try:
+            self.store.append(bookings)
+        except Exception as e:
+            commit_failures.inc(self.backend)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        commit_seconds.observe(time.perf_counter() - started, self.backend)
+        commit_sizes.observe(len(bookings), self.backend)
+        for pending, future in batch:
+            future.set_result(pending)
+
+    def _submit(self, bookings: List[Dict[str, Any]]) -> Future:
+        """Queue bookings for the writer thread"""
+        future: Future = Future()
+        self._commit_queue.put((bookings, future))
+        return future
+
+    def close(self):
+        """Flush pending commits, stop the writer thread and close the store"""
+        self._commit_queue.put(None)
+        self._writer_thread.join()
+        self.store.close()
+
+    def _new_booking(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Assign ID, PNR and status to incoming booking data"""
         # Generate booking ID and PNR
         booking_id = str(uuid.uuid4())
         pnr = ''.join(str(uuid.uuid4().int)[:6].upper())
-        
-        booking = {
+
+        return {
             "id": booking_id,
             "pnr": pnr,
             "status": "confirmed",
             "created_at": datetime.utcnow().isoformat(),
             **booking_data
         }
-        
-        bookings_data["bookings"].append(booking)
-        self._write_bookings(bookings_data)
-        
-        return booking
-    
+
+    def create_booking(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new booking, blocking until it is committed"""
+        booking = self._new_booking(booking_data)
+        return self._submit([booking]).result()[0]
+
+    async def create_booking_async(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new booking without blocking the event loop"""
+        booking = self._new_booking(booking_data)
+        committed = await asyncio.wrap_future(self._submit([booking]))
+        return committed[0]
+
+    def create_bookings(self, bookings_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several bookings that are persisted together in one commit"""
+        return self._submit([self._new_booking(data) for data in bookings_data]).result()
+
+    async def create_bookings_async(self, bookings_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several bookings in one commit without blocking the event loop"""
+        bookings = [self._new_booking(data) for data in bookings_data]
+        return await asyncio.wrap_future(self._submit(bookings))
+
+    async def _read_async(self, read: Callable[..., Any], *args) -> Any:
+        """Run a store read on the default executor if it waits on the disk"""
+        if not self.store.reads_block:
+            return read(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, read, *args)
+
     def get_user_bookings(self, email: str) -> List[Dict[str, Any]]:
         """Get all bookings for a user"""
-        bookings_data = self._read_bookings()
-        return [
-            b for b in bookings_data.get("bookings", [])
-            if b.get("passenger_email", "").lower() == email.lower()
-        ]
-    
+        return self.store.get_by_email(email)
+
     def get_booking_by_pnr(self, pnr: str) -> Optional[Dict[str, Any]]:
         """Get booking by PNR"""
-        bookings_data = self._read_bookings()
-        for booking in bookings_data.get("bookings", []):
-            if booking.get("pnr", "").lower() == pnr.lower():
-                return booking
-        return None
+        return self.store.get_by_pnr(pnr)
+
+    def get_encoded_user_bookings(self, email: str) -> List[bytes]:
+        """Get a user's bookings as encoded response bodies"""
+        return self.store.get_encoded_by_email(email)
+
+    def get_encoded_booking_by_pnr(self, pnr: str) -> Optional[bytes]:
+        """Get the encoded response body of the booking with this PNR"""
+        return self.store.get_encoded_by_pnr(pnr)
+
+    async def get_user_bookings_async(self, email: str) -> List[Dict[str, Any]]:
+        """Get all bookings for a user without blocking the event loop"""
+        return await self._read_async(self.get_user_bookings, email)
+
+    async def get_encoded_user_bookings_async(self, email: str) -> List[bytes]:
+        """Get a user's encoded bookings without blocking the event loop"""
+        return await self._read_async(self.get_encoded_user_bookings, email)
+
+    async def get_encoded_booking_by_pnr_async(self, pnr: str) -> Optional[bytes]:
+        """Get an encoded booking by PNR without blocking the event loop"""
+        return await self._read_async(self.get_encoded_booking_by_pnr, pnr)
@@ -0,0 +1,53 @@
+import os
+
+from dotenv import load_dotenv
+
+# Settings come from the environment, optionally seeded from a .env file
+load_dotenv()
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a boolean environment variable such as 1/0 or true/false"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Directory holding flights, airlines, services and bookings; relative to backend/
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+# Booking storage backend: "json" (snapshot + journal) or "sqlite"
+BOOKING_BACKEND = os.getenv("BOOKING_BACKEND", "json")
+
+# fsync every booking commit before acknowledging it
+BOOKING_FSYNC = env_flag("BOOKING_FSYNC", True)
+
+# Record per-route request metrics, exposed at /metrics
+METRICS_ENABLED = env_flag("METRICS_ENABLED", True)
+
+# Request profiling (see app.profiling); off unless one of the triggers is set.
+# Fraction of requests to profile, e.g. 0.01
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Keep profiles of requests slower than this many milliseconds; 0 disables
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+
+# Requests sending this value in X-Profile-Token are always profiled; empty disables
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+# "sample" (all-thread stack sampler) or "cprofile" (event-loop thread only)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")
+
+# Ring directory for profiles, relative to backend/, and how many it keeps
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Functions listed in each profile's text summary
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+
+# Cached /flights/search responses; 0 disables caching
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+
+# Seconds a cached search response stays fresh
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "60"))
@@ -0,0 +1,188 @@
+import heapq
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .fare_store import UNKNOWN, ColumnarFareStore, max_cents
+
+SECONDS_PER_DAY = 86400
+_EMPTY = np.empty(0, dtype=np.int64)
+
+# Shortest layover between an arrival and an onward departure at the same airport
+MIN_CONNECTION_SECONDS = 45 * 60
+# Longest layover considered a connection rather than a stopover
+MAX_LAYOVER_SECONDS = 24 * 3600
+# Stop bound applied when the search does not set max_stops
+DEFAULT_MAX_STOPS = 2
+
+
+class Connection:
+    """One journey found by the connection search: legs as catalog rows"""
+
+    __slots__ = ("rows", "price_cents", "duration", "stops")
+
+    def __init__(self, rows: Tuple[int, ...], price_cents: int, duration: int, stops: int):
+        self.rows = rows
+        self.price_cents = price_cents
+        self.duration = duration
+        self.stops = stops
+
+    @property
+    def price(self) -> float:
+        return self.price_cents / 100
+
+    def __repr__(self) -> str:
+        return f"Connection({self.rows}, {self.price_cents}c, {self.duration}min, {self.stops} stops)"
+
+
+class ConnectionGraph:
+    """Time-dependent route graph over the catalog's flight segments.
+
+    Every record with a known departure and arrival time is an edge from
+    its origin to its destination airport. Edges are the bookable catalog
+    records, not individual FlightSegments: the supplier prices a whole
+    FareItinerary, so a segment has no fare of its own to rank by, and a
+    booking references a record. A record is normalized from the first
+    FlightSegment of its first OriginDestinationOption (see
+    ``normalize_itinerary``), so later segments of a multi-segment
+    itinerary are not in the graph; the feed currently sends one segment
+    per option. Departures are grouped per
+    airport and sorted by time, so the onward flights reachable from an
+    arrival are one ``searchsorted`` slice rather than a scan of the
+    catalog.
+
+    Supplier times are local to each airport. Connections only ever compare
+    an arrival with a departure at the same airport, and elapsed journey
+    time is the sum of leg durations and layovers, so no time zone data is
+    needed.
+    """
+
+    def __init__(self, fares: ColumnarFareStore, min_connection: int = MIN_CONNECTION_SECONDS,
+                 max_layover: int = MAX_LAYOVER_SECONDS):
+        self.fares = fares
+        self.min_connection = min_connection
+        self.max_layover = max_layover
+
+        rows = np.flatnonzero((fares.departure_epoch != UNKNOWN) & (fares.arrival_epoch != UNKNOWN))
+        order = rows[np.lexsort((fares.departure_epoch[rows], fares.origin[rows]))]
+        starts = np.flatnonzero(np.diff(fares.origin[order])) + 1
+        # airport id -> (rows departing it by time, their departure epochs)
+        self.departures: Dict[int, Tuple[np.ndarray, np.ndarray]] = {
+            int(fares.origin[group[0]]): (group, fares.departure_epoch[group])
+            for group in np.split(order, starts) if len(group)
+        }
+
+    def _departing(self, airport: int, earliest: int, latest: int) -> np.ndarray:
+        """Rows leaving ``airport`` with earliest <= departure < latest"""
+        entry = self.departures.get(airport)
+        if entry is None:
+            return _EMPTY
+        rows, epochs = entry
+        lo, hi = np.searchsorted(epochs, [earliest, latest])
+        return rows[lo:hi]
+
+    def _eligible(self, rows: np.ndarray, budget: Optional[int], stops_left: int,
+                  airlines: Optional[np.ndarray]) -> np.ndarray:
+        """Drop legs that break the price budget, stop bound or airline filter"""
+        fares = self.fares
+        mask = fares.stops[rows] <= stops_left
+        if budget is not None:
+            mask &= fares.price_cents[rows] <= budget
+        if airlines is not None:
+            mask &= np.isin(fares.airline[rows], airlines)
+        return rows[mask]
+
+    def search(self, origin: int, destination: int, k: int, sort: Optional[str] = "price",
+               max_stops: Optional[int] = None, departure_day: Optional[int] = None,
+               max_price: Optional[float] = None,
+               airlines: Optional[Iterable[int]] = None) -> List[Connection]:
+        """Return up to ``k`` best journeys from ``origin`` to ``destination``.
+
+        Airports are interned ids of ``fares.airports``. Journeys are ranked
+        by total price, total elapsed duration or first departure time
+        (``sort``), each breaking ties on the others. ``max_stops`` bounds
+        the stops of the whole journey: one per connection plus the stops
+        of each leg. No journey visits an airport twice.
+
+        Partial journeys are expanded best-first from a priority queue.
+        Extending a journey never lowers its rank, so journeys reach the
+        destination in rank order and the search stops after ``k``. As in
+        k-shortest-path search, a partial journey is dropped once ``k``
+        journeys that were expanded before it end with the same leg, have
+        visited the same airports and used no more stops (and, under a price
+        limit, no more money): each of those can take any onward route it
+        can, at no worse a rank, so it could not have been among the ``k``
+        best. The results are exact; the pruning bounds the work through
+        dense hubs.
+        """
+        fares = self.fares
+        max_stops = DEFAULT_MAX_STOPS if max_stops is None else max_stops
+        budget = None if max_price is None else max_cents(max_price)
+        airline_ids = None if airlines is None else np.fromiter(airlines, dtype=np.int32)
+
+        def rank(price_cents: int, duration: int, first_departure: int) -> tuple:
+            if sort == "duration":
+                return (duration, price_cents, first_departure)
+            if sort == "departure":
+                return (first_departure, price_cents, duration)
+            return (price_cents, duration, first_departure)
+
+        if departure_day is None:
+            first_legs = self.departures.get(origin, (_EMPTY, None))[0]
+        else:
+            day_start = departure_day * SECONDS_PER_DAY
+            first_legs = self._departing(origin, day_start, day_start + SECONDS_PER_DAY)
+        first_legs = self._eligible(first_legs, budget, max_stops, airline_ids)
+
+        # Entries: (rank, seq, rows, visited airports, price, duration, stops, first departure)
+        heap = []
+        for seq, row in enumerate(first_legs.tolist()):
+            price_cents = int(fares.price_cents[row])
+            duration = int(fares.duration[row])
+            departs = int(fares.departure_epoch[row])
+            heap.append((rank(price_cents, duration, departs), seq, (row,),
+                         (origin, int(fares.destination[row])), price_cents, duration,
+                         int(fares.stops[row]), departs))
+        heapq.heapify(heap)
+        seq = len(heap)
+
+        results: List[Connection] = []
+        # (last leg, visited airports) -> stops and price of each journey expanded from it
+        expanded: Dict[Tuple[int, FrozenSet[int]], List[Tuple[int, int]]] = {}
+        while heap and len(results) < k:
+            _, _, rows, visited, price_cents, duration, stops, departs = heapq.heappop(heap)
+            last = rows[-1]
+            airport = visited[-1]
+            if airport == destination:
+                results.append(Connection(rows, price_cents, duration, stops))
+                continue
+
+            labels = expanded.setdefault((last, frozenset(visited)), [])
+            dominating = sum(1 for used, spent in labels
+                             if used <= stops and (budget is None or spent <= price_cents))
+            if dominating >= k:
+                continue
+            labels.append((stops, price_cents))
+
+            # Each connection is a stop of its own
+            stops_left = max_stops - stops - 1
+            if stops_left < 0:
+                continue
+            arrives = int(fares.arrival_epoch[last])
+            onward = self._departing(airport, arrives + self.min_connection,
+                                     arrives + self.max_layover + 1)
+            onward = self._eligible(
+                onward, None if budget is None else budget - price_cents, stops_left, airline_ids)
+            for row in onward.tolist():
+                next_airport = int(fares.destination[row])
+                if next_airport in visited:
+                    continue
+                leg_price = price_cents + int(fares.price_cents[row])
+                layover = (int(fares.departure_epoch[row]) - arrives) // 60
+                leg_duration = duration + layover + int(fares.duration[row])
+                leg_stops = stops + 1 + int(fares.stops[row])
+                heapq.heappush(heap, (rank(leg_price, leg_duration, departs), seq, rows + (row,),
+                                      visited + (next_airport,), leg_price, leg_duration,
+                                      leg_stops, departs))
+                seq += 1
+        return results
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Below this size the gzip header and framing outweigh the savings
+MIN_GZIP_SIZE = 512
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows a gzip response"""
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def etag_matches(if_none_match: str, etags: Tuple[str, ...]) -> bool:
+    """Whether an If-None-Match header names any of ``etags`` (weak comparison)"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+
+class EncodedJson:
+    """A JSON payload encoded once, with its ETag and a gzip variant.
+
+    The body is rendered exactly as ``JSONResponse`` would render it. The
+    gzip variant carries its own ETag (the identity tag plus ``-gzip``)
+    since the bytes differ; either tag revalidates the payload.
+    """
+
+    __slots__ = ("body", "etag", "gzip_body", "gzip_etag")
+
+    def __init__(self, content: Any):
+        self.body: bytes = JSONResponse(content).body
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_body: Optional[bytes] = None
+        self.gzip_etag = f'"{digest}-gzip"'
+        if len(self.body) >= MIN_GZIP_SIZE:
+            compressed = gzip.compress(self.body, compresslevel=6, mtime=0)
+            if len(compressed) < len(self.body):
+                self.gzip_body = compressed
+
+    def response(self, request: Request) -> Response:
+        """Answer ``request`` with 304, the gzip variant or the plain body"""
+        use_gzip = self.gzip_body is not None and accepts_gzip(
+            request.headers.get("accept-encoding", ""))
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, (self.etag, self.gzip_etag)):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class EncodedJsonFile:
+    """A JSON file kept encoded in memory and re-read when it changes.
+
+    Each access stats the file; a changed mtime or size re-reads and
+    re-encodes it, otherwise the cached encoding is returned.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._encoded: Optional[EncodedJson] = None
+
+    def get(self) -> EncodedJson:
+        stat = self.path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        encoded = self._encoded
+        if encoded is not None and stamp == self._stamp:
+            return encoded
+        with self._lock:
+            if self._encoded is None or stamp != self._stamp:
+                with open(self.path, "r") as f:
+                    self._encoded = EncodedJson(json.load(f))
+                self._stamp = stamp
+            return self._encoded
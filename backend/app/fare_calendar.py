@@ -0,0 +1,153 @@
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .fare_store import UNKNOWN, CodeTable, ColumnarFareStore, day_number, day_to_date
+
+# A cell key packs (origin, destination, day) into one int64, so sorting keys
+# orders cells by route and then day
+_AIRPORT_BITS = 21
+_DAY_BITS = 21
+_DAY_OFFSET = 1 << (_DAY_BITS - 1)
+_EMPTY = np.empty(0, dtype=np.int64)
+
+# Per-cell aggregates, ascending by key: (keys, min cents, min duration, count)
+Cells = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+_NO_CELLS: Cells = (_EMPTY, _EMPTY, _EMPTY, _EMPTY)
+
+
+def _cell_keys(origin, destination, day) -> np.ndarray:
+    """Pack airport ids and day numbers, given as arrays or scalars, into cell keys"""
+    route = (np.asarray(origin, dtype=np.int64) << _AIRPORT_BITS) | destination
+    return (route << _DAY_BITS) | (np.asarray(day, dtype=np.int64) + _DAY_OFFSET)
+
+
+def _aggregate(keys: np.ndarray, cents: np.ndarray, durations: np.ndarray) -> Cells:
+    """Group rows by cell key with vectorized reductions"""
+    if not len(keys):
+        return _NO_CELLS
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return (
+        keys[starts],
+        np.minimum.reduceat(cents[order], starts),
+        np.minimum.reduceat(durations[order], starts),
+        np.diff(np.append(starts, len(keys))),
+    )
+
+
+class FareCalendar:
+    """Lowest fare, shortest duration and flight count per route and day.
+
+    Cells are held as parallel arrays sorted by a packed
+    ``(origin, destination, day)`` key; airport ids come from the
+    calendar's own code table, so keys are stable across catalog versions.
+    The first ``update`` builds every cell with one sort and ``reduceat``
+    pass over the fare store's columns. Later updates compare the new
+    store's columns with the previous store's, position by position (the
+    same ``flt_<n>`` id), and recompute only the cells that held or now
+    hold a changed record, plus records added or dropped at the end. The
+    previous store is kept by reference, not copied, so the calendar adds
+    no per-record state of its own. Reads and updates are serialized by a
+    lock.
+    """
+
+    def __init__(self):
+        self.airports = CodeTable()
+        self._cells = _NO_CELLS
+        # The store the cells were built from, and its airport ids in our table
+        self._fares: Optional[ColumnarFareStore] = None
+        self._airport_ids = _EMPTY
+        self._lock = threading.Lock()
+
+    def _remap(self, fares: ColumnarFareStore) -> np.ndarray:
+        """Map a store's per-version airport ids onto the calendar's own"""
+        return np.fromiter((self.airports.intern(code) for code in fares.airports.codes),
+                           dtype=np.int64, count=len(fares.airports))
+
+    @staticmethod
+    def _row_keys(fares: ColumnarFareStore, airport_ids: np.ndarray) -> np.ndarray:
+        if not len(fares):
+            return _EMPTY
+        return _cell_keys(airport_ids[fares.origin], airport_ids[fares.destination],
+                          fares.departure_day)
+
+    def update(self, fares: ColumnarFareStore) -> int:
+        """Recompute the cells touched by records that changed since the last catalog.
+
+        Changes are found without holding the lock, so readers only wait
+        while the recomputed cells are merged in; callers must not run two
+        updates at once. Returns the number of dated itineraries added or
+        removed.
+        """
+        airport_ids = self._remap(fares)
+        keys = self._row_keys(fares, airport_ids)
+        # Records without a departure date are not on the calendar
+        dated = fares.departure_day != UNKNOWN
+        previous = self._fares
+
+        if previous is None:
+            rows = np.flatnonzero(dated)
+            affected = None
+            changed = len(rows)
+        else:
+            old_keys = self._row_keys(previous, self._airport_ids)
+            old_dated = previous.departure_day != UNKNOWN
+            shared = min(len(previous), len(fares))
+            differs = ((old_keys[:shared] != keys[:shared])
+                       | (previous.price_cents[:shared] != fares.price_cents[:shared])
+                       | (previous.duration[:shared] != fares.duration[:shared]))
+            differs = np.flatnonzero(differs)
+            removed = np.concatenate([differs, np.arange(shared, len(previous))])
+            added = np.concatenate([differs, np.arange(shared, len(fares))])
+            removed = removed[old_dated[removed]]
+            added = added[dated[added]]
+            changed = len(removed) + len(added)
+            if not changed:
+                with self._lock:
+                    self._fares, self._airport_ids = fares, airport_ids
+                return 0
+            affected = np.unique(np.concatenate([old_keys[removed], keys[added]]))
+            rows = np.flatnonzero(dated & np.isin(keys, affected))
+
+        cells = _aggregate(keys[rows], fares.price_cents[rows], fares.duration[rows])
+        if affected is not None:
+            kept = ~np.isin(self._cells[0], affected)
+            merged = [np.concatenate([column[kept], new]) for column, new in zip(self._cells, cells)]
+            order = np.argsort(merged[0], kind="stable")
+            cells = tuple(column[order] for column in merged)
+
+        with self._lock:
+            self._cells = cells
+            self._fares, self._airport_ids = fares, airport_ids
+        return changed
+
+    def days(self, origin: str, destination: str, start: date, end: date) -> List[Dict[str, Any]]:
+        """Per-day aggregates for a route from ``start`` to ``end`` inclusive.
+
+        Days without fares are omitted.
+        """
+        with self._lock:
+            origin_id = self.airports.ids.get(origin.upper())
+            destination_id = self.airports.ids.get(destination.upper())
+            if origin_id is None or destination_id is None:
+                return []
+            keys, cents, durations, counts = self._cells
+            first, last, offset = _cell_keys(origin_id, destination_id,
+                                             [day_number(start), day_number(end), 0]).tolist()
+            lo = int(np.searchsorted(keys, first))
+            hi = int(np.searchsorted(keys, last, side="right"))
+            return [
+                {
+                    "date": day_to_date(key - offset).isoformat(),
+                    "minPrice": price / 100,
+                    "minDuration": duration,
+                    "count": count,
+                }
+                for key, price, duration, count in zip(
+                    keys[lo:hi].tolist(), cents[lo:hi].tolist(),
+                    durations[lo:hi].tolist(), counts[lo:hi].tolist())
+            ]
@@ -0,0 +1,210 @@
+import heapq
+import operator
+from datetime import date, datetime, timezone
+from decimal import ROUND_FLOOR, Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Day numbers are stored relative to the Unix epoch; -1 marks an unknown date
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+UNKNOWN = -1
+
+
+def epoch_seconds(timestamp: str) -> int:
+    """Seconds since the epoch for a supplier timestamp, or -1 if unparseable.
+
+    Supplier times are local wall-clock times with no offset; they are
+    treated as UTC, so values are comparable with each other and, across
+    flights, exactly comparable at the same airport.
+    """
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return UNKNOWN
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def day_number(value: Optional[date]) -> int:
+    """Convert a date to its epoch day number"""
+    return value.toordinal() - _EPOCH_ORDINAL if value else UNKNOWN
+
+
+def day_to_date(day: int) -> Optional[date]:
+    """Convert an epoch day number back to a date"""
+    return date.fromordinal(day + _EPOCH_ORDINAL) if day != UNKNOWN else None
+
+
+def max_cents(amount: float) -> int:
+    """The largest whole number of cents not above a price limit"""
+    return int((Decimal(str(amount)) * 100).to_integral_value(ROUND_FLOOR))
+
+
+class CodeTable:
+    """Interns string codes to dense integer ids"""
+
+    def __init__(self):
+        self.codes: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_codes(cls, codes: List[str]) -> "CodeTable":
+        """Rebuild a table whose ids are the positions of ``codes``"""
+        table = cls()
+        for code in codes:
+            table.intern(code)
+        return table
+
+    def intern(self, code: str) -> int:
+        code_id = self.ids.get(code)
+        if code_id is None:
+            code_id = self.ids[code] = len(self.codes)
+            self.codes.append(code)
+        return code_id
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+class ColumnarFareStore:
+    """Column-per-attribute view of the catalog records for vectorized filtering.
+
+    Row ``i`` of every column describes ``records[i]`` of the snapshot the
+    store was built from. Airport and airline codes are interned into
+    integer columns so grouping and equality tests never touch strings, and
+    fares stay in integer cents like the records.
+    """
+
+    def __init__(self, records: List[Any]):
+        n = len(records)
+        self.airports = CodeTable()
+        self.airlines = CodeTable()
+
+        self.price_cents = np.fromiter((r.price_cents for r in records), dtype=np.int64, count=n)
+        self.stops = np.fromiter((r.stops for r in records), dtype=np.int32, count=n)
+        self.duration = np.fromiter((r.duration for r in records), dtype=np.int32, count=n)
+        self.departure_epoch = np.fromiter(
+            (epoch_seconds(r.departure_time) for r in records), dtype=np.int64, count=n)
+        self.arrival_epoch = np.fromiter(
+            (epoch_seconds(r.arrival_time) for r in records), dtype=np.int64, count=n)
+        self.departure_day = np.fromiter(
+            (day_number(r.departure_date) for r in records), dtype=np.int32, count=n)
+        self.origin = np.fromiter(
+            (self.airports.intern(r.departure_airport.upper()) for r in records),
+            dtype=np.int32, count=n)
+        self.destination = np.fromiter(
+            (self.airports.intern(r.arrival_airport.upper()) for r in records),
+            dtype=np.int32, count=n)
+        self.airline = np.fromiter(
+            (self.airlines.intern(r.airline_code) for r in records), dtype=np.int32, count=n)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], airport_codes: List[str],
+                     airline_codes: List[str]) -> "ColumnarFareStore":
+        """Wrap prebuilt columns, such as read-only views of a mapped snapshot"""
+        store = cls.__new__(cls)
+        store.airports = CodeTable.from_codes(airport_codes)
+        store.airlines = CodeTable.from_codes(airline_codes)
+        for name, column in columns.items():
+            setattr(store, name, column)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.price_cents)
+
+    @staticmethod
+    def group_rows(column: np.ndarray) -> Dict[int, np.ndarray]:
+        """Split row ids by column value; each group stays in ascending row order"""
+        if not len(column):
+            return {}
+        order = np.argsort(column, kind="stable")
+        ordered = column[order]
+        starts = np.flatnonzero(np.diff(ordered)) + 1
+        return {
+            int(column[group[0]]): group
+            for group in np.split(order, starts)
+        }
+
+    def sort_keys(self, sort: Optional[str], rows: np.ndarray) -> np.ndarray:
+        """Return the ordering key of each row for a sort field.
+
+        Unknown departure times sort last; with no sort field rows keep
+        catalog order.
+        """
+        if sort == "price":
+            return self.price_cents[rows]
+        if sort == "duration":
+            return self.duration[rows]
+        if sort == "departure":
+            epochs = self.departure_epoch[rows]
+            return np.where(epochs == UNKNOWN, np.iinfo(np.int64).max, epochs)
+        return rows
+
+    def filter(self, rows: Optional[np.ndarray] = None, max_price: Optional[float] = None,
+               max_stops: Optional[int] = None) -> np.ndarray:
+        """Return the ascending row ids that satisfy every given predicate.
+
+        ``rows`` restricts evaluation to a candidate subset (for example an
+        index lookup); ``None`` evaluates the predicates over whole columns.
+        ``max_price`` is compared in cents.
+        """
+        budget = None if max_price is None else max_cents(max_price)
+        if rows is None:
+            mask = np.ones(len(self), dtype=bool)
+            if budget is not None:
+                mask &= self.price_cents <= budget
+            if max_stops is not None:
+                mask &= self.stops <= max_stops
+            return np.flatnonzero(mask)
+
+        mask = np.ones(len(rows), dtype=bool)
+        if budget is not None:
+            mask &= self.price_cents[rows] <= budget
+        if max_stops is not None:
+            mask &= self.stops[rows] <= max_stops
+        return rows[mask]
+
+
+def top_k(rows: np.ndarray, keys: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Return up to ``k`` rows with the smallest ``(key, row)`` in ascending order.
+
+    ``rows`` must be ascending. Selection is a partial partition over the
+    key column, so only the ``k`` winners are ever fully sorted; ties on
+    the boundary key are broken by row id so pages never overlap.
+    """
+    if k is None or len(rows) <= k:
+        return rows[np.lexsort((rows, keys))]
+
+    boundary = keys[np.argpartition(keys, k - 1)[:k]].max()
+    below = keys < boundary
+    ties = rows[keys == boundary][:k - int(below.sum())]
+    chosen = np.concatenate([rows[below], ties])
+    chosen_keys = np.concatenate([keys[below], keys[keys == boundary][:len(ties)]])
+    return chosen[np.lexsort((chosen, chosen_keys))]
+
+
+def top_k_pairs(a_keys: Sequence[Any], b_keys: Sequence[Any], k: int,
+                combine: Callable[[Any, Any], Any] = operator.add) -> List[Tuple[int, int]]:
+    """Return up to ``k`` index pairs ``(i, j)`` with the smallest ``combine(a[i], b[j])``.
+
+    Both key sequences must be ascending and ``combine`` monotone in each
+    argument, so the successors of a pair are never better than it. Pairs
+    are drawn lazily from a frontier heap seeded with ``(0, 0)``, costing
+    O(k log k) instead of ranking the full cross product. Ties are broken
+    by ``(i, j)``.
+    """
+    if k <= 0 or not len(a_keys) or not len(b_keys):
+        return []
+    heap = [(combine(a_keys[0], b_keys[0]), 0, 0)]
+    seen = {(0, 0)}
+    pairs = []
+    while heap and len(pairs) < k:
+        _, i, j = heapq.heappop(heap)
+        pairs.append((i, j))
+        for ni, nj in ((i + 1, j), (i, j + 1)):
+            if ni < len(a_keys) and nj < len(b_keys) and (ni, nj) not in seen:
+                seen.add((ni, nj))
+                heapq.heappush(heap, (combine(a_keys[ni], b_keys[nj]), ni, nj))
+    return pairs
@@ -0,0 +1,372 @@
+import json
+import logging
+import os
+import threading
+import time
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import date
+
+import numpy as np
+
+from .airline_index import AirlineIndex
+from .airport_index import AirportIndex
+from .binary_catalog import open_snapshot, source_stamp, write_snapshot
+from .connections import ConnectionGraph
+from .encoded_response import EncodedJson
+from .fare_calendar import FareCalendar
+from .fare_store import CodeTable, ColumnarFareStore, day_to_date
+from .flight_ingest import ProgressCallback, iter_fare_itineraries, log_progress
+from .itinerary import Itinerary, to_cents
+from .metrics import registry, span
+
+logger = logging.getLogger(__name__)
+
+catalog_reloads = registry.counter(
+    "skyscan_catalog_reloads_total", "Catalog versions loaded, by source", ("source",))
+catalog_reload_failures = registry.counter(
+    "skyscan_catalog_reload_failures_total", "Catalog reloads that failed and kept the old version")
+
+
+def normalize_itinerary(idx: int, item: Dict[str, Any],
+                        dates: Optional[Dict[date, date]] = None) -> Optional[Itinerary]:
+    """Flatten one supplier FareItinerary into a compact Itinerary"""
+    itin = item.get("FareItinerary", {})
+
+    # price & currency
+    total_fare = itin.get("AirItineraryFareInfo", {}) \
+                     .get("ItinTotalFares", {}) \
+                     .get("TotalFare", {})
+
+    # flatten first flight segment
+    od_options = itin.get("OriginDestinationOptions", [])
+    if not od_options:
+        return None
+    flight_seg = od_options[0].get("OriginDestinationOption", [])[0] \
+                              .get("FlightSegment", {})
+
+    return Itinerary(
+        index=idx,
+        airline_code=flight_seg.get("MarketingAirlineCode", ""),
+        airline_name=flight_seg.get("MarketingAirlineName", ""),
+        flight_number=flight_seg.get("FlightNumber", ""),
+        departure_airport=flight_seg.get("DepartureAirportLocationCode", ""),
+        arrival_airport=flight_seg.get("ArrivalAirportLocationCode", ""),
+        departure_time=flight_seg.get("DepartureDateTime", ""),
+        arrival_time=flight_seg.get("ArrivalDateTime", ""),
+        duration=int(flight_seg.get("JourneyDuration", 0)),
+        price_cents=to_cents(total_fare.get("Amount", 0)),
+        stops=od_options[0].get("TotalStops", 0),
+        currency=total_fare.get("CurrencyCode", "USD"),
+        cabin_class=flight_seg.get("CabinClassText", ""),
+        dates=dates,
+    )
+
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _named_postings(groups: Dict[int, np.ndarray], table: CodeTable) -> Dict[str, np.ndarray]:
+    """Key interned-code row groups by their original string code"""
+    return {table.codes[code_id]: rows for code_id, rows in groups.items()}
+
+
+def _intersect(postings: List[np.ndarray]) -> np.ndarray:
+    """Intersect sorted posting arrays, probing the larger arrays from the smallest"""
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if not len(result) or not len(other):
+            return _EMPTY
+        idx = np.searchsorted(other, result)
+        idx[idx == len(other)] = 0
+        result = result[other[idx] == result]
+    return result
+
+
+def _union(postings: List[np.ndarray]) -> np.ndarray:
+    """Merge posting arrays into one ascending array"""
+    postings = [p for p in postings if len(p)]
+    if not postings:
+        return _EMPTY
+    if len(postings) == 1:
+        return postings[0]
+    return np.unique(np.concatenate(postings))
+
+
+def read_airlines(path: Path) -> List[Dict[str, Any]]:
+    """Read the supplier airline list, or an empty list if there is none"""
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class CatalogSnapshot:
+    """Immutable, fully normalized view of one version of flights.json.
+
+    ``records`` may be any sequence of Itinerary, such as the lazily built
+    rows of a mapped binary snapshot; ``fares`` is then passed in prebuilt.
+    ``airlines_stamp`` is the mtime and size of the airline list it was
+    built with, or ``None`` if there was none.
+    """
+
+    def __init__(self, records: Sequence[Itinerary], mtime_ns: int, size: int, version: int,
+                 fares: Optional[ColumnarFareStore] = None,
+                 airlines: Optional[List[Dict[str, Any]]] = None,
+                 airlines_stamp: Optional[Tuple[int, int]] = None):
+        self.records = records
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.airlines_stamp = airlines_stamp
+        self.version = version
+        self.loaded_at = time.time()
+        self.fares = fares if fares is not None else ColumnarFareStore(records)
+        self.airlines = airlines if airlines is not None else []
+        self.airline_index = AirlineIndex(self.airlines)
+        self.airport_index = AirportIndex(self.fares)
+        # Built with the snapshot, on the reload thread, rather than by the first search
+        self.connections = ConnectionGraph(self.fares)
+
+        # Posting arrays of record positions, ascending within each key
+        fares = self.fares
+        self.by_origin = _named_postings(fares.group_rows(fares.origin), fares.airports)
+        self.by_destination = _named_postings(fares.group_rows(fares.destination), fares.airports)
+        self.by_airline = _named_postings(fares.group_rows(fares.airline), fares.airlines)
+        self.by_date = {
+            day_to_date(day): rows
+            for day, rows in fares.group_rows(fares.departure_day).items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @cached_property
+    def encoded_airlines(self) -> EncodedJson:
+        """The full airline list, encoded once per version"""
+        return EncodedJson(self.airlines)
+
+    @cached_property
+    def encoded_airport_codes(self) -> EncodedJson:
+        """The sorted airport codes, encoded once per version"""
+        return EncodedJson(self.airport_index.codes)
+
+    def candidates(self, origin: Optional[str] = None, destination: Optional[str] = None,
+                   airline_codes: Optional[Iterable[str]] = None,
+                   departure_date: Optional[date] = None) -> Optional[np.ndarray]:
+        """Return positions of records matching every given key filter.
+
+        Filters left as ``None`` are not applied; with no filters at all
+        ``None`` is returned to mean every record. Records whose departure
+        date could not be parsed match any ``departure_date``, as the linear
+        scan did.
+        """
+        postings = []
+        if origin:
+            postings.append(self.by_origin.get(origin.upper(), _EMPTY))
+        if destination:
+            postings.append(self.by_destination.get(destination.upper(), _EMPTY))
+        if airline_codes:
+            postings.append(_union([self.by_airline.get(c, _EMPTY) for c in set(airline_codes)]))
+        if departure_date:
+            postings.append(_union([
+                self.by_date.get(departure_date, _EMPTY),
+                self.by_date.get(None, _EMPTY),
+            ]))
+
+        if not postings:
+            return None
+        return _intersect(postings)
+
+
+class FlightCatalog:
+    """Resident flight catalog that hot-reloads when flights.json changes.
+
+    The supplier response is streamed item by item (see
+    ``iter_fare_itineraries``) and normalized once; request handlers only
+    ever read the current snapshot and never touch the disk. At most once
+    per ``check_interval`` seconds a snapshot read starts a background
+    thread that stats the flights and airline files; a changed mtime or
+    size of either triggers a rebuild
+    on that thread, and the new snapshot is swapped in atomically once
+    complete. Until then readers keep getting the current version.
+
+    When ``snapshot_filename`` exists and was compiled from the current
+    flights and airline files (see ``app.binary_catalog``), it is mapped
+    instead of parsing JSON; otherwise the JSON sources are read.
+    """
+
+    def __init__(self, data_dir: str = "data", filename: str = "flights.json",
+                 check_interval: float = 1.0, chunk_size: int = 1 << 16,
+                 on_progress: Optional[ProgressCallback] = log_progress,
+                 airlines_filename: str = "airline-list.json",
+                 snapshot_filename: str = "catalog.bin", preload: bool = True):
+        self.base_dir = Path(__file__).parent.parent
+        self.data_dir = self.base_dir / data_dir
+        self.flights_file = self.data_dir / filename
+        self.airlines_file = self.data_dir / airlines_filename
+        self.snapshot_file = self.data_dir / snapshot_filename
+        self.check_interval = check_interval
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self._reload_lock = threading.Lock()
+        self._checker_lock = threading.Lock()
+        self._checker: Optional[threading.Thread] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._last_check = 0.0
+        self.fare_calendar = FareCalendar()
+        if preload:
+            self.reload()
+
+    @property
+    def sources(self) -> Dict[str, Path]:
+        """Source files a binary snapshot is compiled from, by name"""
+        return {self.flights_file.name: self.flights_file, self.airlines_file.name: self.airlines_file}
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Return the current snapshot; a due change check runs in the background.
+
+        Until a first version has loaded, the caller loads it in the
+        foreground and a missing or malformed flights file raises to it.
+        """
+        if self._snapshot is None:
+            return self._load_first()
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self._start_check()
+        return self._snapshot
+
+    def _start_check(self):
+        with self._checker_lock:
+            if self._checker is not None and self._checker.is_alive():
+                return
+            self._checker = threading.Thread(
+                target=self._reload_if_changed, name="catalog-reload", daemon=True)
+            self._checker.start()
+
+    def wait_for_reload(self, timeout: Optional[float] = None) -> CatalogSnapshot:
+        """Wait for a running background check to finish and return the current snapshot"""
+        checker = self._checker
+        if checker is not None:
+            checker.join(timeout)
+        return self._snapshot
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """The loaded snapshot, if any, without loading or checking for changes"""
+        return self._snapshot
+
+    def try_load(self) -> Optional[CatalogSnapshot]:
+        """Load the first version, logging rather than raising if it fails.
+
+        Meant for application startup: requests then keep reporting the
+        error, and retrying the load, until the flights file is readable.
+        """
+        try:
+            return self.snapshot()
+        except (OSError, ValueError) as e:
+            catalog_reload_failures.inc()
+            logger.error("Failed to load flight catalog %s: %s", self.flights_file, e)
+            return None
+
+    def reload(self) -> CatalogSnapshot:
+        """Unconditionally rebuild the catalog from disk"""
+        with self._reload_lock:
+            return self._load_from_disk()
+
+    def _load_first(self) -> CatalogSnapshot:
+        with self._reload_lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            return self._load_from_disk()
+
+    def _load_from_disk(self) -> CatalogSnapshot:
+        stat = self.flights_file.stat()
+        return self._load(stat.st_mtime_ns, stat.st_size, self._airlines_stamp())
+
+    def _airlines_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.airlines_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _is_current(self, stat: os.stat_result, airlines_stamp: Optional[Tuple[int, int]]) -> bool:
+        current = self._snapshot
+        return current is not None and (stat.st_mtime_ns, stat.st_size, airlines_stamp) == (
+            current.mtime_ns, current.size, current.airlines_stamp)
+
+    def _reload_if_changed(self):
+        try:
+            stat = self.flights_file.stat()
+            airlines_stamp = self._airlines_stamp()
+        except OSError:
+            logger.warning("Flight catalog %s is unavailable, keeping version %s",
+                           self.flights_file, self.version)
+            return
+
+        if self._is_current(stat, airlines_stamp):
+            return
+
+        with self._reload_lock:
+            if self._is_current(stat, airlines_stamp):
+                return
+            try:
+                self._load(stat.st_mtime_ns, stat.st_size, airlines_stamp)
+            except (OSError, ValueError) as e:
+                # A supplier file caught mid-write: keep serving the old version
+                catalog_reload_failures.inc()
+                logger.warning("Failed to reload flight catalog: %s", e)
+
+    def _read_records(self) -> List[Itinerary]:
+        records = []
+        # Departure dates are shared within this version only
+        dates: Dict[date, date] = {}
+        itineraries = iter_fare_itineraries(self.flights_file, self.chunk_size, self.on_progress)
+        for idx, item in enumerate(itineraries):
+            # Each raw itinerary is dropped as soon as it is normalized
+            record = normalize_itinerary(idx, item, dates)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def _open_snapshot(self):
+        if not self.snapshot_file.exists():
+            return None
+        try:
+            return open_snapshot(self.snapshot_file, self.sources)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring catalog snapshot %s: %s", self.snapshot_file, e)
+            return None
+
+    def _load(self, mtime_ns: int, size: int,
+              airlines_stamp: Optional[Tuple[int, int]]) -> CatalogSnapshot:
+        with span("catalog.load"):
+            mapped = self._open_snapshot()
+            if mapped is not None:
+                source = "snapshot"
+                snapshot = CatalogSnapshot(mapped.records, mtime_ns, size, self.version + 1,
+                                           fares=mapped.fares, airlines=mapped.airlines,
+                                           airlines_stamp=airlines_stamp)
+            else:
+                source = "json"
+                snapshot = CatalogSnapshot(self._read_records(), mtime_ns, size, self.version + 1,
+                                           airlines=read_airlines(self.airlines_file),
+                                           airlines_stamp=airlines_stamp)
+        with span("catalog.fare_calendar"):
+            changed = self.fare_calendar.update(snapshot.fares)
+        catalog_reloads.inc(source)
+        logger.info("Fare calendar updated: %d itinerary fares added or removed", changed)
+        self._snapshot = snapshot
+        return snapshot
+
+    def build_snapshot(self) -> Path:
+        """Compile the JSON sources into the binary snapshot file"""
+        stamps = {name: source_stamp(path) for name, path in self.sources.items()}
+        return write_snapshot(self.snapshot_file, self._read_records(),
+                              read_airlines(self.airlines_file), stamps)
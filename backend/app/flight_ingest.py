@@ -0,0 +1,139 @@
+import codecs
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+ITEMS_KEY = '"FareItineraries"'
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KiB, where the platform reports it"""
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def log_progress(items: int, bytes_read: int, total_bytes: int):
+    """Default progress reporter: item count, bytes consumed and peak RSS"""
+    logger.info("Ingested %d itineraries, %d/%d bytes, peak RSS %s KiB",
+                items, bytes_read, total_bytes, peak_rss_kb())
+
+
+class _ChunkReader:
+    """Incrementally decodes a UTF-8 file into a sliding text buffer"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.bytes_read = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping already-consumed text; False at EOF"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        return not self.eof
+
+    def skip_whitespace(self) -> Optional[str]:
+        """Advance past whitespace and return the next character, or None at EOF"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char: str):
+        if self.skip_whitespace() != char:
+            raise ValueError(f"Expected {char!r} at byte ~{self.bytes_read} of the flights file")
+        self.pos += 1
+
+
+def iter_fare_itineraries(path: Path, chunk_size: int = 1 << 16,
+                          on_progress: Optional[ProgressCallback] = log_progress,
+                          progress_every: int = 10000) -> Iterator[Dict[str, Any]]:
+    """Yield the items of an AirSearchResponse's FareItineraries one at a time.
+
+    The file is read ``chunk_size`` bytes at a time and only the text of
+    the item currently being decoded is buffered, so peak memory is bounded
+    by the largest single itinerary rather than the document. The first
+    ``"FareItineraries"`` key in the file is taken to be the result array.
+    ``on_progress(items, bytes_read, total_bytes)`` is called every
+    ``progress_every`` items and once at the end.
+
+    Raises ``ValueError`` if the document is truncated or malformed.
+    """
+    total_bytes = path.stat().st_size
+    count = 0
+    with open(path, 'rb') as f:
+        reader = _ChunkReader(f, chunk_size)
+
+        # Locate the array; the prefix before it is small and kept whole
+        while True:
+            found = reader.buffer.find(ITEMS_KEY)
+            if found != -1:
+                reader.pos = found + len(ITEMS_KEY)
+                break
+            if not reader.fill():
+                # No result array: still reject a corrupt document
+                json.loads(reader.buffer)
+                return
+
+        reader.expect(":")
+        reader.expect("[")
+
+        if reader.skip_whitespace() == "]":
+            reader.pos += 1
+        else:
+            while True:
+                if reader.skip_whitespace() is None:
+                    raise ValueError("Unexpected end of flights file inside FareItineraries")
+                while True:
+                    try:
+                        item, end = _decoder.raw_decode(reader.buffer, reader.pos)
+                        break
+                    except json.JSONDecodeError:
+                        # The item straddles the buffer edge: pull in another chunk
+                        if not reader.fill():
+                            raise
+                reader.pos = end
+                count += 1
+                yield item
+                del item
+
+                if on_progress and count % progress_every == 0:
+                    on_progress(count, reader.bytes_read, total_bytes)
+
+                separator = reader.skip_whitespace()
+                if separator not in (",", "]"):
+                    raise ValueError(f"Malformed FareItineraries array near byte ~{reader.bytes_read}")
+                reader.pos += 1
+                if separator == "]":
+                    break
+
+    if on_progress:
+        on_progress(count, reader.bytes_read, total_bytes)
@@ -0,0 +1,75 @@
+import sys
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Dict, Optional
+
+def parse_departure_date(dep_time: str, dates: Optional[Dict[date, date]] = None) -> Optional[date]:
+    """Parse the calendar date of a supplier departure timestamp.
+
+    ``dates`` interns the result, so records built with the same table
+    share one date object per calendar day.
+    """
+    try:
+        parsed = datetime.fromisoformat(dep_time.replace("Z", "+00:00")).date()
+    except (AttributeError, ValueError):
+        return None
+    return parsed if dates is None else dates.setdefault(parsed, parsed)
+
+
+def to_cents(amount: Any) -> int:
+    """Convert a supplier ``Amount`` (string or number) to integer cents"""
+    try:
+        value = Decimal(str(amount))
+    except InvalidOperation:
+        raise ValueError(f"Invalid fare amount {amount!r}")
+    return int((value * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def intern_str(value: Any) -> str:
+    """Intern a supplier string so repeated codes and names share one object"""
+    return sys.intern(value) if isinstance(value, str) else sys.intern(str(value))
+
+
+class Itinerary:
+    """Compact normalized itinerary: interned strings and fares in integer cents.
+
+    ``dates`` is the table departure dates are interned into; a catalog
+    passes one per snapshot, so it is dropped along with the snapshot.
+    """
+
+    __slots__ = (
+        "index", "airline_code", "airline_name", "flight_number",
+        "departure_airport", "arrival_airport", "departure_time", "arrival_time",
+        "departure_date", "duration", "price_cents", "stops", "currency", "cabin_class",
+    )
+
+    def __init__(self, index: int, airline_code: str, airline_name: str, flight_number: str,
+                 departure_airport: str, arrival_airport: str, departure_time: str,
+                 arrival_time: str, duration: int, price_cents: int, stops: int,
+                 currency: str, cabin_class: str, dates: Optional[Dict[date, date]] = None):
+        self.index = index
+        self.airline_code = intern_str(airline_code)
+        self.airline_name = intern_str(airline_name)
+        self.flight_number = intern_str(flight_number)
+        self.departure_airport = intern_str(departure_airport)
+        self.arrival_airport = intern_str(arrival_airport)
+        self.departure_time = intern_str(departure_time)
+        self.arrival_time = intern_str(arrival_time)
+        self.departure_date = parse_departure_date(self.departure_time, dates)
+        self.duration = duration
+        self.price_cents = price_cents
+        self.stops = stops
+        self.currency = intern_str(currency)
+        self.cabin_class = intern_str(cabin_class)
+
+    @property
+    def id(self) -> str:
+        return f"flt_{self.index}"
+
+    @property
+    def price(self) -> float:
+        return self.price_cents / 100
+
+    def __repr__(self) -> str:
+        return (f"Itinerary({self.id}, {self.departure_airport}->{self.arrival_airport}, "
+                f"{self.departure_time}, {self.price_cents}c)")
@@ -1,23 +1,50 @@
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
+import hashlib
 import json
+import operator
 import os
 from pathlib import Path
 from datetime import datetime, date, timedelta
 from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID, uuid4
+from . import config
+from .airline_index import AirlineIndex
 from .booking_utils import BookingManager
+from .connections import Connection
+from .encoded_response import EncodedJsonFile
+from .fare_store import day_number, top_k, top_k_pairs
+from .flight_catalog import CatalogSnapshot, FlightCatalog
+from .itinerary import Itinerary
+from . import metrics
+from .metrics import MetricsMiddleware, span
+from .profiling import ProfilingMiddleware
+from .pagination import InvalidCursor, SortField, paginate
+from .projection import InvalidFields, Nested, Projection, attribute
+from .search_cache import SearchCache
 
-# Initialize services
-booking_manager = BookingManager()
+# Initialize services; the catalog is loaded at startup, not import
+flight_catalog = FlightCatalog(config.DATA_DIR, preload=False)
+search_cache = SearchCache(max_entries=config.SEARCH_CACHE_SIZE, ttl=config.SEARCH_CACHE_TTL)
+extra_services = EncodedJsonFile(flight_catalog.data_dir / "extra-services.json")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A bad flights file is logged here and reported by each request until fixed
+    flight_catalog.try_load()
+    yield
 
 # Initialize FastAPI app
 app = FastAPI(
     title="SkyScan Flight API",
     description="Backend API for SkyScan Flight Search and Booking Management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -29,12 +56,153 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load data files
-def load_json_data(filename: str) -> Any:
-    base_dir = Path(__file__).parent.parent
-    data_path = base_dir / "data" / filename
-    with open(data_path, 'r') as f:
-        return json.load(f)
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if config.PROFILE_SAMPLE_RATE > 0 or config.PROFILE_SLOW_MS > 0 or config.PROFILE_TOKEN:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=Path(__file__).parent.parent / config.PROFILE_DIR,
+        sample_rate=config.PROFILE_SAMPLE_RATE,
+        slow_ms=config.PROFILE_SLOW_MS,
+        token=config.PROFILE_TOKEN,
+        mode=config.PROFILE_MODE,
+        max_profiles=config.PROFILE_MAX_FILES,
+        top_n=config.PROFILE_TOP_N,
+    )
+
+# Live state is only read when /metrics is scraped
+metrics.registry.gauge_function(
+    "skyscan_catalog_itineraries", "Itineraries in the current catalog version",
+    lambda: len(flight_catalog.current() or ()))
+metrics.registry.gauge_function(
+    "skyscan_catalog_version", "Current catalog version number",
+    lambda: flight_catalog.version)
+metrics.registry.gauge_function(
+    "skyscan_catalog_loaded_timestamp_seconds", "Unix time the current catalog version was loaded",
+    lambda: flight_catalog.current().loaded_at if flight_catalog.current() else 0)
+metrics.registry.gauge_function(
+    "skyscan_search_cache_entries", "Responses held in the search cache",
+    lambda: search_cache.stats()["entries"])
+metrics.registry.gauge_function(
+    "skyscan_search_cache_requests_total", "Search cache lookups by outcome",
+    lambda: {(outcome,): search_cache.stats()[outcome] for outcome in ("hits", "misses", "coalesced")},
+    ("outcome",), kind="counter")
+metrics.registry.gauge_function(
+    "skyscan_search_cache_evictions_total", "Search cache entries evicted to stay within size",
+    lambda: search_cache.evictions, kind="counter")
+
+# Response shapes; each serves both the full response and its `fields=` subsets
+FLIGHT_SEGMENT_FIELDS = Projection("flight segment", {
+    "departureAirport": attribute("departure_airport"),
+    "arrivalAirport": attribute("arrival_airport"),
+    "departureTime": attribute("departure_time"),
+    "arrivalTime": attribute("arrival_time"),
+    "flightNumber": attribute("flight_number"),
+    "airlineCode": attribute("airline_code"),
+    "duration": attribute("duration"),
+})
+
+# Only one segment per catalog record for now
+FLIGHT_FIELDS = Projection("flight", {
+    "id": attribute("id"),
+    "airlineCode": attribute("airline_code"),
+    "flightNumber": attribute("flight_number"),
+    "departureAirport": attribute("departure_airport"),
+    "arrivalAirport": attribute("arrival_airport"),
+    "departureTime": attribute("departure_time"),
+    "arrivalTime": attribute("arrival_time"),
+    "duration": attribute("duration"),
+    "price": attribute("price"),
+    "stops": attribute("stops"),
+    "currency": attribute("currency"),
+    "segments": Nested(FLIGHT_SEGMENT_FIELDS, as_list=True),
+})
+
+def airline_name(record: Itinerary, airlines: AirlineIndex) -> str:
+    return airlines.name(record.airline_code, record.airline_name)
+
+SEARCH_SEGMENT_FIELDS = Projection("search segment", {
+    "departureAirport": attribute("departure_airport"),
+    "arrivalAirport": attribute("arrival_airport"),
+    "departureTime": attribute("departure_time"),
+    "arrivalTime": attribute("arrival_time"),
+    "flightNumber": attribute("flight_number"),
+    "airlineCode": attribute("airline_code"),
+    "airlineName": airline_name,
+    "duration": attribute("duration"),
+}, args=("airlines",))
+
+SEARCH_RESULT_FIELDS = Projection("search result", {
+    "id": attribute("id"),
+    "airlineCode": attribute("airline_code"),
+    "airlineName": airline_name,
+    "flightNumber": attribute("flight_number"),
+    "departureAirport": attribute("departure_airport"),
+    "arrivalAirport": attribute("arrival_airport"),
+    "departureTime": attribute("departure_time"),
+    "arrivalTime": attribute("arrival_time"),
+    "duration": attribute("duration"),
+    "price": attribute("price"),
+    "stops": attribute("stops"),
+    "currency": attribute("currency"),
+    "cabinClass": attribute("cabin_class"),
+    "segments": Nested(SEARCH_SEGMENT_FIELDS, as_list=True),
+}, args=("airlines",))
+
+# The full shapes: serialize_flight(record), serialize_segment(record, airlines)
+# and serialize_search_result(record, airlines)
+serialize_flight = FLIGHT_FIELDS.projector()
+serialize_segment = SEARCH_SEGMENT_FIELDS.projector()
+serialize_search_result = SEARCH_RESULT_FIELDS.projector()
+
+def serialize_connection(records: Sequence[Itinerary], connection: Connection,
+                         airlines: AirlineIndex) -> Dict[str, Any]:
+    """Shape a multi-leg journey like a search result with one segment per leg"""
+    legs = [records[row] for row in connection.rows]
+    first, last = legs[0], legs[-1]
+    segments = [serialize_segment(leg, airlines) for leg in legs]
+    return {
+        "id": "+".join(leg.id for leg in legs),
+        "airlineCode": first.airline_code,
+        "airlineName": segments[0]["airlineName"],
+        "flightNumber": first.flight_number,
+        "departureAirport": first.departure_airport,
+        "arrivalAirport": last.arrival_airport,
+        "departureTime": first.departure_time,
+        "arrivalTime": last.arrival_time,
+        "duration": connection.duration,
+        "price": connection.price,
+        "stops": connection.stops,
+        "currency": first.currency,
+        "cabinClass": first.cabin_class,
+        "segments": segments,
+    }
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. id,price,segments.flightNumber"
+
+# Largest page a client may request with `limit`
+MAX_PAGE_SIZE = 1000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Journeys returned by /flights/connections when the search sets no limit
+DEFAULT_CONNECTIONS = 10
+
+# Round trips returned by a search with a return_date but no limit
+DEFAULT_ROUND_TRIPS = 10
+
+# Widest date range one /fares/calendar request may cover, in days
+MAX_CALENDAR_DAYS = 366
+
+# Most airlines returned by one /airlines?q= autocomplete query
+MAX_AIRLINE_MATCHES = 50
+
+# Most airport codes returned by one /airports?q= autocomplete query
+MAX_AIRPORT_MATCHES = 50
+
+# Largest group a client may book with POST /bookings/batch
+MAX_BATCH_BOOKINGS = 100
 
 # Pydantic models
 class FlightSearch(BaseModel):
@@ -46,6 +214,9 @@ class FlightSearch(BaseModel):
     max_price: Optional[float] = None
     max_stops: Optional[int] = None
     airline_codes: Optional[List[str]] = None
+    sort: Optional[SortField] = None
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
 
 class PassengerInfo(BaseModel):
     first_name: str
@@ -71,78 +242,70 @@ class BookingResponse(BaseModel):
     total_price: float
     currency: str
 
+BOOKING_FIELDS = Projection.from_keys("booking", BookingResponse.model_fields, nested={
+    "passenger": Projection.from_keys("passenger", PassengerInfo.model_fields),
+})
+
+def encode_booking(booking: Dict[str, Any]) -> bytes:
+    """Encode a stored booking exactly as response_model=BookingResponse would"""
+    return JSONResponse(BookingResponse.model_validate(booking).model_dump(mode="json")).body
+
+# Changes whenever BookingResponse does, so stored encodings of an older shape are not served
+BOOKING_ENCODING = "BookingResponse:" + hashlib.sha256(
+    json.dumps(BookingResponse.model_json_schema(), sort_keys=True).encode()).hexdigest()[:16]
+
+# Created after the models so bookings can be stored pre-encoded
+booking_manager = BookingManager(
+    config.DATA_DIR,
+    backend=config.BOOKING_BACKEND,
+    fsync=config.BOOKING_FSYNC,
+    encode=encode_booking,
+    encoding=BOOKING_ENCODING,
+)
+
 # Routes
 @app.get("/")
 async def root():
     return {"message": "Welcome to SkyScan Flight API"}
 
 @app.get("/flights")
-async def get_flights():
+async def get_flights(
+    sort: Optional[SortField] = Query(None, description="Order results by price, duration or departure"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum flights per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
     """Return simplified list of flights the mobile app expects."""
     try:
-        raw = load_json_data("flights.json")
-        fare_itineraries = (
-            raw.get("AirSearchResponse", {})
-               .get("AirSearchResult", {})
-               .get("FareItineraries", [])
-        )
-        simplified: list[dict] = []
-
-        for idx, item in enumerate(fare_itineraries):
-            itin = item.get("FareItinerary", {})
-            # price & currency
-            total_fare = itin.get("AirItineraryFareInfo", {}) \
-                               .get("ItinTotalFares", {}) \
-                               .get("TotalFare", {})
-            price = float(total_fare.get("Amount", 0))
-            currency = total_fare.get("CurrencyCode", "USD")
-
-            # segments & basic details – flatten first flight segment
-            od_options = itin.get("OriginDestinationOptions", [])
-            if not od_options:
-                continue
-            flight_seg = od_options[0].get("OriginDestinationOption", [])[0] \
-                                      .get("FlightSegment", {})
-
-            dep_airport = flight_seg.get("DepartureAirportLocationCode", "")
-            arr_airport = flight_seg.get("ArrivalAirportLocationCode", "")
-            dep_time = flight_seg.get("DepartureDateTime", "")
-            arr_time = flight_seg.get("ArrivalDateTime", "")
-            flight_number = flight_seg.get("FlightNumber", "")
-            airline_code = flight_seg.get("MarketingAirlineCode", "")
-            duration = int(flight_seg.get("JourneyDuration", 0))
-            stops = od_options[0].get("TotalStops", 0)
-
-            # Build simplified segment list (only one segment for now)
-            segment = {
-                "departureAirport": dep_airport,
-                "arrivalAirport": arr_airport,
-                "departureTime": dep_time,
-                "arrivalTime": arr_time,
-                "flightNumber": flight_number,
-                "airlineCode": airline_code,
-                "duration": duration,
-            }
-
-            simplified.append({
-                "id": f"flt_{idx}",
-                "airlineCode": airline_code,
-                "flightNumber": flight_number,
-                "departureAirport": dep_airport,
-                "arrivalAirport": arr_airport,
-                "departureTime": dep_time,
-                "arrivalTime": arr_time,
-                "duration": duration,
-                "price": price,
-                "stops": stops,
-                "currency": currency,
-                "segments": [segment],
-            })
-
-        return {"flights": simplified}
+        serialize = serialize_flight
+        if fields is not None:
+            serialize = FLIGHT_FIELDS.projector(FLIGHT_FIELDS.select(fields))
+
+        snapshot = flight_catalog.snapshot()
+        if sort is None and limit is None and cursor is None:
+            return {"flights": [serialize(r) for r in snapshot.records]}
+
+        page, next_cursor = paginate(snapshot, None, sort, limit, cursor)
+        records = snapshot.records
+        return {
+            "flights": [serialize(records[pos]) for pos in page.tolist()],
+            "nextCursor": next_cursor,
+        }
+    except (InvalidCursor, InvalidFields) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def wants_ndjson(request: Request, stream: bool) -> bool:
+    """Whether the client opted into a streamed NDJSON response"""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def stream_search_results(records: Sequence[Itinerary], rows, airlines: AirlineIndex,
+                          serialize=serialize_search_result) -> Any:
+    """Yield one serialized search result per line as rows are consumed"""
+    for pos in rows:
+        yield json.dumps(serialize(records[int(pos)], airlines)) + "\n"
+
 def parse_flight_dates(flight_data: Dict[str, Any]) -> tuple[datetime, datetime]:
     """Extract departure and arrival datetimes from flight data"""
     segments = flight_data.get("FareItinerary", {}).get("AirItinerary", {}).get(
@@ -166,127 +329,272 @@ def parse_flight_dates(flight_data: Dict[str, Any]) -> tuple[datetime, datetime]
     
     return dep_time, arr_time
 
+def serialize_round_trip(outbound: Itinerary, inbound: Itinerary, airlines: AirlineIndex,
+                         serialize=serialize_search_result) -> Dict[str, Any]:
+    """Shape an outbound/inbound pair of search results"""
+    return {
+        "outbound": serialize(outbound, airlines),
+        "inbound": serialize(inbound, airlines),
+        "price": (outbound.price_cents + inbound.price_cents) / 100,
+        "duration": outbound.duration + inbound.duration,
+        "currency": outbound.currency,
+    }
+
+def find_round_trips(snapshot: CatalogSnapshot, outbound, search: FlightSearch,
+                     serialize=serialize_search_result) -> List[Dict[str, Any]]:
+    """Pair the best outbound rows with return legs on search.return_date.
+
+    Pairs rank by total price or total duration, or by outbound then
+    inbound departure. Filters apply to each leg.
+    """
+    if not search.origin or not search.destination:
+        return []
+    fares = snapshot.fares
+    inbound = snapshot.candidates(
+        origin=search.destination,
+        destination=search.origin,
+        airline_codes=search.airline_codes,
+        departure_date=search.return_date,
+    )
+    inbound = fares.filter(inbound, max_price=search.max_price, max_stops=search.max_stops)
+
+    # Every one of the k best pairs is made of the k best legs each way
+    k = search.limit or DEFAULT_ROUND_TRIPS
+    sort = search.sort or "price"
+    outbound = top_k(outbound, fares.sort_keys(sort, outbound), k)
+    inbound = top_k(inbound, fares.sort_keys(sort, inbound), k)
+    combine = (lambda a, b: (a, b)) if sort == "departure" else operator.add
+    pairs = top_k_pairs(fares.sort_keys(sort, outbound).tolist(),
+                        fares.sort_keys(sort, inbound).tolist(), k, combine)
+
+    records = snapshot.records
+    return [
+        serialize_round_trip(records[int(outbound[i])], records[int(inbound[j])],
+                             snapshot.airline_index, serialize)
+        for i, j in pairs
+    ]
+
+def search_cache_key(search: FlightSearch, fields=None) -> tuple:
+    """Normalize a search so equivalent requests share one cache entry"""
+    return (
+        (search.origin or "").upper(),
+        (search.destination or "").upper(),
+        search.departure_date,
+        search.return_date,
+        search.passengers,
+        search.max_price,
+        search.max_stops,
+        # Airline codes are matched exactly, so only order and repeats are normalized
+        tuple(sorted(set(search.airline_codes or ()))),
+        search.sort,
+        search.limit,
+        search.cursor,
+        fields,
+    )
+
+def search_rows(snapshot: CatalogSnapshot, search: FlightSearch):
+    """Return the matching rows before pagination"""
+    with span("search.filter"):
+        rows = snapshot.candidates(
+            origin=search.origin,
+            destination=search.destination,
+            airline_codes=search.airline_codes,
+            departure_date=search.departure_date,
+        )
+        return snapshot.fares.filter(rows, max_price=search.max_price, max_stops=search.max_stops)
+
+def is_paginated(search: FlightSearch) -> bool:
+    return not (search.sort is None and search.limit is None and search.cursor is None)
+
+def render_search(snapshot: CatalogSnapshot, search: FlightSearch,
+                  serialize=serialize_search_result) -> bytes:
+    """Run a search and encode its JSON response body"""
+    rows = search_rows(snapshot, search)
+
+    # Round trips ride along with the first page of outbound flights
+    round_trips = None
+    if search.return_date is not None and search.cursor is None:
+        with span("search.round_trips"):
+            round_trips = find_round_trips(snapshot, rows, search, serialize)
+
+    paginated = is_paginated(search)
+    next_cursor = None
+    if paginated:
+        with span("search.paginate"):
+            rows, next_cursor = paginate(snapshot, rows, search.sort, search.limit, search.cursor)
+
+    # Only the surviving rows are materialized into response dicts
+    with span("search.serialize"):
+        records = snapshot.records
+        airlines = snapshot.airline_index
+        filtered_flights = [serialize(records[pos], airlines) for pos in rows.tolist()]
+        response = {"flights": filtered_flights}
+        if paginated:
+            response["nextCursor"] = next_cursor
+        if round_trips is not None:
+            response["roundTrips"] = round_trips
+        return JSONResponse(response).body
+
 @app.post("/flights/search")
-async def search_flights(search: FlightSearch):
-    """Search flights with advanced filtering"""
+async def search_flights(
+    search: FlightSearch,
+    request: Request,
+    stream: bool = Query(False, description="Stream results as NDJSON, one flight per line"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """Search flights with advanced filtering.
+
+    Results are single catalog itineraries, so they can be paged with
+    cursors, streamed and cached; max_stops filters each itinerary's own
+    stops. Journeys that need a connection come from /flights/connections,
+    which takes the same body and uses max_stops as the hop bound.
+    """
     try:
-        flights_data = load_json_data("flights.json")
-        fare_itineraries = flights_data.get("AirSearchResponse", {}).get("AirSearchResult", {}).get("FareItineraries", [])
-        
-        filtered_flights = []
-        
-        for idx, item in enumerate(fare_itineraries):
-            itin = item.get("FareItinerary", {})
-            
-            # Extract price & currency
-            total_fare = itin.get("AirItineraryFareInfo", {}).get("ItinTotalFares", {}).get("TotalFare", {})
-            price = float(total_fare.get("Amount", 0))
-            currency = total_fare.get("CurrencyCode", "USD")
-            
-            # Extract flight segments
-            od_options = itin.get("OriginDestinationOptions", [])
-            if not od_options:
-                continue
-                
-            flight_seg = od_options[0].get("OriginDestinationOption", [])[0].get("FlightSegment", {})
-            
-            dep_airport = flight_seg.get("DepartureAirportLocationCode", "")
-            arr_airport = flight_seg.get("ArrivalAirportLocationCode", "")
-            dep_time = flight_seg.get("DepartureDateTime", "")
-            arr_time = flight_seg.get("ArrivalDateTime", "")
-            flight_number = flight_seg.get("FlightNumber", "")
-            airline_code = flight_seg.get("MarketingAirlineCode", "")
-            airline_name = flight_seg.get("MarketingAirlineName", "")
-            duration = int(flight_seg.get("JourneyDuration", 0))
-            stops = od_options[0].get("TotalStops", 0)
-            cabin_class = flight_seg.get("CabinClassText", "")
-            
-            # Apply filters
-            # Max price filter
-            if search.max_price is not None and price > search.max_price:
-                continue
-                
-            # Max stops filter
-            if search.max_stops is not None and stops > search.max_stops:
-                continue
-                
-            # Airline codes filter
-            if search.airline_codes and airline_code not in search.airline_codes:
-                continue
-                
-            # Origin filter
-            if search.origin and dep_airport.upper() != search.origin.upper():
-                continue
-                
-            # Destination filter
-            if search.destination and arr_airport.upper() != search.destination.upper():
-                continue
-                
-            # Departure date filter
-            if search.departure_date:
-                try:
-                    dep_date = datetime.fromisoformat(dep_time.replace("Z", "+00:00")).date()
-                    if dep_date != search.departure_date:
-                        continue
-                except:
-                    pass  # If we can't parse the date, we skip the filter
-            
-            # Build simplified segment list
-            segment = {
-                "departureAirport": dep_airport,
-                "arrivalAirport": arr_airport,
-                "departureTime": dep_time,
-                "arrivalTime": arr_time,
-                "flightNumber": flight_number,
-                "airlineCode": airline_code,
-                "airlineName": airline_name,
-                "duration": duration,
-            }
-            
-            # Add flight to results
-            filtered_flights.append({
-                "id": f"flt_{idx}",
-                "airlineCode": airline_code,
-                "airlineName": airline_name,
-                "flightNumber": flight_number,
-                "departureAirport": dep_airport,
-                "arrivalAirport": arr_airport,
-                "departureTime": dep_time,
-                "arrivalTime": arr_time,
-                "duration": duration,
-                "price": price,
-                "stops": stops,
-                "currency": currency,
-                "cabinClass": cabin_class,
-                "segments": [segment],
-            })
-            
-        return {"flights": filtered_flights}
+        selection = SEARCH_RESULT_FIELDS.select(fields)
+        serialize = serialize_search_result
+        if selection is not None:
+            serialize = SEARCH_RESULT_FIELDS.projector(selection)
+
+        snapshot = flight_catalog.snapshot()
+
+        if wants_ndjson(request, stream):
+            # Streams serialize lazily as they are sent, so they bypass the cache
+            rows = search_rows(snapshot, search)
+            next_cursor = None
+            if is_paginated(search):
+                with span("search.paginate"):
+                    rows, next_cursor = paginate(snapshot, rows, search.sort, search.limit, search.cursor)
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            return StreamingResponse(
+                stream_search_results(snapshot.records, rows, snapshot.airline_index, serialize),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers=headers,
+            )
+
+        body = await search_cache.get_or_compute(
+            search_cache_key(search, selection),
+            lambda: render_search(snapshot, search, serialize),
+            generation=snapshot.version,
+        )
+        return Response(content=body, media_type="application/json")
+    except (InvalidCursor, InvalidFields) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/flights/search/cache")
+async def get_search_cache_stats():
+    """Return search cache hit, miss and coalescing counters"""
+    return search_cache.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request, stage, catalog and booking metrics in Prometheus text format"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+def find_connections(snapshot: CatalogSnapshot, search: FlightSearch) -> Dict[str, Any]:
+    """Run a connection search and shape its response"""
+    airports = snapshot.fares.airports.ids
+    origin = airports.get(search.origin.upper())
+    destination = airports.get(search.destination.upper())
+    if origin is None or destination is None or origin == destination:
+        return {"flights": []}
+
+    airlines = None
+    if search.airline_codes:
+        airline_ids = snapshot.fares.airlines.ids
+        airlines = [airline_ids[c] for c in set(search.airline_codes) if c in airline_ids]
+
+    with span("connections.search"):
+        connections = snapshot.connections.search(
+            origin,
+            destination,
+            k=search.limit or DEFAULT_CONNECTIONS,
+            sort=search.sort or "price",
+            max_stops=search.max_stops,
+            departure_day=day_number(search.departure_date) if search.departure_date else None,
+            max_price=search.max_price,
+            airlines=airlines,
+        )
+    records = snapshot.records
+    return {"flights": [serialize_connection(records, c, snapshot.airline_index) for c in connections]}
+
+@app.post("/flights/connections")
+async def search_connections(search: FlightSearch):
+    """Search journeys from origin to destination, including connecting flights"""
+    if not search.origin or not search.destination:
+        raise HTTPException(status_code=400, detail="origin and destination are required")
+    if search.cursor is not None:
+        raise HTTPException(status_code=400, detail="Connection search does not support cursors")
+
+    try:
+        snapshot = flight_catalog.snapshot()
+        # The best-first search is CPU-bound, so it runs off the event loop
+        return await run_in_threadpool(find_connections, snapshot, search)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/fares/calendar")
+async def get_fare_calendar(
+    origin: str = Query(..., description="Origin airport code"),
+    destination: str = Query(..., description="Destination airport code"),
+    start: date = Query(..., alias="from", description="First departure date"),
+    end: date = Query(..., alias="to", description="Last departure date, inclusive"),
+):
+    """Return the lowest price, shortest duration and flight count per day for a route"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_CALENDAR_DAYS} days")
+    # Reading the snapshot lets calendar-only traffic trigger the reload check too
+    flight_catalog.snapshot()
+    days = flight_catalog.fare_calendar.days(origin, destination, start, end)
+    return {"origin": origin.upper(), "destination": destination.upper(), "days": days}
+
 @app.get("/airports")
-async def get_airports():
-    """Return unique list of all airports from flights data"""
-    flights = load_json_data("flights.json")
-    airports = set()
-    
-    for item in flights.get("AirSearchResponse", {}).get("AirSearchResult", {}).get("FareItineraries", []):
-        for segment in item.get("FareItinerary", {}).get("AirItinerary", {}).get("OriginDestinationOptions", {}).get("OriginDestinationOption", [{}])[0].get("FlightSegment", []):
-            airports.add(segment.get("DepartureAirport", {}).get("LocationCode"))
-            airports.add(segment.get("ArrivalAirport", {}).get("LocationCode"))
-    
-    return sorted([a for a in airports if a])  # Remove None and sort
+async def get_airports(
+    request: Request,
+    q: Optional[str] = Query(None, description="Prefix of an airport code to autocomplete"),
+    limit: int = Query(10, ge=1, le=MAX_AIRPORT_MATCHES, description="Maximum matches for q"),
+):
+    """Return the sorted airport codes served by the catalog, optionally by prefix"""
+    snapshot = flight_catalog.snapshot()
+    if q is None:
+        return snapshot.encoded_airport_codes.response(request)
+    return snapshot.airport_index.search(q, limit)
+
+@app.get("/airports/{code}/destinations")
+async def get_airport_destinations(code: str):
+    """Return an airport's flight counts and the destinations reachable from it"""
+    summary = flight_catalog.snapshot().airport_index.summary(code)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Airport not found")
+    return summary
 
 @app.get("/airlines")
-async def get_airlines():
-    """Return list of airlines"""
-    return load_json_data("airlines.json")
+async def get_airlines(
+    request: Request,
+    q: Optional[str] = Query(None, description="Prefix of an airline code or name to autocomplete"),
+    limit: int = Query(10, ge=1, le=MAX_AIRLINE_MATCHES, description="Maximum matches for q"),
+):
+    """Return list of airlines, or the best matches for a search prefix"""
+    snapshot = flight_catalog.snapshot()
+    if q is None:
+        return snapshot.encoded_airlines.response(request)
+    return snapshot.airline_index.search(q, limit)
+
+@app.get("/airlines/{code}")
+async def get_airline(code: str):
+    """Get one airline by its IATA code"""
+    airline = flight_catalog.snapshot().airline_index.get(code)
+    if airline is None:
+        raise HTTPException(status_code=404, detail="Airline not found")
+    return airline
 
 @app.get("/services")
-async def get_services():
+async def get_services(request: Request):
     try:
-        return load_json_data("extra-services.json")
+        return extra_services.get().response(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -294,38 +602,69 @@ async def get_services():
 async def get_trip_details(pnr: str):
     """Get trip details by PNR"""
     try:
-        booking = booking_manager.get_booking_by_pnr(pnr)
-        if not booking:
+        # Bookings are validated and encoded when stored; response_model only documents the shape
+        body = await booking_manager.get_encoded_booking_by_pnr_async(pnr)
+        if body is None:
             raise HTTPException(status_code=404, detail="Booking not found")
-        return booking
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def booking_data_from_request(booking_request: CreateBookingRequest) -> Dict[str, Any]:
+    """Flatten a validated booking request into the stored booking fields"""
+    return {
+        "flight_id": booking_request.flight_id,
+        "passenger": booking_request.passenger.dict(),
+        "passenger_email": booking_request.passenger.email,
+        "extras": booking_request.extras,
+        "total_price": booking_request.total_price,
+        "currency": booking_request.currency,
+    }
+
 @app.post("/bookings", response_model=BookingResponse)
 async def create_booking(booking_request: CreateBookingRequest):
     """Create a new booking"""
     try:
-        booking_data = {
-            "flight_id": booking_request.flight_id,
-            "passenger": booking_request.passenger.dict(),
-            "passenger_email": booking_request.passenger.email,
-            "extras": booking_request.extras,
-            "total_price": booking_request.total_price,
-            "currency": booking_request.currency,
-        }
+        booking_data = booking_data_from_request(booking_request)
         
-        booking = booking_manager.create_booking(booking_data)
+        booking = await booking_manager.create_booking_async(booking_data)
         return booking
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/bookings/batch", response_model=List[BookingResponse])
+async def create_bookings_batch(
+    booking_requests: List[CreateBookingRequest] = Body(..., min_length=1, max_length=MAX_BATCH_BOOKINGS),
+):
+    """Create several bookings in one commit; results follow request order"""
+    try:
+        bookings = await booking_manager.create_bookings_async(
+            [booking_data_from_request(r) for r in booking_requests]
+        )
+        return bookings
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/bookings", response_model=List[BookingResponse])
-async def get_user_bookings(email: str = Query(..., description="User's email address")):
+async def get_user_bookings(
+    email: str = Query(..., description="User's email address"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. pnr,status,passenger.last_name"),
+):
     """Get all bookings for a user"""
     try:
-        return booking_manager.get_user_bookings(email)
+        selection = BOOKING_FIELDS.select(fields)
+        if selection is None:
+            bodies = await booking_manager.get_encoded_user_bookings_async(email)
+            return Response(content=b"[" + b",".join(bodies) + b"]", media_type="application/json")
+
+        # Stored bookings passed BookingResponse validation when they were written
+        project = BOOKING_FIELDS.projector(selection)
+        bookings = await booking_manager.get_user_bookings_async(email)
+        return JSONResponse([project(b) for b in bookings])
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
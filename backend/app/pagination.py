@@ -0,0 +1,63 @@
+import base64
+import json
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+
+from .fare_store import top_k
+from .flight_catalog import CatalogSnapshot
+
+SortField = Literal["price", "duration", "departure"]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be applied to the current catalog"""
+
+
+def encode_cursor(version: int, sort: Optional[str], key, row: int) -> str:
+    """Build the opaque cursor pointing just past ``(key, row)``"""
+    payload = json.dumps({"v": version, "s": sort, "k": key, "r": row}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, version: int, sort: Optional[str]) -> Tuple[float, int]:
+    """Return the ``(key, row)`` position a cursor resumes after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key, row = payload["k"], int(payload["r"])
+        cursor_version, cursor_sort = payload["v"], payload["s"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    if cursor_version != version:
+        raise InvalidCursor("Flight data has changed, restart pagination")
+    return key, row
+
+
+def paginate(snapshot: CatalogSnapshot, rows: Optional[np.ndarray], sort: Optional[str] = None,
+             limit: Optional[int] = None,
+             cursor: Optional[str] = None) -> Tuple[np.ndarray, Optional[str]]:
+    """Order matching rows and cut the page that follows ``cursor``.
+
+    Returns the page's row ids and the cursor for the next page, which is
+    ``None`` once the results are exhausted.
+    """
+    fares = snapshot.fares
+    if rows is None:
+        rows = np.arange(len(fares))
+    keys = fares.sort_keys(sort, rows)
+
+    if cursor:
+        last_key, last_row = decode_cursor(cursor, snapshot.version, sort)
+        after = (keys > last_key) | ((keys == last_key) & (rows > last_row))
+        rows, keys = rows[after], keys[after]
+
+    page = top_k(rows, keys, limit)
+    if limit is None or len(rows) <= limit:
+        return page, None
+
+    last = page[-1:]
+    last_key = fares.sort_keys(sort, last)[0].item()
+    return page, encode_cursor(snapshot.version, sort, last_key, int(last[0]))
@@ -0,0 +1,299 @@
+"""Opt-in profiling of individual requests.
+
+``ProfilingMiddleware`` profiles a request when it carries the configured
+``X-Profile-Token`` header, when it is drawn at ``sample_rate``, or, with
+``slow_ms`` set, speculatively and keeps the profile only if the request
+turned out slower than the threshold. One request is profiled at a time;
+the others pass straight through unprofiled. In particular, slow requests
+that overlap a profiled one are not captured: each request that would
+have been profiled is counted in ``skyscan_profiles_dropped_total`` by
+reason instead, so the metric shows how much a ``slow_ms`` run missed.
+
+Two profilers are available:
+
+- ``sample`` (default): a background thread samples the stacks of every
+  thread every few milliseconds. It sees work the handler hands to the
+  executor (searches run there) and costs little, at the price of
+  statistical rather than exact timings. Threads parked in an idle wait
+  are skipped.
+- ``cprofile``: deterministic ``cProfile`` of the event-loop thread only.
+  Exact call counts, but executor work shows up as waiting, and other
+  requests interleaved on the loop are included.
+
+Each profile is written to a bounded ring directory as a ``.pstats`` file
+(load it with ``pstats.Stats`` or snakeviz) and a ``.txt`` summary tagged
+with the method, route, path and query string.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import itertools
+import logging
+import marshal
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+MODES = ("sample", "cprofile")
+
+SAMPLE_INTERVAL = 0.005
+
+profiles_dropped = registry.counter(
+    "skyscan_profiles_dropped_total",
+    "Requests that qualified for a profile but ran while another request was profiled",
+    ("reason",))
+
+# (file name, function) of leaf frames that mean a thread is parked, not working
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+FunctionKey = Tuple[str, int, str]
+# pstats layout: function -> (primitive calls, calls, own time, cumulative time, callers)
+Stats = Dict[FunctionKey, tuple]
+
+
+def _function_key(code) -> FunctionKey:
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class StackSampler:
+    """Periodically samples all thread stacks into pstats-compatible stats"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._own: Dict[FunctionKey, float] = {}
+        self._total: Dict[FunctionKey, float] = {}
+        self._hits: Dict[FunctionKey, int] = {}
+        self._callers: Dict[FunctionKey, Dict[FunctionKey, List[float]]] = {}
+        self.samples = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Stats:
+        self._stop.set()
+        self._thread.join()
+        return self.stats()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._record(frame, elapsed)
+
+    def _record(self, frame, elapsed: float):
+        leaf = frame.f_code
+        if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(_function_key(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+
+        self.samples += 1
+        leaf_key = stack[-1]
+        self._own[leaf_key] = self._own.get(leaf_key, 0.0) + elapsed
+        for key in set(stack):
+            self._total[key] = self._total.get(key, 0.0) + elapsed
+            self._hits[key] = self._hits.get(key, 0) + 1
+        for caller, callee in set(zip(stack, stack[1:])):
+            edge = self._callers.setdefault(callee, {}).setdefault(caller, [0, 0.0, 0.0])
+            edge[0] += 1
+            edge[1] += elapsed if callee == leaf_key else 0.0
+            edge[2] += elapsed
+
+    def stats(self) -> Stats:
+        """Sample counts stand in for call counts; times are sampled wall time"""
+        return {
+            key: (hits, hits, self._own.get(key, 0.0), self._total[key], {
+                caller: (n, n, own, total)
+                for caller, (n, own, total) in self._callers.get(key, {}).items()
+            })
+            for key, hits in self._hits.items()
+        }
+
+
+class CProfileSession:
+    """Deterministic profile of the calling thread"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self) -> Stats:
+        self.profile.disable()
+        self.profile.create_stats()
+        return self.profile.stats
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", value).strip("_") or "root"
+
+
+class ProfileStore:
+    """Ring directory keeping the newest ``max_profiles`` profiles"""
+
+    def __init__(self, directory: Path, max_profiles: int = 50, top_n: int = 30):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def write(self, stats: Stats, tags: Dict[str, str], name: Optional[str] = None) -> str:
+        """Write ``stats`` with a summary and drop the oldest profiles; return the name"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            name = name or self.new_name(tags.get("route", ""))
+            stats_path = self.directory / f"{name}.pstats"
+            with open(stats_path, "wb") as f:
+                marshal.dump(stats, f)
+
+            buffer = io.StringIO()
+            for key, value in tags.items():
+                buffer.write(f"{key}: {value}\n")
+            buffer.write("\n")
+            if stats:
+                summary = pstats.Stats(str(stats_path), stream=buffer)
+                summary.sort_stats("cumulative").print_stats(self.top_n)
+                summary.sort_stats("tottime").print_stats(self.top_n)
+            (self.directory / f"{name}.txt").write_text(buffer.getvalue())
+
+            self._prune()
+            return name
+
+    def new_name(self, route: str) -> str:
+        # Names sort by time, so the oldest profiles are the first ones listed
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return f"{stamp}-{os.getpid()}-{next(self._sequence):06d}-{_slug(route)}"
+
+    def _prune(self):
+        profiles = sorted(self.directory.glob("*.pstats"))
+        for path in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".txt").unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware writing profiles of forced, sampled or slow requests"""
+
+    def __init__(self, app: ASGIApp, directory: Path, sample_rate: float = 0.0,
+                 slow_ms: float = 0.0, token: str = "", mode: str = "sample",
+                 max_profiles: int = 50, top_n: int = 30):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {MODES}")
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_ms / 1000
+        self.token = token.encode()
+        self.mode = mode
+        self.store = ProfileStore(directory, max_profiles, top_n)
+        self._busy = False
+
+    def _forced(self, scope: Scope) -> bool:
+        if not self.token:
+            return False
+        for name, value in scope["headers"]:
+            if name == TOKEN_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._forced(scope)
+        sampled = not forced and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (forced or sampled or self.slow_seconds > 0):
+            await self.app(scope, receive, send)
+            return
+        if self._busy:
+            await self._run_unprofiled(scope, receive, send, forced, sampled)
+            return
+
+        # Requests profiled on purpose learn where their profile went
+        name = self.store.new_name(scope["path"]) if forced or sampled else None
+
+        async def tagging_send(message: Message):
+            if name and message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (PROFILE_ID_HEADER, name.encode())]}
+            await send(message)
+
+        self._busy = True
+        session = StackSampler() if self.mode == "sample" else CProfileSession()
+        started = time.perf_counter()
+        session.start()
+        try:
+            await self.app(scope, receive, tagging_send)
+        finally:
+            stats = session.stop()
+            elapsed = time.perf_counter() - started
+            self._busy = False
+
+        reason = "forced" if forced else "sampled" if sampled else None
+        if reason is None and elapsed >= self.slow_seconds:
+            reason = "slow"
+        if reason is None:
+            return
+
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        tags = {
+            "reason": reason,
+            "mode": self.mode,
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "duration_ms": f"{elapsed * 1000:.3f}",
+            "time": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.write, stats, tags, name)
+        except OSError as e:
+            logger.warning("Failed to write request profile: %s", e)
+
+    async def _run_unprofiled(self, scope: Scope, receive: Receive, send: Send,
+                              forced: bool, sampled: bool):
+        """Serve a request that arrived mid-profile, counting the profile it misses"""
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            reason = "forced" if forced else "sampled" if sampled else None
+            if reason is None and self.slow_seconds > 0 and elapsed >= self.slow_seconds:
+                reason = "slow"
+            if reason is not None:
+                profiles_dropped.inc(reason)
@@ -0,0 +1,181 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+# Selected fields in schema order; a nested field carries its own selection (None for all)
+Selection = Tuple[Tuple[str, Optional["Selection"]], ...]
+
+
+class InvalidFields(ValueError):
+    """Raised when a ``fields=`` parameter names fields a response does not have"""
+
+
+class Attribute:
+    """A field read from a record attribute, e.g. ``attribute("departure_time")``"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        if not all(part.isidentifier() for part in name.split(".")):
+            raise ValueError(f"Invalid attribute name {name!r}")
+        self.name = name
+
+    def expression(self, record: str) -> str:
+        return f"{record}.{self.name}"
+
+
+class Key:
+    """A field read from a mapping key, e.g. ``key("pnr")``"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def expression(self, record: str) -> str:
+        return f"{record}[{self.name!r}]"
+
+
+# Lowercase spellings read better in field tables
+attribute = Attribute
+key = Key
+
+
+class Nested:
+    """A field built by a child projection taking the same context arguments.
+
+    The child is applied to ``source`` (an ``Attribute`` or ``Key`` of the
+    record) or, by default, to the record itself; ``as_list`` wraps the
+    child's object in a one-element list, as for single-segment records.
+    """
+
+    __slots__ = ("projection", "source", "as_list")
+
+    def __init__(self, projection: "Projection", source: Union[Attribute, Key, None] = None,
+                 as_list: bool = False):
+        self.projection = projection
+        self.source = source
+        self.as_list = as_list
+
+
+# A field is read by an Attribute or Key, built by a Nested projection, or
+# computed by a function called with the record and the context arguments
+FieldSpec = Union[Attribute, Key, Nested, Callable[..., Any]]
+
+
+class Projection:
+    """The fields of one response shape, compiled per requested field set.
+
+    ``fields`` maps each output key, in response order, to a ``FieldSpec``;
+    ``args`` names the context arguments every builder takes after the
+    record (such as the airline index). ``Nested`` fields make
+    ``segments.flightNumber`` narrow the child as well.
+
+    Each distinct field set is compiled once into a function returning a
+    dict literal, e.g. ``return {"id": r.id, "price": r.price}``, and kept
+    in a small LRU. The source is generated only from the declared specs:
+    attribute names are checked identifiers, keys are ``repr`` literals and
+    functions and child builders are bound by reference, so a ``fields=``
+    value only ever selects among declared fields.
+    """
+
+    def __init__(self, name: str, fields: Dict[str, FieldSpec], args: Sequence[str] = (),
+                 max_cached: int = 64):
+        for arg in args:
+            if not arg.isidentifier() or arg == "r" or arg.startswith("_"):
+                raise ValueError(f"Invalid context argument {arg!r}")
+        for field in fields.values():
+            if isinstance(field, Nested) and tuple(field.projection.args) != tuple(args):
+                raise ValueError(f"Nested {field.projection.name} must take the arguments {tuple(args)}")
+        self.name = name
+        self.fields = dict(fields)
+        self.args = tuple(args)
+        self.max_cached = max_cached
+        self._builders: "OrderedDict[Optional[Selection], Callable[..., dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_keys(cls, name: str, keys: Iterable[str],
+                  nested: Optional[Dict[str, "Projection"]] = None) -> "Projection":
+        """A projection of mappings, such as stored bookings, with these keys"""
+        nested = nested or {}
+        return cls(name, {
+            field: Nested(nested[field], source=Key(field)) if field in nested else Key(field)
+            for field in keys
+        })
+
+    def select(self, fields: Optional[str]) -> Optional[Selection]:
+        """Parse a comma-separated ``fields=`` value; ``None`` selects everything"""
+        if fields is None:
+            return None
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if not names:
+            raise InvalidFields("fields must name at least one field")
+        return self._select(names)
+
+    def _select(self, names: Sequence[str]) -> Selection:
+        chosen: Dict[str, Optional[list]] = {}
+        for name in names:
+            head, dot, rest = name.partition(".")
+            if head not in self.fields:
+                raise InvalidFields(f"Unknown {self.name} field {head!r}; "
+                                    f"expected one of {', '.join(self.fields)}")
+            if not dot:
+                chosen[head] = None
+            elif not isinstance(self.fields[head], Nested):
+                raise InvalidFields(f"{self.name.capitalize()} field {head!r} has no nested fields")
+            elif head not in chosen or chosen[head] is not None:
+                # Naming the whole field wins over naming some of its fields
+                chosen.setdefault(head, []).append(rest)
+
+        return tuple(
+            (name, None if chosen[name] is None else self.fields[name].projection._select(chosen[name]))
+            for name in self.fields if name in chosen
+        )
+
+    def projector(self, selection: Optional[Selection] = None) -> Callable[..., dict]:
+        """The compiled builder for ``selection``, called with a record and the context arguments"""
+        with self._lock:
+            builder = self._builders.get(selection)
+            if builder is not None:
+                self._builders.move_to_end(selection)
+                return builder
+
+        builder = self._compile(selection)
+        with self._lock:
+            self._builders[selection] = builder
+            if len(self._builders) > self.max_cached:
+                self._builders.popitem(last=False)
+        return builder
+
+    def _compile(self, selection: Optional[Selection]) -> Callable[..., dict]:
+        if selection is None:
+            selection = tuple((name, None) for name in self.fields)
+        params = ", ".join(("r",) + self.args)
+        namespace: Dict[str, Any] = {}
+
+        def bind(value: Any) -> str:
+            ref = f"_f{len(namespace)}"
+            namespace[ref] = value
+            return ref
+
+        items = []
+        for name, child_selection in selection:
+            field = self.fields[name]
+            if isinstance(field, (Attribute, Key)):
+                value = field.expression("r")
+            elif isinstance(field, Nested):
+                source = "r" if field.source is None else field.source.expression("r")
+                child = bind(field.projection.projector(child_selection))
+                value = f"{child}({', '.join((source,) + self.args)})"
+                if field.as_list:
+                    value = f"[{value}]"
+            else:
+                value = f"{bind(field)}({params})"
+            items.append(f"{name!r}: {value}")
+
+        source = f"def project({params}):\n    return {{{', '.join(items)}}}\n"
+        exec(compile(source, f"<{self.name} projection>", "exec"), namespace)
+        project = namespace["project"]
+        project.source = source
+        return project
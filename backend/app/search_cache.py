@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SearchCache:
+    """Bounded LRU cache with a TTL and single-flight computation.
+
+    Entries belong to a ``generation`` (the catalog version): the first
+    lookup with a newer generation drops everything cached for older ones,
+    and a request still holding an older catalog bypasses the cache.
+    Concurrent misses for the same key share one computation; the first
+    caller computes on the default executor and the rest await its result.
+    Failures are never cached. ``max_entries=0`` disables caching but keeps
+    coalescing.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Hashable, generation: int) -> Tuple[Optional[Future], bool, Any]:
+        """Return ``(future, owner, value)`` for a key; a hit has no future"""
+        with self._lock:
+            if generation > self._generation:
+                self._generation = generation
+                self._entries.clear()
+            elif generation < self._generation:
+                self.misses += 1
+                return Future(), True, None
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return None, False, value
+                del self._entries[key]
+
+            future = self._inflight.get((generation, key))
+            if future is not None:
+                self.coalesced += 1
+                return future, False, None
+            future = self._inflight[(generation, key)] = Future()
+            self.misses += 1
+            return future, True, None
+
+    def _store(self, key: Hashable, generation: int, value: Any):
+        with self._lock:
+            if generation != self._generation or self.max_entries <= 0:
+                return
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                             generation: int = 0) -> Any:
+        """Return the cached value for ``key``, computing it at most once at a time.
+
+        The computation settles the shared future on its own, and every
+        caller awaits it shielded, so a cancelled request neither cancels
+        the computation nor fails the requests coalesced onto it.
+        """
+        future, owner, value = self._lookup(key, generation)
+        if future is None:
+            return value
+        if owner:
+            computation = asyncio.get_running_loop().run_in_executor(None, compute)
+            computation.add_done_callback(partial(self._settle, key, generation, future))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _settle(self, key: Hashable, generation: int, future: Future, computation: asyncio.Future):
+        """Publish a finished computation to every caller waiting on it"""
+        try:
+            value = computation.result()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop((generation, key), None)
+            future.set_exception(e)
+            return
+        self._store(key, generation, value)
+        with self._lock:
+            self._inflight.pop((generation, key), None)
+        future.set_result(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and occupancy for sizing the cache"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+            }
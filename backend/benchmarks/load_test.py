@@ -0,0 +1,229 @@
+"""In-process load and latency benchmark for the API.
+
+Drives the ASGI app through ``httpx`` without a network hop, so results
+measure the application itself. Each scenario sends ``--requests``
+requests from ``--concurrency`` concurrent clients and reports
+throughput plus p50/p95/p99 latency. Results are written as JSON and can
+be compared against an earlier run:
+
+    python -m benchmarks.synthetic_data --records 100k --out-dir /tmp/skyscan-100k
+    python -m benchmarks.load_test --data-dir /tmp/skyscan-100k --output results.json
+    python -m benchmarks.load_test --data-dir /tmp/skyscan-100k --baseline results.json
+
+``POST /bookings`` writes bookings into the data directory under test.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from .synthetic_data import email_for, pnr_for
+
+# A scenario turns a random generator into the keyword arguments of one request
+RequestFactory = Callable[[random.Random], Dict[str, Any]]
+
+PAGE_SIZE = 50
+PERCENTILES = (50, 95, 99)
+
+
+def build_scenarios(manifest: Dict[str, Any]) -> Dict[str, RequestFactory]:
+    """Request factories per endpoint, drawing from the generated data"""
+    airports = manifest["airports"]
+    start = date.fromisoformat(manifest["start_date"])
+    days = manifest["days"]
+    records = max(manifest["records"], 1)
+    bookings = manifest["bookings"]
+    users = manifest["users"]
+
+    def list_flights(rng):
+        # The full list is unbounded, so clients page through it
+        sort = rng.choice(("price", "duration", "departure"))
+        return {"method": "GET", "url": "/flights", "params": {"sort": sort, "limit": PAGE_SIZE}}
+
+    def search_flights(rng):
+        origin, destination = rng.sample(airports, 2)
+        body = {"origin": origin, "destination": destination, "sort": "price", "limit": PAGE_SIZE}
+        if rng.random() < 0.7:
+            body["departure_date"] = (start + timedelta(days=rng.randrange(days))).isoformat()
+        if rng.random() < 0.3:
+            body["max_stops"] = rng.choice((0, 1))
+        return {"method": "POST", "url": "/flights/search", "json": body}
+
+    def user_bookings(rng):
+        return {"method": "GET", "url": "/bookings", "params": {"email": email_for(rng.randrange(users))}}
+
+    def trip_details(rng):
+        return {"method": "GET", "url": f"/trip/{pnr_for(rng.randrange(bookings), bookings)}"}
+
+    def create_booking(rng):
+        user = rng.randrange(users)
+        return {"method": "POST", "url": "/bookings", "json": {
+            "flight_id": f"flt_{rng.randrange(records)}",
+            "passenger": {
+                "first_name": "Load",
+                "last_name": "Test",
+                "email": email_for(user),
+                "passport": f"P{rng.randrange(10 ** 8):08d}",
+            },
+            "extras": {"baggage": 1},
+            "total_price": 199.0,
+            "currency": "USD",
+        }}
+
+    scenarios = {
+        "GET /flights": list_flights,
+        "POST /flights/search": search_flights,
+        "GET /bookings": user_bookings,
+        "GET /trip/{pnr}": trip_details,
+        "POST /bookings": create_booking,
+    }
+    if not bookings:
+        del scenarios["GET /trip/{pnr}"]
+    return scenarios
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles of one scenario, in milliseconds"""
+    millis = np.asarray(latencies) * 1000
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(float(millis.mean()), 3) if len(millis) else None,
+        "max_ms": round(float(millis.max()), 3) if len(millis) else None,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(float(np.percentile(millis, p)), 3) if len(millis) else None
+    return summary
+
+
+async def run_scenario(client: httpx.AsyncClient, factory: RequestFactory, requests: int,
+                       concurrency: int, rng: random.Random) -> Dict[str, Any]:
+    # Requests are drawn up front so the timed loop only sends them
+    pending = [factory(rng) for _ in range(requests)]
+    pending.reverse()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while pending:
+            request = pending.pop()
+            started = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_benchmark(app, scenarios: Dict[str, RequestFactory], requests: int = 200,
+                        concurrency: int = 10, warmup: int = 20, seed: int = 0) -> Dict[str, Any]:
+    """Run every scenario against ``app`` and return per-endpoint results"""
+    rng = random.Random(seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, factory in scenarios.items():
+            if warmup:
+                await run_scenario(client, factory, warmup, concurrency, rng)
+            results[name] = await run_scenario(client, factory, requests, concurrency, rng)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per endpoint with the change against a baseline run"""
+    lines = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            lines.append(f"{name:24} (not in baseline)")
+            continue
+        changes = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            before, after = previous.get(key), current.get(key)
+            if before and after is not None:
+                changes.append(f"{key} {before:g} -> {after:g} ({(after - before) / before:+.1%})")
+        lines.append(f"{name:24} " + ", ".join(changes))
+    return lines
+
+
+def load_app(data_dir: str):
+    """Import the app configured to serve ``data_dir``"""
+    os.environ["DATA_DIR"] = str(Path(data_dir).resolve())
+    return importlib.import_module("app.main").app
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints in process")
+    parser.add_argument("--data-dir", required=True, help="data directory written by benchmarks.synthetic_data")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per endpoint first")
+    parser.add_argument("--endpoint", action="append", help="only run this endpoint, e.g. 'GET /flights'")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the request mix")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results from an earlier run")
+    args = parser.parse_args(argv)
+
+    with open(Path(args.data_dir) / "manifest.json", "r") as f:
+        manifest = json.load(f)
+    scenarios = build_scenarios(manifest)
+    if args.endpoint:
+        unknown = set(args.endpoint) - set(scenarios)
+        if unknown:
+            parser.error(f"unknown endpoints {sorted(unknown)}; choose from {sorted(scenarios)}")
+        scenarios = {name: scenarios[name] for name in args.endpoint}
+
+    loading = time.perf_counter()
+    app = load_app(args.data_dir)
+    startup = time.perf_counter() - loading
+    endpoints = asyncio.run(run_benchmark(app, scenarios, args.requests, args.concurrency,
+                                          args.warmup, args.seed))
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "data_dir": str(args.data_dir),
+            "records": manifest["records"],
+            "bookings": manifest["bookings"],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "startup_seconds": round(startup, 3),
+        },
+        "endpoints": endpoints,
+    }
+
+    for name, summary in endpoints.items():
+        print(f"{name:24} {summary['throughput_rps']:>10} req/s  p50 {summary['p50_ms']} ms  "
+              f"p95 {summary['p95_ms']} ms  p99 {summary['p99_ms']} ms  errors {summary['errors']}")
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
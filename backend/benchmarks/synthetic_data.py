@@ -0,0 +1,300 @@
+"""Synthetic data sets for load testing.
+
+Writes a self-contained data directory in the shape the API reads:
+``flights.json`` as a supplier ``AirSearchResponse``, ``bookings.json``,
+plus the airline and extra-services files copied from ``data/``. A
+``manifest.json`` records what was generated so the benchmark harness can
+build realistic requests (airports, dates, PNRs and e-mail addresses)
+without reading the large files back.
+
+    python -m benchmarks.synthetic_data --records 100k --out-dir /tmp/skyscan-100k
+"""
+import argparse
+import json
+import random
+import shutil
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+SIZES = {"k": 1_000, "m": 1_000_000}
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+REFERENCE_FILES = ("airline-list.json", "extra-services.json", "trip-details.json")
+
+AIRPORTS = (
+    "AMS", "ATL", "BCN", "BER", "BKK", "BOS", "BRU", "CDG", "CPH", "DEN",
+    "DFW", "DOH", "DUB", "DXB", "EWR", "FCO", "FRA", "GVA", "HEL", "HKG",
+    "HND", "IAD", "IST", "JFK", "LAX", "LGW", "LHR", "LIS", "MAD", "MAN",
+    "MEX", "MIA", "MUC", "MXP", "NRT", "ORD", "OSL", "PRG", "RTM", "SEA",
+    "SFO", "SIN", "STN", "SYD", "VIE", "WAW", "YUL", "YYZ", "ZRH",
+)
+FALLBACK_AIRLINES = (("KL", "KLM"), ("HV", "Transavia Airlines"), ("BA", "British Airways"),
+                     ("LH", "Lufthansa"), ("AF", "Air France"), ("DL", "Delta Air Lines"))
+CABINS = (("Y", "BASIC"), ("Y", "ECONOMY"), ("W", "PREMIUM ECONOMY"), ("C", "BUSINESS"))
+CABIN_WEIGHTS = (40, 45, 10, 5)
+STOP_WEIGHTS = (60, 30, 10)
+FIRST_NAMES = ("John", "Jane", "Ahmed", "Mei", "Olga", "Carlos", "Priya", "Lars", "Amara", "Yuki")
+LAST_NAMES = ("Doe", "Smith", "Haddad", "Chen", "Ivanova", "Garcia", "Patel", "Berg", "Okafor", "Sato")
+EXTRAS = ("baggage", "meal", "seat", "insurance")
+
+# Days of departures covered, starting at --start-date
+DEFAULT_DAYS = 90
+# Bookings per user: each e-mail address owns about this many bookings
+BOOKINGS_PER_USER = 5
+
+
+def parse_count(value: str) -> int:
+    """Parse record counts such as ``1000``, ``100k`` or ``1m``"""
+    value = value.strip().lower().replace("_", "")
+    if value and value[-1] in SIZES:
+        return int(float(value[:-1]) * SIZES[value[-1]])
+    return int(value)
+
+
+def pnr_width(bookings: int) -> int:
+    return max(6, len(str(max(bookings - 1, 0))))
+
+
+def pnr_for(index: int, bookings: int) -> str:
+    """Distinct, scrambled PNR of the ``index``-th booking"""
+    width = pnr_width(bookings)
+    # 7919 is prime and coprime with every power of ten, so this is a bijection
+    return f"{(index * 7919 + 104729) % 10 ** width:0{width}d}"
+
+
+def email_for(user: int) -> str:
+    return f"user{user}@example.com"
+
+
+def user_count(bookings: int) -> int:
+    return max(1, bookings // BOOKINGS_PER_USER)
+
+
+def load_airlines() -> List[Dict[str, Any]]:
+    """Airlines with two-letter codes from the real airline list"""
+    path = DATA_DIR / "airline-list.json"
+    airlines = []
+    if path.exists():
+        with open(path, "r") as f:
+            for airline in json.load(f):
+                code = str(airline.get("AirLineCode", ""))
+                if len(code) == 2 and airline.get("AirLineName"):
+                    airlines.append({"AirLineCode": code, "AirLineName": airline["AirLineName"]})
+    if not airlines:
+        airlines = [{"AirLineCode": code, "AirLineName": name} for code, name in FALLBACK_AIRLINES]
+    return airlines
+
+
+def money(amount: float, currency: str = "USD") -> Dict[str, str]:
+    return {"Amount": f"{amount:.2f}", "CurrencyCode": currency, "DecimalPlaces": "2"}
+
+
+def make_fare_itinerary(rng: random.Random, airline: Dict[str, Any], origin: str,
+                        destination: str, departure: datetime) -> Dict[str, Any]:
+    """One supplier FareItinerary with the fields the real feed carries"""
+    stops = rng.choices((0, 1, 2), STOP_WEIGHTS)[0]
+    duration = int(rng.lognormvariate(5.0, 0.6)) + 45 + stops * rng.randint(60, 240)
+    arrival = departure + timedelta(minutes=duration)
+    cabin_code, cabin_text = rng.choices(CABINS, CABIN_WEIGHTS)[0]
+    passengers = rng.choice((1, 1, 1, 2, 2, 3, 4))
+
+    base = round(rng.lognormvariate(5.3, 0.5) * (1 + 2 * (cabin_code == "C")), 2)
+    tax = round(base * rng.uniform(0.1, 0.6), 2)
+    per_passenger = round(base + tax, 2)
+    code = airline["AirLineCode"]
+    name = airline["AirLineName"]
+    flight_number = str(rng.randint(10, 9999))
+
+    return {
+        "FareItinerary": {
+            "DirectionInd": "OneWay",
+            "AirItineraryFareInfo": {
+                "DivideInPartyIndicator": "false",
+                "FareSourceCode": uuid.UUID(int=rng.getrandbits(128), version=4).hex,
+                "FareInfos": [],
+                "FareType": rng.choice(("WebFare", "PublicFare", "PrivateFare")),
+                "ResultIndex": "",
+                "IsRefundable": rng.choice(("Yes", "No")),
+                "ItinTotalFares": {
+                    "BaseFare": money(base * passengers),
+                    "EquivFare": money(base * passengers),
+                    "ServiceTax": money(0),
+                    "TotalTax": money(tax * passengers),
+                    "TotalFare": money(per_passenger * passengers),
+                },
+                "FareBreakdown": [{
+                    "FareBasisCode": "",
+                    "Baggage": [rng.choice(("SB", "1PC", "2PC", "20K"))],
+                    "CabinBaggage": ["SB"],
+                    "PassengerFare": {
+                        "BaseFare": money(base),
+                        "EquivFare": money(base),
+                        "ServiceTax": money(0),
+                        "Surcharges": money(0),
+                        "Taxes": [{"TaxCode": "TAX", **money(tax)}],
+                        "TotalFare": money(per_passenger),
+                    },
+                    "PassengerTypeQuantity": {"Code": "ADT", "Quantity": passengers},
+                    "PenaltyDetails": {
+                        "Currency": "USD",
+                        "RefundAllowed": False,
+                        "RefundPenaltyAmount": "0.00",
+                        "ChangeAllowed": False,
+                        "ChangePenaltyAmount": "0.00",
+                    },
+                }],
+                "SplitItinerary": False,
+            },
+            "OriginDestinationOptions": [{
+                "OriginDestinationOption": [{
+                    "FlightSegment": {
+                        "ArrivalAirportLocationCode": destination,
+                        "ArrivalDateTime": arrival.isoformat(),
+                        "CabinClassCode": cabin_code,
+                        "CabinClassText": cabin_text,
+                        "DepartureAirportLocationCode": origin,
+                        "DepartureDateTime": departure.isoformat(),
+                        "Eticket": True,
+                        "JourneyDuration": str(duration),
+                        "FlightNumber": flight_number,
+                        "MarketingAirlineCode": code,
+                        "MarketingAirlineName": name,
+                        "MarriageGroup": "",
+                        "MealCode": "",
+                        "OperatingAirline": {"Code": code, "Name": name, "Equipment": "", "FlightNumber": ""},
+                    },
+                    "ResBookDesigCode": "",
+                    "ResBookDesigText": "",
+                    "SeatsRemaining": {"BelowMinimum": False, "Number": rng.randint(1, 9)},
+                    "StopQuantity": stops,
+                    "StopQuantityInfo": {
+                        "ArrivalDateTime": "", "DepartureDateTime": "", "Duration": "", "LocationCode": "",
+                    },
+                }],
+                "TotalStops": stops,
+            }],
+            "IsPassportMandatory": None,
+            "SequenceNumber": "",
+            "TicketType": "eTicket",
+            "ValidatingAirlineCode": code,
+        }
+    }
+
+
+def iter_fare_itineraries(rng: random.Random, records: int, airlines: List[Dict[str, Any]],
+                          start: date, days: int) -> Iterator[Dict[str, Any]]:
+    # A few hub airports carry most of the traffic, as in real schedules
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(AIRPORTS))]
+    airports = list(AIRPORTS)
+    rng.shuffle(airports)
+    carriers = airlines[:60]
+    for _ in range(records):
+        origin, destination = rng.choices(airports, weights, k=2)
+        while destination == origin:
+            destination = rng.choices(airports, weights)[0]
+        departure = datetime.combine(start + timedelta(days=rng.randrange(days)), datetime.min.time())
+        departure += timedelta(minutes=5 * rng.randrange(60, 282))
+        yield make_fare_itinerary(rng, rng.choice(carriers), origin, destination, departure)
+
+
+def iter_bookings(rng: random.Random, bookings: int, records: int,
+                  created: datetime) -> Iterator[Dict[str, Any]]:
+    users = user_count(bookings)
+    for index in range(bookings):
+        user = rng.randrange(users)
+        email = email_for(user)
+        extras = {name: rng.randint(1, 2) for name in rng.sample(EXTRAS, rng.randint(0, 2))}
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "pnr": pnr_for(index, bookings),
+            "status": "confirmed",
+            "created_at": (created - timedelta(seconds=rng.randrange(180 * 86400))).isoformat(),
+            "flight_id": f"flt_{rng.randrange(max(records, 1))}",
+            "passenger": {
+                "first_name": FIRST_NAMES[user % len(FIRST_NAMES)],
+                "last_name": LAST_NAMES[user // len(FIRST_NAMES) % len(LAST_NAMES)],
+                "email": email,
+                "passport": f"P{rng.randrange(10 ** 8):08d}",
+            },
+            "passenger_email": email,
+            "extras": extras,
+            "total_price": round(rng.lognormvariate(5.8, 0.5), 2),
+            "currency": "USD",
+        }
+
+
+def write_json_array(path: Path, prefix: str, items: Iterator[Dict[str, Any]], suffix: str):
+    """Stream ``items`` into a JSON array without holding them in memory"""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(prefix)
+        for i, item in enumerate(items):
+            if i:
+                f.write(",")
+            f.write(json.dumps(item, separators=(",", ":")))
+        f.write(suffix)
+    tmp_path.replace(path)
+
+
+def generate(out_dir: Path, records: int, bookings: int, seed: int = 0,
+             start: date = date(2026, 1, 1), days: int = DEFAULT_DAYS) -> Dict[str, Any]:
+    """Write a data directory with ``records`` itineraries and ``bookings`` bookings"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    airlines = load_airlines()
+
+    write_json_array(
+        out_dir / "flights.json",
+        '{"AirSearchResponse":{"session_id":"synthetic","AirSearchResult":{"FareItineraries":[',
+        iter_fare_itineraries(rng, records, airlines, start, days),
+        "]}}}",
+    )
+    write_json_array(
+        out_dir / "bookings.json",
+        '{"bookings":[',
+        iter_bookings(rng, bookings, records, datetime.combine(start, datetime.min.time())),
+        "]}",
+    )
+    for name in REFERENCE_FILES:
+        source = DATA_DIR / name
+        if source.exists():
+            shutil.copyfile(source, out_dir / name)
+
+    manifest = {
+        "records": records,
+        "bookings": bookings,
+        "users": user_count(bookings),
+        "seed": seed,
+        "start_date": start.isoformat(),
+        "days": days,
+        "airports": sorted(AIRPORTS),
+        "airlines": [airline["AirLineCode"] for airline in airlines[:60]],
+    }
+    with open(out_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Write a synthetic data directory for load testing")
+    parser.add_argument("--records", default="1k", help="itineraries to generate, e.g. 1k, 100k or 1m")
+    parser.add_argument("--bookings", default=None, help="bookings to generate (default: same as --records)")
+    parser.add_argument("--out-dir", required=True, help="directory to write the data files into")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, for reproducible data sets")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2026, 1, 1),
+                        help="first departure date")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days of departures to cover")
+    args = parser.parse_args(argv)
+
+    records = parse_count(args.records)
+    bookings = parse_count(args.bookings) if args.bookings is not None else records
+    manifest = generate(Path(args.out_dir), records, bookings, seed=args.seed,
+                        start=args.start_date, days=args.days)
+    print(f"Wrote {manifest['records']} itineraries and {manifest['bookings']} bookings to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
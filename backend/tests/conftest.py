@@ -53,4 +53,9 @@ def sample_booking_data():
         "extras": {"baggage": 2, "meal": 1},
         "total_price": 750.0,
         "currency": "USD"
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture(params=["json", "sqlite"])
+def booking_backend(request):
+    """Booking storage backend under test"""
+    return request.param
@@ -0,0 +1,56 @@
+"""Builders of catalog records and supplier data files shared by tests"""
+import json
+from pathlib import Path
+
+from app.itinerary import Itinerary
+
+
+def make_itinerary(origin="RTM", destination="STN", dep="2025-12-21T12:55:00",
+                   airline="HV", amount="557.86", stops=0, cabin="BASIC"):
+    """Build a minimal supplier FareItinerary entry"""
+    return {
+        "FareItinerary": {
+            "AirItineraryFareInfo": {
+                "ItinTotalFares": {
+                    "TotalFare": {"Amount": amount, "CurrencyCode": "USD"}
+                }
+            },
+            "OriginDestinationOptions": [
+                {
+                    "OriginDestinationOption": [
+                        {
+                            "FlightSegment": {
+                                "DepartureAirportLocationCode": origin,
+                                "ArrivalAirportLocationCode": destination,
+                                "DepartureDateTime": dep,
+                                "ArrivalDateTime": dep,
+                                "FlightNumber": "6993",
+                                "MarketingAirlineCode": airline,
+                                "MarketingAirlineName": "Transavia Airlines",
+                                "JourneyDuration": "55",
+                                "CabinClassText": cabin,
+                            }
+                        }
+                    ],
+                    "TotalStops": stops,
+                }
+            ],
+        }
+    }
+
+
+def write_flights(data_dir: Path, itineraries):
+    """Write a supplier AirSearchResponse document to flights.json"""
+    with open(data_dir / "flights.json", 'w') as f:
+        json.dump({"AirSearchResponse": {"AirSearchResult": {"FareItineraries": itineraries}}}, f)
+
+
+def make_record(origin="RTM", destination="STN", airline="HV", price=100.0, stops=0,
+                dep="2025-12-21T12:55:00"):
+    """Build a normalized catalog record"""
+    return Itinerary(
+        index=0, airline_code=airline, airline_name="", flight_number="1",
+        departure_airport=origin, arrival_airport=destination,
+        departure_time=dep, arrival_time=dep, duration=55,
+        price_cents=round(price * 100), stops=stops, currency="USD", cabin_class="",
+    )
@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from app import main
 from app.main import app
 
 client = TestClient(app)
@@ -106,4 +107,111 @@ class TestBookingEndpoints:
     def test_get_booking_by_pnr_not_found(self):
         """Test getting non-existent booking by PNR"""
         response = client.get("/trip/NONEXISTENT")
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+    def test_create_bookings_batch(self):
+        """Test creating a group booking in one request"""
+        passengers = [
+            {
+                "flight_id": "flt_1",
+                "passenger": {
+                    "first_name": f"Member{i}",
+                    "last_name": "Group",
+                    "email": "group.lead@example.com",
+                    "passport": f"P0000000{i}"
+                },
+                "extras": {},
+                "total_price": 200.0 + i,
+                "currency": "USD"
+            }
+            for i in range(3)
+        ]
+
+        response = client.post("/bookings/batch", json=passengers)
+        assert response.status_code == 200
+
+        bookings = response.json()
+        assert [b["total_price"] for b in bookings] == [200.0, 201.0, 202.0]
+        assert len({b["pnr"] for b in bookings}) == 3
+        for booking in bookings:
+            assert client.get(f"/trip/{booking['pnr']}").status_code == 200
+
+    def test_create_bookings_batch_rejects_invalid_item(self):
+        """Test that one invalid item fails the whole batch before anything is stored"""
+        valid = {
+            "flight_id": "flt_1",
+            "passenger": {
+                "first_name": "Ann",
+                "last_name": "Batch",
+                "email": "ann.batch@example.com",
+                "passport": "P22222222"
+            },
+            "total_price": 100.0
+        }
+        invalid = {"flight_id": "flt_1", "total_price": 100.0}
+
+        response = client.post("/bookings/batch", json=[valid, invalid])
+        assert response.status_code == 422
+        assert client.get("/bookings?email=ann.batch@example.com").json() == []
+
+    def test_create_bookings_batch_rejects_empty(self):
+        """Test that an empty batch is a validation error"""
+        response = client.post("/bookings/batch", json=[])
+        assert response.status_code == 422
+
+    def test_booking_reads_match_response_model(self):
+        """Test that pre-encoded reads return exactly the BookingResponse shape"""
+        booking_data = {
+            "flight_id": "flt_9",
+            "passenger": {
+                "first_name": "Zoë",
+                "last_name": "Encoded",
+                "email": "zoe.encoded@example.com",
+                "passport": "P33333333"
+            },
+            "extras": {"meal": 1},
+            "total_price": 321.5
+        }
+        created = client.post("/bookings", json=booking_data).json()
+
+        response = client.get("/bookings?email=zoe.encoded@example.com")
+        assert response.headers["content-type"] == "application/json"
+        expected = [
+            main.BookingResponse.model_validate(b).model_dump(mode="json")
+            for b in main.booking_manager.get_user_bookings("zoe.encoded@example.com")
+        ]
+        assert response.json() == expected
+        assert created in expected
+        assert "passenger_email" not in response.json()[0]
+
+        trip = client.get(f"/trip/{created['pnr']}")
+        assert trip.json() == created
+
+    def test_booking_read_schemas_are_documented(self):
+        """Test that the OpenAPI schema still describes booking reads"""
+        paths = client.get("/openapi.json").json()["paths"]
+        bookings = paths["/bookings"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert bookings == {"type": "array", "items": {"$ref": "#/components/schemas/BookingResponse"},
+                            "title": "Response Get User Bookings Bookings Get"}
+        trip = paths["/trip/{pnr}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert trip == {"$ref": "#/components/schemas/BookingResponse"}
+
+    def test_get_user_bookings_fields(self):
+        """Test that fields= projects bookings, including passenger details"""
+        email = "fields.test@example.com"
+        client.post("/bookings", json={
+            "flight_id": "flt_2",
+            "passenger": {"first_name": "Field", "last_name": "Test", "email": email, "passport": "P44444444"},
+            "total_price": 99.0
+        })
+        full = client.get(f"/bookings?email={email}").json()
+        assert full
+        response = client.get(f"/bookings?email={email}&fields=pnr,passenger.last_name,status")
+        assert response.status_code == 200
+        assert response.json() == [
+            {"pnr": b["pnr"], "status": b["status"], "passenger": {"last_name": b["passenger"]["last_name"]}}
+            for b in full
+        ]
+
+        assert client.get(f"/bookings?email={email}&fields=passenger_email").status_code == 400
+
@@ -1,6 +1,14 @@
 import pytest
+import json
+import tempfile
+import timeit
+from pathlib import Path
 from fastapi.testclient import TestClient
+from app import main
 from app.main import app
+from app.flight_catalog import FlightCatalog
+from app.search_cache import SearchCache
+from tests.helpers import make_itinerary, write_flights
 
 client = TestClient(app)
 
@@ -55,6 +63,273 @@ class TestFlightEndpoints:
         data = response.json()
         assert "flights" in data
     
+    def test_get_flights_sorted_page(self):
+        """Test server-side sorting and limiting of the flights list"""
+        response = client.get("/flights?sort=price&limit=2")
+        assert response.status_code == 200
+
+        data = response.json()
+        prices = [f["price"] for f in data["flights"]]
+        assert len(prices) <= 2
+        assert prices == sorted(prices)
+        assert "nextCursor" in data
+
+    def test_search_flights_cursor_pagination(self):
+        """Test that following cursors returns every match once, in order"""
+        search_data = {"sort": "price", "limit": 1}
+        expected = client.post("/flights/search", json={"sort": "price"}).json()["flights"]
+
+        seen = []
+        while True:
+            response = client.post("/flights/search", json=search_data)
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(f["id"] for f in data["flights"])
+            if not data["nextCursor"]:
+                break
+            search_data["cursor"] = data["nextCursor"]
+
+        assert seen == [f["id"] for f in expected]
+
+    def test_search_flights_invalid_cursor(self):
+        """Test that a malformed cursor is a client error"""
+        response = client.post("/flights/search", json={"limit": 1, "cursor": "bogus"})
+        assert response.status_code == 400
+
+    def test_search_flights_invalid_sort(self):
+        """Test that unknown sort fields are rejected"""
+        response = client.post("/flights/search", json={"sort": "seats"})
+        assert response.status_code == 422
+
+    def test_search_flights_ndjson_stream(self):
+        """Test streamed NDJSON search results via query parameter and Accept header"""
+        expected = client.post("/flights/search", json={}).json()["flights"]
+
+        response = client.post("/flights/search?stream=1", json={})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == expected
+
+        response = client.post("/flights/search", json={},
+                               headers={"Accept": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == len(expected)
+
+    def test_search_flights_ndjson_stream_page(self):
+        """Test that a streamed page carries the next cursor in a header"""
+        response = client.post("/flights/search?stream=1", json={"sort": "price", "limit": 1})
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 1
+        assert "x-next-cursor" in response.headers
+
+    def test_search_flights_cached(self, monkeypatch):
+        """Test that repeated and equivalent searches are served from the cache"""
+        monkeypatch.setattr(main, "search_cache", SearchCache())
+        first = client.post("/flights/search", json={"origin": "rtm", "airline_codes": ["KL", "HV"]})
+        second = client.post("/flights/search", json={"origin": "RTM", "airline_codes": ["HV", "KL"]})
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+
+        stats = client.get("/flights/search/cache").json()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["entries"] == 1
+
+    def test_get_flights_fields(self):
+        """Test that fields= keeps only the requested attributes, in response order"""
+        full = client.get("/flights?sort=price&limit=3").json()["flights"]
+        response = client.get("/flights?sort=price&limit=3&fields=price,id,segments.flightNumber")
+        assert response.status_code == 200
+
+        assert response.json()["flights"] == [
+            {"id": f["id"], "price": f["price"], "segments": [{"flightNumber": f["flightNumber"]}]}
+            for f in full
+        ]
+        assert "nextCursor" in response.json()
+
+    def test_serializers_follow_the_response_shapes(self):
+        """Test the full serializers generated from the field projections"""
+        snapshot = main.flight_catalog.snapshot()
+        record = snapshot.records[0]
+        segment = {
+            "departureAirport": record.departure_airport,
+            "arrivalAirport": record.arrival_airport,
+            "departureTime": record.departure_time,
+            "arrivalTime": record.arrival_time,
+            "flightNumber": record.flight_number,
+            "airlineCode": record.airline_code,
+            "duration": record.duration,
+        }
+        flight = main.serialize_flight(record)
+        assert list(flight) == ["id", "airlineCode", "flightNumber", "departureAirport", "arrivalAirport",
+                                "departureTime", "arrivalTime", "duration", "price", "stops", "currency",
+                                "segments"]
+        assert flight["id"] == record.id and flight["price"] == record.price
+        assert flight["segments"] == [segment]
+
+        result = main.serialize_search_result(record, snapshot.airline_index)
+        assert list(result) == ["id", "airlineCode", "airlineName", "flightNumber", "departureAirport",
+                                "arrivalAirport", "departureTime", "arrivalTime", "duration", "price",
+                                "stops", "currency", "cabinClass", "segments"]
+        name = snapshot.airline_index.name(record.airline_code, record.airline_name)
+        assert result["airlineName"] == name and result["cabinClass"] == record.cabin_class
+        assert list(result["segments"][0]) == list(segment)[:6] + ["airlineName", "duration"]
+        assert result["segments"] == [{**segment, "airlineName": name}]
+
+    @pytest.mark.parametrize("projection, serializer, fields", [
+        ("FLIGHT_FIELDS", "serialize_flight", "id,price,departureTime,arrivalTime,segments.flightNumber"),
+        ("SEARCH_RESULT_FIELDS", "serialize_search_result", "id,airlineName,price,departureTime,segments.flightNumber"),
+    ])
+    def test_field_subsets_are_no_slower_than_full_serializers(self, projection, serializer, fields):
+        """Test that narrowing a response with fields= never costs more than the full shape"""
+        snapshot = main.flight_catalog.snapshot()
+        projection = getattr(main, projection)
+        args = (snapshot.airline_index,) if projection.args else ()
+        records = list(snapshot.records) * 1000
+        subset = projection.projector(projection.select(fields))
+        full = getattr(main, serializer)
+        assert full is projection.projector()
+
+        def best(project):
+            return min(timeit.repeat(lambda: [project(r, *args) for r in records], number=1, repeat=7))
+
+        assert best(subset) <= best(full)
+
+    def test_get_flights_unknown_fields(self):
+        """Test that unknown or non-nested field names are client errors"""
+        assert client.get("/flights?fields=id,seats").status_code == 400
+        assert client.get("/flights?fields=price.amount").status_code == 400
+        assert client.get("/flights?fields=,").status_code == 400
+
+    def test_search_flights_fields(self, monkeypatch):
+        """Test projected search results, streamed and cached separately from full ones"""
+        monkeypatch.setattr(main, "search_cache", SearchCache())
+        full = client.post("/flights/search", json={"origin": "RTM"}).json()["flights"]
+        response = client.post("/flights/search?fields=id,airlineName", json={"origin": "RTM"})
+        assert response.status_code == 200
+        assert response.json()["flights"] == [
+            {"id": f["id"], "airlineName": f["airlineName"]} for f in full
+        ]
+
+        again = client.post("/flights/search?fields=airlineName,id", json={"origin": "rtm"})
+        assert again.content == response.content
+        assert client.get("/flights/search/cache").json()["entries"] == 2
+
+        streamed = client.post("/flights/search?stream=1&fields=id,airlineName", json={"origin": "RTM"})
+        assert [json.loads(line) for line in streamed.text.splitlines()] == response.json()["flights"]
+
+        assert client.post("/flights/search?fields=stops.count", json={}).status_code == 400
+
+    def test_search_connections_success(self):
+        """Test connection search over the sample route"""
+        response = client.post("/flights/connections", json={"origin": "RTM", "destination": "STN"})
+        assert response.status_code == 200
+
+        flights = response.json()["flights"]
+        assert flights
+        prices = [f["price"] for f in flights]
+        assert prices == sorted(prices)
+        for flight in flights:
+            assert flight["segments"][0]["departureAirport"] == "RTM"
+            assert flight["segments"][-1]["arrivalAirport"] == "STN"
+            assert flight["stops"] >= len(flight["segments"]) - 1
+
+    def test_search_connections_requires_route(self):
+        """Test that connection search needs both ends of the journey"""
+        response = client.post("/flights/connections", json={"origin": "RTM"})
+        assert response.status_code == 400
+
+    def test_missing_catalog_fails_per_request(self, monkeypatch):
+        """Test that an unreadable flights file is an error response, not a startup crash"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            monkeypatch.setattr(main, "flight_catalog", FlightCatalog(str(data_dir), preload=False))
+            with TestClient(app) as started:
+                assert started.get("/flights").status_code == 500
+                assert started.get("/").status_code == 200
+
+                write_flights(data_dir, [make_itinerary()])
+                response = started.get("/flights")
+                assert response.status_code == 200
+                assert len(response.json()["flights"]) == 1
+
+    @pytest.fixture
+    def round_trip_catalog(self, monkeypatch):
+        """Serve a catalog with legs in both directions of RTM-STN"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [
+                make_itinerary(amount="100"),
+                make_itinerary(amount="150"),
+                make_itinerary(origin="STN", destination="RTM", dep="2025-12-28T09:00:00", amount="80"),
+                make_itinerary(origin="STN", destination="RTM", dep="2025-12-28T19:00:00", amount="95"),
+                make_itinerary(origin="STN", destination="RTM", dep="2025-12-29T09:00:00", amount="1"),
+            ])
+            monkeypatch.setattr(main, "flight_catalog", FlightCatalog(str(data_dir)))
+            monkeypatch.setattr(main, "search_cache", SearchCache())
+            yield
+
+    def test_search_round_trips(self, round_trip_catalog):
+        """Test that a return_date pairs outbound and inbound legs cheapest first"""
+        search_data = {
+            "origin": "RTM",
+            "destination": "STN",
+            "return_date": "2025-12-28",
+            "limit": 3,
+        }
+        response = client.post("/flights/search", json=search_data)
+        assert response.status_code == 200
+
+        round_trips = response.json()["roundTrips"]
+        assert [(p["outbound"]["id"], p["inbound"]["id"]) for p in round_trips] == [
+            ("flt_0", "flt_2"), ("flt_0", "flt_3"), ("flt_1", "flt_2"),
+        ]
+        assert [p["price"] for p in round_trips] == [180.0, 195.0, 230.0]
+
+    def test_search_round_trips_fields(self, round_trip_catalog):
+        """Test that fields= narrows both legs of each round trip"""
+        search_data = {"origin": "RTM", "destination": "STN", "return_date": "2025-12-28", "limit": 1}
+        response = client.post("/flights/search?fields=id", json=search_data)
+        assert response.status_code == 200
+        assert response.json()["roundTrips"][0] == {
+            "outbound": {"id": "flt_0"},
+            "inbound": {"id": "flt_2"},
+            "price": 180.0,
+            "duration": response.json()["roundTrips"][0]["duration"],
+            "currency": "USD",
+        }
+
+    def test_search_without_return_date_has_no_round_trips(self, round_trip_catalog):
+        """Test that one-way searches keep their response shape"""
+        response = client.post("/flights/search", json={"origin": "RTM", "destination": "STN"})
+        assert "roundTrips" not in response.json()
+
+    def test_get_fare_calendar(self):
+        """Test that the calendar agrees with a search for each day"""
+        search_data = {"origin": "RTM", "destination": "STN", "departure_date": "2025-12-21"}
+        flights = client.post("/flights/search", json=search_data).json()["flights"]
+
+        response = client.get("/fares/calendar?origin=rtm&destination=stn&from=2025-12-20&to=2025-12-22")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["origin"] == "RTM"
+        assert data["days"] == [{
+            "date": "2025-12-21",
+            "minPrice": min(f["price"] for f in flights),
+            "minDuration": min(f["duration"] for f in flights),
+            "count": len(flights),
+        }]
+
+    def test_get_fare_calendar_invalid_range(self):
+        """Test that reversed or missing date ranges are rejected"""
+        response = client.get("/fares/calendar?origin=RTM&destination=STN&from=2025-12-22&to=2025-12-20")
+        assert response.status_code == 400
+
+        response = client.get("/fares/calendar?origin=RTM&destination=STN")
+        assert response.status_code == 422
+
     def test_get_airports_success(self):
         """Test getting airport list"""
         response = client.get("/airports")
@@ -62,6 +337,28 @@ class TestFlightEndpoints:
         
         data = response.json()
         assert isinstance(data, list)
+        assert data == sorted(data)
+
+    def test_search_airports_prefix(self):
+        """Test airport autocomplete by code prefix"""
+        response = client.get("/airports?q=r")
+        assert response.status_code == 200
+        assert response.json() == ["RTM"]
+
+        assert client.get("/airports?q=r&limit=51").status_code == 422
+
+    def test_get_airport_destinations(self):
+        """Test reachable destinations of an airport"""
+        response = client.get("/airports/rtm/destinations")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["code"] == "RTM"
+        assert data["departures"] > 0
+        assert [d["code"] for d in data["destinations"]] == ["STN"]
+
+        response = client.get("/airports/XXX/destinations")
+        assert response.status_code == 404
     
     def test_get_airlines_success(self):
         """Test getting airlines list"""
@@ -71,10 +368,77 @@ class TestFlightEndpoints:
         data = response.json()
         assert isinstance(data, list)
     
+    def test_search_airlines_prefix(self):
+        """Test airline autocomplete by code and name prefix"""
+        response = client.get("/airlines?q=kl&limit=5")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert 0 < len(data) <= 5
+        assert data[0]["AirLineCode"] == "KL"
+
+    def test_get_airline_by_code(self):
+        """Test getting a single airline by code"""
+        response = client.get("/airlines/hv")
+        assert response.status_code == 200
+        assert response.json()["AirLineName"] == "Transavia Airlines"
+
+        response = client.get("/airlines/ZZZZ")
+        assert response.status_code == 404
+
+    def test_search_results_use_airline_index_names(self):
+        """Test that airline names come from the airline list"""
+        response = client.post("/flights/search", json={"airline_codes": ["HV"]})
+        for flight in response.json()["flights"]:
+            assert flight["airlineName"] == "Transavia Airlines"
+
     def test_get_services_success(self):
         """Test getting extra services"""
         response = client.get("/services")
         assert response.status_code == 200
         
         data = response.json()
-        assert isinstance(data, dict)
\ No newline at end of file
+        assert isinstance(data, dict)
+
+    def test_reference_endpoints_revalidate_with_etag(self):
+        """Test that unchanged reference data is answered with 304"""
+        for path in ("/services", "/airlines", "/airports"):
+            response = client.get(path)
+            assert response.status_code == 200
+            etag = response.headers["etag"]
+
+            response = client.get(path, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+            assert response.content == b""
+
+            response = client.get(path, headers={"If-None-Match": '"stale"'})
+            assert response.status_code == 200
+
+    def test_reference_endpoints_gzip(self):
+        """Test that large reference responses are sent gzip-compressed on request"""
+        plain = client.get("/airlines", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+
+        compressed = client.get("/airlines", headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["vary"] == "Accept-Encoding"
+        assert compressed.json() == plain.json()
+        assert int(compressed.headers["content-length"]) < len(plain.content)
+
+    def test_metrics_endpoint(self):
+        """Test that requests and search stages show up in Prometheus metrics"""
+        client.post("/flights/search", json={"origin": "RTM", "sort": "price", "limit": 1})
+        client.get("/trip/UNKNOWN")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+        text = response.text
+        assert 'skyscan_http_requests_total{method="GET",route="/trip/{pnr}",status="404"}' in text
+        assert 'skyscan_http_request_duration_seconds_count{method="POST",route="/flights/search"}' in text
+        assert 'skyscan_http_response_size_bytes_sum{method="POST",route="/flights/search"}' in text
+        assert 'skyscan_catalog_reloads_total{source=' in text
+        assert "skyscan_catalog_itineraries " in text
+
@@ -0,0 +1,54 @@
+import pytest
+from app.airline_index import AirlineIndex
+
+
+AIRLINES = [
+    {"AirLineCode": "HV", "AirLineName": "Transavia Airlines", "AirLineLogo": "hv.gif"},
+    {"AirLineCode": "KL", "AirLineName": "KLM", "AirLineLogo": "kl.gif"},
+    {"AirLineCode": "lp", "AirLineName": "Lan Peru", "AirLineLogo": "lp.gif"},
+    {"AirLineCode": "BA", "AirLineName": "British Airways", "AirLineLogo": "ba.gif"},
+    {"AirLineCode": "KLX", "AirLineName": "Air Klaxon", "AirLineLogo": "klx.gif"},
+    {"AirLineCode": "BA", "AirLineName": "Duplicate", "AirLineLogo": ""},
+]
+
+
+class TestAirlineIndex:
+    """Test suite for AirlineIndex class"""
+
+    @pytest.fixture
+    def index(self):
+        return AirlineIndex(AIRLINES)
+
+    def test_lookup_by_code(self, index):
+        """Test case-insensitive code lookup where the first record wins"""
+        assert index.get("kl")["AirLineName"] == "KLM"
+        assert index.get("LP")["AirLineName"] == "Lan Peru"
+        assert index.get("BA")["AirLineName"] == "British Airways"
+        assert index.get("ZZ") is None
+
+    def test_name_falls_back_for_unknown_code(self, index):
+        """Test that names come from the list, with a default for unknown codes"""
+        assert index.name("HV", "supplier name") == "Transavia Airlines"
+        assert index.name("ZZ", "supplier name") == "supplier name"
+
+    def test_null_names_are_not_indexed(self):
+        """Test that a null name neither matches "none" nor replaces the default"""
+        index = AirlineIndex([{"AirLineCode": "XX", "AirLineName": None, "AirLineLogo": None}])
+        assert index.name("XX", "supplier name") == "supplier name"
+        assert index.search("none") == []
+
+    def test_exact_code_ranks_first(self, index):
+        """Test that an exact code match precedes other prefix matches"""
+        codes = [a["AirLineCode"] for a in index.search("kl")]
+        assert codes == ["KL", "KLX"]
+
+    def test_matches_any_name_word(self, index):
+        """Test prefix matching on full names and individual words"""
+        assert [a["AirLineCode"] for a in index.search("air")] == ["KLX", "HV", "BA"]
+        assert [a["AirLineCode"] for a in index.search("Lan P")] == ["lp"]
+
+    def test_limit_and_empty_query(self, index):
+        """Test that results are capped and a blank query lists airlines"""
+        assert len(index.search("a", limit=2)) == 2
+        assert index.search("  ", limit=3) == AIRLINES[:3]
+        assert index.search("nothing") == []
@@ -0,0 +1,43 @@
+import pytest
+from app.airport_index import AirportIndex
+from app.fare_store import ColumnarFareStore
+from tests.helpers import make_record
+
+
+class TestAirportIndex:
+    """Test suite for AirportIndex class"""
+
+    @pytest.fixture
+    def index(self):
+        return AirportIndex(ColumnarFareStore([
+            make_record("RTM", "STN"),
+            make_record("rtm", "STN"),
+            make_record("RTM", "AMS"),
+            make_record("AMS", "STN"),
+            make_record("STN", ""),
+        ]))
+
+    def test_counts_departures_and_arrivals(self, index):
+        """Test per-airport counts, with codes compared case-insensitively"""
+        assert index.departures == {"RTM": 3, "AMS": 1, "STN": 1}
+        assert index.arrivals == {"RTM": 0, "AMS": 1, "STN": 3}
+        assert index.codes == ["AMS", "RTM", "STN"]
+
+    def test_destinations_by_flight_count(self, index):
+        """Test that destinations are ranked by number of flights"""
+        assert index.summary("rtm") == {
+            "code": "RTM",
+            "departures": 3,
+            "arrivals": 0,
+            "destinations": [{"code": "STN", "flights": 2}, {"code": "AMS", "flights": 1}],
+        }
+        # Flights with an empty destination are not a route
+        assert index.summary("STN")["destinations"] == []
+        assert index.summary("XXX") is None
+
+    def test_prefix_search(self, index):
+        """Test prefix autocomplete over codes"""
+        assert index.search("r") == ["RTM"]
+        assert index.search("") == ["AMS", "RTM", "STN"]
+        assert index.search("", limit=2) == ["AMS", "RTM"]
+        assert index.search("Z") == []
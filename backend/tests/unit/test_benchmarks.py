@@ -0,0 +1,80 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+from app import main
+from app.booking_utils import BookingManager
+from app.flight_catalog import FlightCatalog
+from app.search_cache import SearchCache
+from benchmarks.load_test import build_scenarios, compare, run_benchmark
+from benchmarks.synthetic_data import generate, parse_count, pnr_for
+
+
+class TestSyntheticData:
+    """Test suite for the synthetic data generator"""
+
+    def test_parse_count(self):
+        assert parse_count("1k") == 1_000
+        assert parse_count("100K") == 100_000
+        assert parse_count("1m") == 1_000_000
+        assert parse_count("250") == 250
+
+    def test_pnrs_are_distinct(self):
+        assert len({pnr_for(i, 1000) for i in range(1000)}) == 1000
+
+    def test_generated_data_loads(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest = generate(Path(temp_dir), records=50, bookings=20, seed=1)
+            catalog = FlightCatalog(temp_dir)
+            assert len(catalog.snapshot()) == 50
+            assert {r.departure_airport for r in catalog.snapshot().records} <= set(manifest["airports"])
+
+            manager = BookingManager(temp_dir)
+            try:
+                booking = manager.get_booking_by_pnr(pnr_for(7, 20))
+                assert booking is not None
+                assert booking in manager.get_user_bookings(booking["passenger_email"])
+            finally:
+                manager.close()
+
+    def test_generation_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            generate(Path(a), records=10, bookings=10, seed=3)
+            generate(Path(b), records=10, bookings=10, seed=3)
+            for name in ("flights.json", "bookings.json"):
+                assert (Path(a) / name).read_bytes() == (Path(b) / name).read_bytes()
+
+
+class TestLoadTest:
+    """Test suite for the in-process benchmark harness"""
+
+    def test_run_benchmark(self, monkeypatch):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest = generate(Path(temp_dir), records=30, bookings=30, seed=2)
+            manager = BookingManager(temp_dir)
+            monkeypatch.setattr(main, "flight_catalog", FlightCatalog(temp_dir))
+            monkeypatch.setattr(main, "booking_manager", manager)
+            monkeypatch.setattr(main, "search_cache", SearchCache())
+            try:
+                results = asyncio.run(run_benchmark(
+                    main.app, build_scenarios(manifest), requests=5, concurrency=2, warmup=1))
+            finally:
+                manager.close()
+
+        assert set(results) == {"GET /flights", "POST /flights/search", "GET /bookings",
+                                "GET /trip/{pnr}", "POST /bookings"}
+        for summary in results.values():
+            assert summary["requests"] == 5
+            assert summary["errors"] == 0
+            assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+    def test_compare_against_baseline(self):
+        baseline = {"endpoints": {"GET /flights": {"throughput_rps": 100, "p50_ms": 2.0,
+                                                   "p95_ms": 4.0, "p99_ms": 8.0}}}
+        results = {"endpoints": {"GET /flights": {"throughput_rps": 150, "p50_ms": 1.0,
+                                                  "p95_ms": 4.0, "p99_ms": 8.0},
+                                 "GET /bookings": {}}}
+        lines = compare(results, baseline)
+        assert "+50.0%" in lines[0]
+        assert "-50.0%" in lines[0]
+        assert "not in baseline" in lines[1]
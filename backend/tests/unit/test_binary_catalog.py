@@ -0,0 +1,99 @@
+import pytest
+import json
+import os
+import tempfile
+from pathlib import Path
+from app.binary_catalog import MappedItineraries, open_snapshot
+from app.flight_catalog import FlightCatalog
+from tests.helpers import make_itinerary, write_flights
+
+
+def write_airlines(data_dir: Path):
+    """Write a two-entry airline-list.json"""
+    with open(data_dir / "airline-list.json", 'w') as f:
+        json.dump([
+            {"AirLineCode": "HV", "AirLineName": "Transavia", "AirLineLogo": "hv.gif"},
+            {"AirLineCode": "KL", "AirLineName": "KLM", "AirLineLogo": None, "Alliance": "SkyTeam"},
+        ], f)
+
+
+class TestBinaryCatalog:
+    """Test suite for the precompiled binary catalog snapshot"""
+
+    @pytest.fixture
+    def data_dir(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [
+                make_itinerary(),
+                make_itinerary(origin="AMS", airline="KL", amount="99.99", dep="not-a-date"),
+                make_itinerary(destination="LHR", stops=1),
+            ])
+            write_airlines(data_dir)
+            yield data_dir
+
+    def test_round_trips_records(self, data_dir):
+        """Test that mapped records and columns equal the JSON-loaded ones"""
+        catalog = FlightCatalog(str(data_dir))
+        catalog.build_snapshot()
+        mapped = FlightCatalog(str(data_dir))
+
+        expected, actual = catalog.snapshot(), mapped.snapshot()
+        assert isinstance(actual.records, MappedItineraries)
+        assert len(actual) == 3
+        for want, got in zip(expected.records, actual.records):
+            for name in want.__slots__:
+                assert getattr(got, name) == getattr(want, name)
+        assert actual.fares.price_cents.tolist() == expected.fares.price_cents.tolist()
+        assert actual.fares.airports.codes == expected.fares.airports.codes
+        assert actual.candidates(origin="rtm").tolist() == expected.candidates(origin="rtm").tolist()
+        assert actual.airlines == expected.airlines
+        assert actual.airlines[1] == {
+            "AirLineCode": "KL", "AirLineName": "KLM", "AirLineLogo": None, "Alliance": "SkyTeam",
+        }
+
+    def test_columns_are_read_only_views(self, data_dir):
+        """Test that fare columns are mapped rather than copied"""
+        catalog = FlightCatalog(str(data_dir), preload=False)
+        catalog.build_snapshot()
+
+        mapped = open_snapshot(catalog.snapshot_file, catalog.sources)
+
+        assert not mapped.fares.price_cents.flags.writeable
+        assert not mapped.fares.origin.flags.owndata
+
+    def test_touched_source_with_same_content_still_matches(self, data_dir):
+        """Test that a new mtime alone falls through to the content hash"""
+        catalog = FlightCatalog(str(data_dir), preload=False)
+        catalog.build_snapshot()
+        stat = (data_dir / "flights.json").stat()
+        os.utime(data_dir / "flights.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert open_snapshot(catalog.snapshot_file, catalog.sources) is not None
+
+    def test_falls_back_to_json_when_source_changes(self, data_dir):
+        """Test that a snapshot of older sources is ignored"""
+        FlightCatalog(str(data_dir), preload=False).build_snapshot()
+        write_flights(data_dir, [make_itinerary(origin="CDG")])
+
+        snapshot = FlightCatalog(str(data_dir)).snapshot()
+
+        assert isinstance(snapshot.records, list)
+        assert [r.departure_airport for r in snapshot.records] == ["CDG"]
+
+    def test_falls_back_to_json_on_corrupt_snapshot(self, data_dir):
+        """Test that an unreadable snapshot file is ignored"""
+        (data_dir / "catalog.bin").write_bytes(b"not a snapshot")
+
+        snapshot = FlightCatalog(str(data_dir)).snapshot()
+
+        assert isinstance(snapshot.records, list)
+        assert len(snapshot) == 3
+
+    def test_rejects_foreign_file(self, data_dir):
+        """Test that a file without the snapshot magic raises ValueError"""
+        path = data_dir / "catalog.bin"
+        path.write_bytes(b"\0" * 64)
+
+        with pytest.raises(ValueError):
+            open_snapshot(path, {})
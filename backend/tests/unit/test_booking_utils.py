@@ -1,41 +1,37 @@
 import pytest
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, mock_open, MagicMock
 import json
 import tempfile
 from pathlib import Path
+from app.booking_storage import BACKENDS, SqliteBookingStore, encode_json
 from app.booking_utils import BookingManager
 
 class TestBookingManager:
-    """Test suite for BookingManager class"""
+    """Test suite for BookingManager class, run against every storage backend"""
     
-    def test_init(self):
+    def test_init(self, booking_backend):
         """Test BookingManager initialization"""
         with tempfile.TemporaryDirectory() as temp_dir:
             data_dir = Path(temp_dir) / "data"
-            manager = BookingManager(str(data_dir))
+            manager = BookingManager(str(data_dir), backend=booking_backend)
             assert manager.data_dir == data_dir
-            assert manager.bookings_file == data_dir / "bookings.json"
+            assert isinstance(manager.store, BACKENDS[booking_backend])
+            assert manager.store.data_dir == data_dir
     
-    def test_ensure_bookings_file_creates_file(self):
-        """Test that _ensure_bookings_file creates bookings file if it doesn't exist"""
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected"""
         with tempfile.TemporaryDirectory() as temp_dir:
-            data_dir = Path(temp_dir) / "data"
-            manager = BookingManager(str(data_dir))
-            
-            # Check that file was created
-            assert manager.bookings_file.exists()
-            
-            # Check file content
-            with open(manager.bookings_file, 'r') as f:
-                data = json.load(f)
-                assert "bookings" in data
-                assert data["bookings"] == []
+            with pytest.raises(ValueError):
+                BookingManager(str(Path(temp_dir) / "data"), backend="csv")
     
-    def test_create_booking(self):
+    def test_create_booking(self, booking_backend):
         """Test creating a new booking"""
         with tempfile.TemporaryDirectory() as temp_dir:
             data_dir = Path(temp_dir) / "data"
-            manager = BookingManager(str(data_dir))
+            manager = BookingManager(str(data_dir), backend=booking_backend)
             
             booking_data = {
                 "flight_id": "flt_123",
@@ -64,11 +60,11 @@ class TestBookingManager:
             assert booking["passenger_email"] == "test@example.com"
             assert booking["status"] == "confirmed"
     
-    def test_get_user_bookings(self):
+    def test_get_user_bookings(self, booking_backend):
         """Test getting bookings for a user"""
         with tempfile.TemporaryDirectory() as temp_dir:
             data_dir = Path(temp_dir) / "data"
-            manager = BookingManager(str(data_dir))
+            manager = BookingManager(str(data_dir), backend=booking_backend)
             
             # Create test bookings
             booking1 = manager.create_booking({
@@ -106,11 +102,11 @@ class TestBookingManager:
             assert user_bookings[0]["id"] == booking1["id"]
             assert user_bookings[0]["passenger_email"] == "test@example.com"
     
-    def test_get_booking_by_pnr(self):
+    def test_get_booking_by_pnr(self, booking_backend):
         """Test getting booking by PNR"""
         with tempfile.TemporaryDirectory() as temp_dir:
             data_dir = Path(temp_dir) / "data"
-            manager = BookingManager(str(data_dir))
+            manager = BookingManager(str(data_dir), backend=booking_backend)
             
             # Create a booking
             booking = manager.create_booking({
@@ -136,4 +132,299 @@ class TestBookingManager:
             
             # Test with non-existent PNR
             not_found = manager.get_booking_by_pnr("NONEXISTENT")
-            assert not_found is None
\ No newline at end of file
+            assert not_found is None
+
+    def test_reads_include_existing_bookings(self, temp_data_dir, sample_booking_data, booking_backend):
+        """Test that lookups see previously stored and new bookings"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+        booking = manager.create_booking({**sample_booking_data, "passenger_email": "test@example.com"})
+
+        user_bookings = manager.get_user_bookings("TEST@example.com")
+        assert [b["id"] for b in user_bookings] == ["test-booking-1", booking["id"]]
+        assert manager.get_booking_by_pnr("abc123")["id"] == "test-booking-1"
+        manager.close()
+
+    def test_bookings_survive_restart(self, temp_data_dir, sample_booking_data, booking_backend):
+        """Test that a new manager sees bookings written by a previous one"""
+        first = BookingManager(str(temp_data_dir), backend=booking_backend)
+        booking = first.create_booking({**sample_booking_data, "passenger_email": "jane@example.com"})
+        first.close()
+
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+        assert manager.get_booking_by_pnr(booking["pnr"])["id"] == booking["id"]
+        assert len(manager.get_user_bookings("test@example.com")) == 1
+        assert len(manager.get_user_bookings("jane@example.com")) == 1
+        manager.close()
+
+    def test_concurrent_bookings_are_group_committed(self, temp_data_dir, sample_booking_data,
+                                                     booking_backend):
+        """Test that concurrent bookings share a store write and none are lost"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend, commit_window=0.2)
+        batch_sizes = []
+        append = manager.store.append
+
+        def record_batch(bookings):
+            batch_sizes.append(len(bookings))
+            append(bookings)
+
+        data = {**sample_booking_data, "passenger_email": "jane@example.com"}
+        with patch.object(manager.store, "append", side_effect=record_batch):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                bookings = list(pool.map(lambda _: manager.create_booking(data), range(8)))
+
+        assert sum(batch_sizes) == 8
+        assert len(batch_sizes) < 8
+        assert len(manager.get_user_bookings("jane@example.com")) == 8
+        for booking in bookings:
+            assert manager.get_booking_by_pnr(booking["pnr"]) is not None
+        manager.close()
+
+    def test_create_booking_async(self, temp_data_dir, sample_booking_data, booking_backend):
+        """Test that the async entry point waits for its own commit"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+        data = {**sample_booking_data, "passenger_email": "jane@example.com"}
+
+        async def create_many():
+            return await asyncio.gather(*[
+                manager.create_booking_async(data) for _ in range(5)
+            ])
+
+        bookings = asyncio.run(create_many())
+
+        assert len({b["id"] for b in bookings}) == 5
+        assert len(manager.get_user_bookings("jane@example.com")) == 5
+        manager.close()
+
+    def test_create_bookings_commits_once(self, temp_data_dir, sample_booking_data, booking_backend):
+        """Test that a batch of bookings is persisted in a single store write"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+        data = {**sample_booking_data, "passenger_email": "jane@example.com"}
+        append = manager.store.append
+
+        with patch.object(manager.store, "append", side_effect=append) as mock_append:
+            bookings = manager.create_bookings([data] * 50)
+
+        assert mock_append.call_count == 1
+        assert len({b["id"] for b in bookings}) == 50
+        assert len(manager.get_user_bookings("jane@example.com")) == 50
+        manager.close()
+
+    def test_failed_commit_is_reported_to_caller(self, temp_data_dir, sample_booking_data,
+                                                 booking_backend):
+        """Test that a store write error propagates and the booking is not visible"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+
+        with patch.object(manager.store, "append", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                manager.create_booking({**sample_booking_data, "passenger_email": "jane@example.com"})
+
+        assert manager.get_user_bookings("jane@example.com") == []
+        manager.close()
+
+    def test_encoded_reads(self, temp_data_dir, sample_booking_data, booking_backend):
+        """Test that encoded reads match the encoder for stored and new bookings"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+        booking = manager.create_booking({**sample_booking_data, "passenger_email": "test@example.com"})
+
+        encoded = manager.get_encoded_user_bookings("test@example.com")
+        assert encoded == [encode_json(b) for b in manager.get_user_bookings("test@example.com")]
+        assert manager.get_encoded_booking_by_pnr(booking["pnr"]) == encode_json(booking)
+        assert manager.get_encoded_booking_by_pnr("NONEXISTENT") is None
+        manager.close()
+
+    def test_async_reads_leave_the_event_loop_for_disk_stores(self, temp_data_dir, booking_backend):
+        """Test that async reads match sync ones and only disk-backed reads change thread"""
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend)
+        threads = []
+        read = manager.get_encoded_user_bookings
+
+        def spy(email):
+            threads.append(threading.get_ident())
+            return read(email)
+
+        async def read_all():
+            with patch.object(manager, "get_encoded_user_bookings", side_effect=spy):
+                encoded = await manager.get_encoded_user_bookings_async("test@example.com")
+            return encoded, threading.get_ident(), (
+                await manager.get_user_bookings_async("test@example.com"),
+                await manager.get_encoded_booking_by_pnr_async("ABC123"),
+            )
+
+        encoded, loop_thread, (bookings, by_pnr) = asyncio.run(read_all())
+        assert encoded == manager.get_encoded_user_bookings("test@example.com")
+        assert bookings == manager.get_user_bookings("test@example.com")
+        assert by_pnr == manager.get_encoded_booking_by_pnr("ABC123")
+        assert (threads[0] != loop_thread) == manager.store.reads_block
+        manager.close()
+
+    def test_rejected_booking_is_not_stored(self, temp_data_dir, sample_booking_data, booking_backend):
+        """Test that a booking the encoder rejects fails before it is persisted"""
+        def encode(booking):
+            if booking["total_price"] < 0:
+                raise ValueError("negative price")
+            return encode_json(booking)
+
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend, encode=encode)
+        with pytest.raises(ValueError):
+            manager.create_booking({**sample_booking_data, "total_price": -1.0,
+                                    "passenger_email": "jane@example.com"})
+        manager.close()
+
+        manager = BookingManager(str(temp_data_dir), backend=booking_backend, encode=encode)
+        assert manager.get_user_bookings("jane@example.com") == []
+        manager.close()
+
+
+class TestJsonBookingStore:
+    """Test suite for the snapshot + journal booking store"""
+
+    def test_bookings_file_path(self):
+        """Test that the JSON store keeps bookings.json in the data directory"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "data"
+            manager = BookingManager(str(data_dir))
+            assert manager.store.bookings_file == data_dir / "bookings.json"
+
+    def test_ensure_bookings_file_creates_file(self):
+        """Test that _ensure_bookings_file creates bookings file if it doesn't exist"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "data"
+            store = BookingManager(str(data_dir)).store
+            
+            # Check that file was created
+            assert store.bookings_file.exists()
+            
+            # Check file content
+            with open(store.bookings_file, 'r') as f:
+                data = json.load(f)
+                assert "bookings" in data
+                assert data["bookings"] == []
+
+    def test_create_booking_appends_to_journal(self, sample_booking_data):
+        """Test that bookings are journaled instead of rewriting the snapshot"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "data"
+            manager = BookingManager(str(data_dir))
+            store = manager.store
+            snapshot_before = store.bookings_file.read_text()
+
+            booking = manager.create_booking(sample_booking_data)
+
+            assert store.bookings_file.read_text() == snapshot_before
+            lines = store.journal_file.read_text().splitlines()
+            assert len(lines) == 1
+            assert json.loads(lines[0])["id"] == booking["id"]
+
+    def test_compact_folds_journal_into_snapshot(self, temp_data_dir, sample_booking_data):
+        """Test that compaction moves journaled bookings into bookings.json"""
+        manager = BookingManager(str(temp_data_dir))
+        store = manager.store
+        booking = manager.create_booking(sample_booking_data)
+
+        store.compact()
+
+        assert not store.journal_file.exists()
+        with open(store.bookings_file, 'r') as f:
+            ids = [b["id"] for b in json.load(f)["bookings"]]
+        assert ids == ["test-booking-1", booking["id"]]
+        assert manager.get_booking_by_pnr(booking["pnr"])["id"] == booking["id"]
+
+    def test_compaction_triggers_in_background(self, temp_data_dir, sample_booking_data):
+        """Test that reaching compact_every starts a background compaction"""
+        manager = BookingManager(str(temp_data_dir), compact_every=2)
+        store = manager.store
+        manager.create_booking(sample_booking_data)
+        manager.create_booking(sample_booking_data)
+        store._compaction_thread.join(timeout=5)
+
+        with open(store.bookings_file, 'r') as f:
+            assert len(json.load(f)["bookings"]) == 3
+        assert len(store._read_bookings()["bookings"]) == 3
+
+    def test_torn_journal_line_is_dropped(self, temp_data_dir, sample_booking_data):
+        """Test that a partial last journal line from a crash is discarded"""
+        manager = BookingManager(str(temp_data_dir))
+        booking = manager.create_booking(sample_booking_data)
+        with open(manager.store.journal_file, 'a') as f:
+            f.write('{"id": "torn", "pnr"')
+
+        manager = BookingManager(str(temp_data_dir))
+        second = manager.create_booking(sample_booking_data)
+
+        ids = [b["id"] for b in manager.store._read_bookings()["bookings"]]
+        assert ids == ["test-booking-1", booking["id"], second["id"]]
+
+    def test_lookups_do_not_read_disk(self, temp_data_dir, sample_booking_data):
+        """Test that PNR and email lookups are served from memory"""
+        manager = BookingManager(str(temp_data_dir))
+        booking = manager.create_booking({**sample_booking_data, "passenger_email": "Jane@Example.com"})
+
+        with patch.object(manager.store, "_read_bookings", side_effect=AssertionError("disk read")), \
+                patch("builtins.open", side_effect=AssertionError("disk read")):
+            assert manager.get_booking_by_pnr(booking["pnr"].lower())["id"] == booking["id"]
+            assert manager.get_booking_by_pnr("abc123")["id"] == "test-booking-1"
+            assert [b["id"] for b in manager.get_user_bookings("jane@example.com")] == [booking["id"]]
+            assert manager.get_user_bookings("nobody@example.com") == []
+
+
+class TestSqliteBookingStore:
+    """Test suite for the SQLite booking store"""
+
+    def test_uses_wal_and_indexes(self, temp_data_dir):
+        """Test that the database runs in WAL mode with lookup indexes"""
+        store = SqliteBookingStore(temp_data_dir)
+        conn = store._connection()
+
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(bookings)")}
+        assert {"idx_bookings_pnr", "idx_bookings_passenger_email"} <= indexes
+        store.close()
+
+    def test_connection_per_thread(self, temp_data_dir):
+        """Test that each thread gets its own connection"""
+        store = SqliteBookingStore(temp_data_dir)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            other = pool.submit(store._connection).result()
+        assert other is not store._connection()
+        store.close()
+
+    def test_seeds_from_json_once(self, temp_data_dir, sample_booking_data):
+        """Test that a new database imports JSON bookings only on creation"""
+        store = SqliteBookingStore(temp_data_dir)
+        assert store.get_by_pnr("ABC123")["id"] == "test-booking-1"
+        store.close()
+
+        (temp_data_dir / "bookings.json").write_text(json.dumps({"bookings": []}))
+        store = SqliteBookingStore(temp_data_dir)
+        assert store.get_by_pnr("ABC123")["id"] == "test-booking-1"
+        store.close()
+
+    def test_stores_encoded_responses(self, temp_data_dir, sample_booking_data):
+        """Test that seeded and new bookings keep their encoded response in the row"""
+        store = SqliteBookingStore(temp_data_dir, encode=lambda b: b"enc:" + b["id"].encode())
+        store.append([{**sample_booking_data, "id": "b2", "pnr": "XYZ789",
+                       "passenger_email": "jane@example.com"}])
+
+        stored = dict(store._connection().execute("SELECT id, response FROM bookings"))
+        assert stored == {"test-booking-1": b"enc:test-booking-1", "b2": b"enc:b2"}
+        assert store.get_encoded_by_pnr("xyz789") == b"enc:b2"
+        store.close()
+
+    def test_responses_of_another_encoding_are_not_served(self, temp_data_dir, sample_booking_data):
+        """Test that stored encodings are ignored once the encoding changes"""
+        store = SqliteBookingStore(temp_data_dir, encode=lambda b: b"v1:" + b["id"].encode(),
+                                   encoding="v1")
+        store.append([{**sample_booking_data, "id": "b2", "pnr": "XYZ789",
+                       "passenger_email": "jane@example.com"}])
+        store.close()
+
+        store = SqliteBookingStore(temp_data_dir, encode=lambda b: b"v2:" + b["id"].encode(),
+                                   encoding="v2")
+        assert store.get_encoded_by_pnr("XYZ789") == b"v2:b2"
+        assert store.get_encoded_by_email("test@example.com") == [b"v2:test-booking-1"]
+
+        store.append([{**sample_booking_data, "id": "b3", "pnr": "NEW123",
+                       "passenger_email": "jane@example.com"}])
+        stored = dict(store._connection().execute("SELECT id, encoding FROM bookings"))
+        assert stored == {"test-booking-1": "v1", "b2": "v1", "b3": "v2"}
+        store.close()
@@ -0,0 +1,121 @@
+import pytest
+from datetime import date
+from app.connections import ConnectionGraph
+from app.fare_store import ColumnarFareStore, day_number
+from app.itinerary import Itinerary
+
+
+def make_leg(index, origin, destination, dep, arr, duration, price, stops=0, airline="HV"):
+    """Build a one-segment catalog record"""
+    return Itinerary(
+        index=index, airline_code=airline, airline_name="", flight_number=str(index),
+        departure_airport=origin, arrival_airport=destination,
+        departure_time=dep, arrival_time=arr, duration=duration,
+        price_cents=round(price * 100), stops=stops, currency="USD", cabin_class="",
+    )
+
+
+class TestConnectionGraph:
+    """Test suite for ConnectionGraph class"""
+
+    @pytest.fixture
+    def graph(self):
+        records = [
+            # Direct, expensive
+            make_leg(0, "AMS", "JFK", "2025-12-21T10:00:00", "2025-12-21T12:30:00", 510, 900),
+            # Cheap via LHR with a 2h layover
+            make_leg(1, "AMS", "LHR", "2025-12-21T08:00:00", "2025-12-21T08:15:00", 75, 100),
+            make_leg(2, "LHR", "JFK", "2025-12-21T10:15:00", "2025-12-21T13:00:00", 465, 300),
+            # Onward flight too soon after the AMS-LHR arrival
+            make_leg(3, "LHR", "JFK", "2025-12-21T08:30:00", "2025-12-21T11:15:00", 465, 50),
+            # Cheapest via CDG, but needs two connections
+            make_leg(4, "AMS", "CDG", "2025-12-21T06:00:00", "2025-12-21T07:15:00", 75, 40),
+            make_leg(5, "CDG", "LHR", "2025-12-21T09:00:00", "2025-12-21T09:15:00", 75, 40),
+            make_leg(6, "LHR", "JFK", "2025-12-21T11:00:00", "2025-12-21T13:45:00", 465, 150, airline="BA"),
+            # Would loop back through AMS
+            make_leg(7, "CDG", "AMS", "2025-12-21T09:00:00", "2025-12-21T10:15:00", 75, 1),
+            # Unknown times never enter the graph
+            make_leg(8, "AMS", "JFK", "", "", 500, 1),
+        ]
+        return ConnectionGraph(ColumnarFareStore(records))
+
+    def ids(self, graph, *codes):
+        return [graph.fares.airports.ids[code] for code in codes]
+
+    def test_cheapest_first(self, graph):
+        """Test that journeys come back in price order, connections included"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+        results = graph.search(ams, jfk, k=10)
+
+        assert [c.rows for c in results] == [(4, 5, 6), (1, 6), (4, 5, 2), (1, 2), (0,)]
+        assert [c.price for c in results] == [230.0, 250.0, 380.0, 400.0, 900.0]
+        assert [c.stops for c in results] == [2, 1, 2, 1, 0]
+
+    def test_duration_counts_layovers(self, graph):
+        """Test that duration sort ranks by flying time plus layovers"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+        results = graph.search(ams, jfk, k=10, sort="duration")
+
+        assert [c.rows for c in results] == [(0,), (1, 2), (1, 6), (4, 5, 2), (4, 5, 6)]
+        assert [c.duration for c in results] == [510, 660, 705, 780, 825]
+
+    def test_respects_minimum_connection_time(self, graph):
+        """Test that a departure inside the connection window is never used"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+        results = graph.search(ams, jfk, k=10)
+
+        assert (1, 3) not in [c.rows for c in results]
+        assert (4, 5, 3) not in [c.rows for c in results]
+
+    def test_max_stops_bounds_hops(self, graph):
+        """Test that max_stops limits the number of connections"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+
+        assert [c.rows for c in graph.search(ams, jfk, k=10, max_stops=1)] == [(1, 6), (1, 2), (0,)]
+        assert [c.rows for c in graph.search(ams, jfk, k=10, max_stops=0)] == [(0,)]
+
+    def test_returns_k_best(self, graph):
+        """Test that the search stops after k journeys"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+
+        assert [c.rows for c in graph.search(ams, jfk, k=2)] == [(4, 5, 6), (1, 6)]
+
+    def test_price_and_airline_filters(self, graph):
+        """Test that max_price bounds the whole journey and airlines every leg"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+        hv = graph.fares.airlines.ids["HV"]
+
+        assert [c.rows for c in graph.search(ams, jfk, k=10, max_price=300)] == [(4, 5, 6), (1, 6)]
+        assert [c.rows for c in graph.search(ams, jfk, k=10, airlines=[hv])] == [(4, 5, 2), (1, 2), (0,)]
+
+    def test_departure_day(self, graph):
+        """Test that departure_day restricts the first leg only"""
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+
+        assert len(graph.search(ams, jfk, k=10, departure_day=day_number(date(2025, 12, 21)))) == 5
+        assert graph.search(ams, jfk, k=10, departure_day=day_number(date(2025, 12, 22))) == []
+
+    def test_pruning_keeps_journeys_a_better_prefix_cannot_take(self):
+        """Test that a cheaper journey to the same leg does not hide routes it cannot continue on"""
+        records = [
+            # Two ways to reach the C-E leg; the cheaper one passes through B
+            make_leg(0, "AMS", "BRU", "2025-12-21T06:00:00", "2025-12-21T07:00:00", 60, 10),
+            make_leg(1, "AMS", "FRA", "2025-12-21T06:00:00", "2025-12-21T07:00:00", 60, 20),
+            make_leg(2, "BRU", "CDG", "2025-12-21T08:00:00", "2025-12-21T09:00:00", 60, 10),
+            make_leg(3, "FRA", "CDG", "2025-12-21T08:00:00", "2025-12-21T09:00:00", 60, 10),
+            make_leg(4, "CDG", "EDI", "2025-12-21T10:00:00", "2025-12-21T11:00:00", 60, 10),
+            # The only way on from EDI is back through BRU, too late to connect from AMS-BRU
+            make_leg(5, "EDI", "BRU", "2025-12-22T05:00:00", "2025-12-22T06:00:00", 60, 10),
+            make_leg(6, "BRU", "JFK", "2025-12-22T08:00:00", "2025-12-22T14:00:00", 360, 10),
+        ]
+        graph = ConnectionGraph(ColumnarFareStore(records))
+        ams, jfk = self.ids(graph, "AMS", "JFK")
+
+        results = graph.search(ams, jfk, k=1, max_stops=4)
+        assert [c.rows for c in results] == [(1, 3, 4, 5, 6)]
+
+    def test_unknown_airport_has_no_departures(self, graph):
+        """Test that an airport without departures yields nothing"""
+        jfk, ams = self.ids(graph, "JFK", "AMS")
+
+        assert graph.search(jfk, ams, k=10) == []
@@ -0,0 +1,56 @@
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from app.encoded_response import EncodedJson, EncodedJsonFile, accepts_gzip, etag_matches
+
+
+class TestEncodedResponse:
+    """Test suite for pre-encoded JSON responses"""
+
+    def test_body_matches_json_response_encoding(self):
+        content = [{"code": "KL", "name": "KLM"}] * 100
+        encoded = EncodedJson(content)
+        assert json.loads(encoded.body) == content
+        assert json.loads(gzip.decompress(encoded.gzip_body)) == content
+        assert encoded.etag != encoded.gzip_etag
+
+    def test_small_bodies_have_no_gzip_variant(self):
+        assert EncodedJson({"a": 1}).gzip_body is None
+
+    def test_etag_depends_on_content(self):
+        assert EncodedJson([1, 2]).etag == EncodedJson([1, 2]).etag
+        assert EncodedJson([1, 2]).etag != EncodedJson([2, 1]).etag
+
+    def test_accepts_gzip(self):
+        assert accepts_gzip("gzip, deflate, br")
+        assert accepts_gzip("br;q=1.0, GZIP;q=0.5")
+        assert accepts_gzip("*")
+        assert not accepts_gzip("")
+        assert not accepts_gzip("deflate")
+        assert not accepts_gzip("gzip;q=0")
+        assert not accepts_gzip("gzip;q=bogus")
+
+    def test_etag_matches(self):
+        etags = ('"abc"', '"abc-gzip"')
+        assert etag_matches('"abc"', etags)
+        assert etag_matches('"xyz", W/"abc-gzip"', etags)
+        assert etag_matches("*", etags)
+        assert not etag_matches('"xyz"', etags)
+
+    def test_file_is_reencoded_when_it_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "services.json"
+            path.write_text(json.dumps({"version": 1}))
+            cached = EncodedJsonFile(path)
+            first = cached.get()
+            assert cached.get() is first
+
+            path.write_text(json.dumps({"version": 22}))
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            second = cached.get()
+            assert second is not first
+            assert json.loads(second.body) == {"version": 22}
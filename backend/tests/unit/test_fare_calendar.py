@@ -0,0 +1,95 @@
+import pytest
+from datetime import date
+from app.fare_calendar import FareCalendar
+from app.fare_store import ColumnarFareStore
+from tests.helpers import make_record
+
+DEC_21 = date(2025, 12, 21)
+DEC_22 = date(2025, 12, 22)
+
+
+def fares(*records):
+    return ColumnarFareStore(list(records))
+
+
+class TestFareCalendar:
+    """Test suite for FareCalendar class"""
+
+    def test_update_builds_per_day_cells(self):
+        """Test that the first update aggregates every dated itinerary"""
+        calendar = FareCalendar()
+        changed = calendar.update(fares(
+            make_record(price=100.0),
+            make_record(price=80.0),
+            make_record(price=120.0, dep="2025-12-22T08:00:00"),
+            make_record(origin="AMS", price=1.0),
+            make_record(price=1.0, dep="not-a-date"),
+        ))
+
+        assert changed == 4
+        assert calendar.days("RTM", "STN", DEC_21, DEC_22) == [
+            {"date": "2025-12-21", "minPrice": 80.0, "minDuration": 55, "count": 2},
+            {"date": "2025-12-22", "minPrice": 120.0, "minDuration": 55, "count": 1},
+        ]
+        assert calendar.days("RTM", "STN", DEC_22, DEC_22)[0]["date"] == "2025-12-22"
+        assert calendar.days("RTM", "LHR", DEC_21, DEC_22) == []
+
+    def test_update_applies_only_the_difference(self):
+        """Test that a reload adds and removes just the changed itineraries"""
+        calendar = FareCalendar()
+        calendar.update(fares(make_record(price=100.0), make_record(price=80.0)))
+
+        changed = calendar.update(fares(
+            make_record(price=100.0),
+            make_record(price=90.0),
+            make_record(destination="LHR", price=50.0),
+        ))
+
+        assert changed == 3
+        assert calendar.days("RTM", "STN", DEC_21, DEC_21)[0] == {
+            "date": "2025-12-21", "minPrice": 90.0, "minDuration": 55, "count": 2,
+        }
+        assert calendar.days("RTM", "LHR", DEC_21, DEC_21)[0]["count"] == 1
+
+    def test_unchanged_reload_touches_nothing(self):
+        """Test that reloading identical fares changes no cells"""
+        calendar = FareCalendar()
+        calendar.update(fares(make_record(price=100.0), make_record(price=100.0)))
+
+        assert calendar.update(fares(make_record(price=100.0), make_record(price=100.0))) == 0
+        assert calendar.update(fares()) == 2
+        assert calendar.days("RTM", "STN", DEC_21, DEC_21) == []
+
+    def test_update_compares_records_by_position(self):
+        """Test that only records whose calendar fields changed are applied"""
+        calendar = FareCalendar()
+        calendar.update(fares(make_record(price=100.0), make_record(price=80.0),
+                              make_record(price=70.0)))
+
+        # Same fares and routes in place; only the second record's departure moved
+        changed = calendar.update(fares(make_record(price=100.0),
+                                        make_record(price=80.0, dep="2025-12-22T08:00:00"),
+                                        make_record(price=70.0)))
+
+        assert changed == 2
+        assert [d["count"] for d in calendar.days("RTM", "STN", DEC_21, DEC_22)] == [2, 1]
+
+    def test_removing_the_cheapest_fare_falls_back_to_the_next(self):
+        """Test that recomputed cells keep exact minimums as fares leave"""
+        calendar = FareCalendar()
+        calendar.update(fares(make_record(price=100.0), make_record(price=50.0)))
+        assert calendar.days("rtm", "stn", DEC_21, DEC_21)[0]["minPrice"] == 50.0
+
+        assert calendar.update(fares(make_record(price=100.0))) == 1
+        assert calendar.days("RTM", "STN", DEC_21, DEC_21) == [
+            {"date": "2025-12-21", "minPrice": 100.0, "minDuration": 55, "count": 1},
+        ]
+
+    def test_keeps_no_copy_of_the_rows(self):
+        """Test that the calendar diffs against the store it was given, not a copy"""
+        calendar = FareCalendar()
+        store = fares(*[make_record(price=float(p)) for p in range(1, 101)])
+        calendar.update(store)
+
+        assert calendar._fares is store
+        assert len(calendar._cells[0]) == 1
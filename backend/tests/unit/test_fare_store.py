@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+from datetime import date
+from app.fare_store import (ColumnarFareStore, CodeTable, epoch_seconds, day_number, day_to_date,
+                            max_cents)
+from tests.helpers import make_record
+
+
+class TestColumnarFareStore:
+    """Test suite for ColumnarFareStore class"""
+
+    @pytest.fixture
+    def store(self):
+        return ColumnarFareStore([
+            make_record(price=100.0, stops=0),
+            make_record(origin="ams", price=250.0, stops=1),
+            make_record(airline="KL", price=400.0, stops=2),
+        ])
+
+    def test_columns_are_interned(self, store):
+        """Test that airport and airline codes become integer columns"""
+        assert store.origin.dtype == np.int32
+        assert store.airports.codes == ["RTM", "AMS", "STN"]
+        assert store.origin.tolist() == [0, 1, 0]
+        assert store.destination.tolist() == [2, 2, 2]
+        assert store.airline.tolist() == [0, 0, 1]
+
+    def test_price_column_is_integer_cents(self, store):
+        """Test that the price column keeps fixed-point cents"""
+        assert store.price_cents.dtype == np.int64
+        assert store.price_cents.tolist() == [10000, 25000, 40000]
+
+    def test_filter_full_columns(self, store):
+        """Test vectorized predicates over every row"""
+        assert store.filter().tolist() == [0, 1, 2]
+        assert store.filter(max_price=300).tolist() == [0, 1]
+        assert store.filter(max_price=300, max_stops=0).tolist() == [0]
+
+    def test_max_price_is_compared_in_cents(self, store):
+        """Test that a price limit admits fares up to its whole cent, with no float rounding"""
+        assert store.filter(max_price=250).tolist() == [0, 1]
+        assert store.filter(max_price=249.999).tolist() == [0]
+        assert max_cents(0.29) == 29
+        assert max_cents(249.999) == 24999
+
+    def test_filter_candidate_rows(self, store):
+        """Test that predicates only consider the given candidate rows"""
+        rows = np.array([1, 2])
+        assert store.filter(rows, max_stops=1).tolist() == [1]
+
+    def test_group_rows(self, store):
+        """Test grouping row ids by interned code"""
+        groups = store.group_rows(store.origin)
+        assert {k: v.tolist() for k, v in groups.items()} == {0: [0, 2], 1: [1]}
+
+    def test_empty_store(self):
+        """Test that an empty catalog yields empty columns"""
+        store = ColumnarFareStore([])
+        assert len(store) == 0
+        assert store.group_rows(store.origin) == {}
+        assert store.filter(max_price=10).tolist() == []
+
+
+class TestColumnHelpers:
+    """Test suite for column conversion helpers"""
+
+    def test_epoch_seconds(self):
+        """Test that naive supplier times are read as UTC"""
+        assert epoch_seconds("1970-01-02T00:00:00") == 86400
+        assert epoch_seconds("garbage") == -1
+
+    def test_day_number_round_trip(self):
+        """Test epoch day conversion in both directions"""
+        assert day_number(date(1970, 1, 11)) == 10
+        assert day_to_date(10) == date(1970, 1, 11)
+        assert day_number(None) == -1
+        assert day_to_date(-1) is None
+
+    def test_code_table(self):
+        """Test that repeated codes share one id"""
+        table = CodeTable()
+        assert table.intern("HV") == table.intern("HV") == 0
+        assert table.intern("KL") == 1
+        assert len(table) == 2
@@ -0,0 +1,185 @@
+import pytest
+import json
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+from app.flight_catalog import FlightCatalog, normalize_itinerary
+from tests.helpers import make_itinerary, write_flights
+
+
+class TestNormalizeItinerary:
+    """Test suite for supplier itinerary normalization"""
+
+    def test_flattens_first_segment(self):
+        """Test that the first segment and total fare are flattened"""
+        record = normalize_itinerary(3, make_itinerary())
+
+        assert record.id == "flt_3"
+        assert record.departure_airport == "RTM"
+        assert record.arrival_airport == "STN"
+        assert record.price_cents == 55786
+        assert record.price == 557.86
+        assert record.duration == 55
+        assert record.departure_date == date(2025, 12, 21)
+
+    def test_interns_repeated_strings(self):
+        """Test that codes and names parsed separately share one string object"""
+        dates = {}
+        first = normalize_itinerary(0, json.loads(json.dumps(make_itinerary())), dates)
+        second = normalize_itinerary(1, json.loads(json.dumps(make_itinerary())), dates)
+
+        assert first.airline_name is second.airline_name
+        assert first.cabin_class is second.cabin_class
+        assert first.currency is second.currency
+        assert first.departure_date is second.departure_date
+        assert list(dates) == [date(2025, 12, 21)]
+
+    def test_dates_are_interned_per_table(self):
+        """Test that date interning is scoped to the table a snapshot passes in"""
+        first = normalize_itinerary(0, make_itinerary(), {})
+        second = normalize_itinerary(1, make_itinerary(), {})
+
+        assert first.departure_date == second.departure_date
+        assert first.departure_date is not second.departure_date
+
+    def test_has_no_instance_dict(self):
+        """Test that itineraries are slot-only objects"""
+        record = normalize_itinerary(0, make_itinerary())
+        assert not hasattr(record, "__dict__")
+
+    def test_skips_itinerary_without_options(self):
+        """Test that itineraries without OriginDestinationOptions are dropped"""
+        assert normalize_itinerary(0, {"FareItinerary": {}}) is None
+
+
+class TestFlightCatalog:
+    """Test suite for FlightCatalog class"""
+
+    def test_loads_records_once(self):
+        """Test that the catalog is normalized at construction"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [make_itinerary(), make_itinerary(origin="AMS")])
+
+            catalog = FlightCatalog(str(data_dir))
+            snapshot = catalog.snapshot()
+
+            assert len(snapshot) == 2
+            assert snapshot.version == 1
+            assert [r.departure_airport for r in snapshot.records] == ["RTM", "AMS"]
+
+    def test_reloads_when_file_changes(self):
+        """Test that a changed file is swapped in on the next check"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [make_itinerary()])
+            catalog = FlightCatalog(str(data_dir), check_interval=0)
+            old_snapshot = catalog.snapshot()
+            catalog.wait_for_reload()
+
+            write_flights(data_dir, [make_itinerary(), make_itinerary(origin="AMS")])
+            stat = (data_dir / "flights.json").stat()
+            os.utime(data_dir / "flights.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+            # Requests keep the current version while the rebuild is held up
+            with catalog._reload_lock:
+                assert catalog.snapshot() is old_snapshot
+            snapshot = catalog.wait_for_reload()
+            assert catalog.snapshot() is snapshot
+            assert len(snapshot) == 2
+            assert snapshot.version == 2
+            assert snapshot.airport_index.departures == {"RTM": 1, "AMS": 1, "STN": 0}
+            # Readers holding the old snapshot are unaffected
+            assert len(old_snapshot) == 1
+            assert "AMS" not in old_snapshot.airport_index
+
+    def test_reloads_when_airline_list_changes(self):
+        """Test that editing only airline-list.json swaps in a new version"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [make_itinerary()])
+            catalog = FlightCatalog(str(data_dir), check_interval=0)
+            assert catalog.snapshot().airlines == []
+
+            with open(data_dir / "airline-list.json", 'w') as f:
+                json.dump([{"AirLineCode": "HV", "AirLineName": "Transavia"}], f)
+            catalog.snapshot()
+            snapshot = catalog.wait_for_reload()
+
+            assert snapshot.version == 2
+            assert snapshot.airline_index.get("HV")["AirLineName"] == "Transavia"
+
+    def test_keeps_serving_on_corrupt_file(self):
+        """Test that a half-written file does not replace the current version"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [make_itinerary()])
+            catalog = FlightCatalog(str(data_dir), check_interval=0)
+
+            with open(data_dir / "flights.json", 'w') as f:
+                f.write('{"AirSearchResponse": ')
+
+            catalog.snapshot()
+            snapshot = catalog.wait_for_reload()
+            assert len(snapshot) == 1
+            assert snapshot.version == 1
+
+    def test_failed_first_load_is_retried_per_read(self):
+        """Test that a bad file at startup is logged, then raised to readers until fixed"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            catalog = FlightCatalog(str(data_dir), preload=False)
+
+            assert catalog.try_load() is None
+            assert catalog.current() is None
+            with pytest.raises(OSError):
+                catalog.snapshot()
+
+            with open(data_dir / "flights.json", 'w') as f:
+                f.write('{"AirSearchResponse": ')
+            with pytest.raises(ValueError):
+                catalog.snapshot()
+
+            write_flights(data_dir, [make_itinerary()])
+            assert len(catalog.snapshot()) == 1
+            assert catalog.version == 1
+
+
+class TestCatalogIndexes:
+    """Test suite for the snapshot posting-list indexes"""
+
+    @pytest.fixture
+    def snapshot(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir)
+            write_flights(data_dir, [
+                make_itinerary(origin="RTM", destination="STN", airline="HV"),
+                make_itinerary(origin="AMS", destination="STN", airline="KL"),
+                make_itinerary(origin="RTM", destination="LHR", airline="KL",
+                               dep="2025-12-22T08:00:00"),
+                make_itinerary(origin="rtm", destination="STN", airline="U2",
+                               dep="not-a-date"),
+            ])
+            yield FlightCatalog(str(data_dir)).snapshot()
+
+    def test_no_filters_returns_everything(self, snapshot):
+        """Test that an unfiltered query defers to a full-column scan"""
+        assert snapshot.candidates() is None
+
+    def test_route_intersection(self, snapshot):
+        """Test that origin and destination postings are intersected"""
+        assert snapshot.candidates(origin="rtm", destination="stn").tolist() == [0, 3]
+
+    def test_airline_codes_union(self, snapshot):
+        """Test that several airline codes match any of them"""
+        assert snapshot.candidates(airline_codes=["KL", "U2"]).tolist() == [1, 2, 3]
+        assert snapshot.candidates(origin="RTM", airline_codes=["KL"]).tolist() == [2]
+
+    def test_departure_date_keeps_unparseable_dates(self, snapshot):
+        """Test that records without a parseable date match any date"""
+        assert snapshot.candidates(departure_date=date(2025, 12, 21)).tolist() == [0, 1, 3]
+
+    def test_unknown_key_returns_nothing(self, snapshot):
+        """Test that a key with no postings short-circuits to empty"""
+        assert snapshot.candidates(origin="XXX", destination="STN").tolist() == []
@@ -0,0 +1,85 @@
+import pytest
+import json
+import tempfile
+from pathlib import Path
+from app.flight_ingest import iter_fare_itineraries
+
+
+def write_document(path: Path, document, indent=None):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=indent)
+
+
+def response(items):
+    """Wrap items in the supplier AirSearchResponse envelope"""
+    return {"AirSearchResponse": {"session_id": "abc", "AirSearchResult": {"FareItineraries": items}}}
+
+
+class TestIterFareItineraries:
+    """Test suite for streaming FareItineraries ingest"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+    def test_yields_items_in_order(self, chunk_size):
+        """Test that items are decoded across any chunk boundary"""
+        items = [{"FareItinerary": {"n": i, "name": "Ünïcödé ✈"}} for i in range(25)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "flights.json"
+            write_document(path, response(items), indent=2)
+
+            result = list(iter_fare_itineraries(path, chunk_size=chunk_size, on_progress=None))
+
+        assert result == items
+
+    def test_matches_bundled_flights_file(self):
+        """Test that streaming the shipped flights.json equals json.load"""
+        path = Path(__file__).parent.parent.parent / "data" / "flights.json"
+        with open(path, 'r') as f:
+            expected = json.load(f)["AirSearchResponse"]["AirSearchResult"]["FareItineraries"]
+
+        assert list(iter_fare_itineraries(path, chunk_size=1024, on_progress=None)) == expected
+
+    def test_empty_array(self):
+        """Test a response without itineraries"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "flights.json"
+            write_document(path, response([]))
+
+            assert list(iter_fare_itineraries(path, on_progress=None)) == []
+
+    def test_missing_array_in_valid_document(self):
+        """Test that a well-formed document without the array yields nothing"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "flights.json"
+            write_document(path, {"AirSearchResponse": {"Errors": []}})
+
+            assert list(iter_fare_itineraries(path, on_progress=None)) == []
+
+    @pytest.mark.parametrize("content", [
+        '{"AirSearchResponse": ',
+        '{"AirSearchResult": {"FareItineraries": [{"a": 1}, {"b": ',
+        '{"AirSearchResult": {"FareItineraries": [{"a": 1} {"b": 2}]}}',
+        '{"AirSearchResult": {"FareItineraries": [{"a": 1},',
+    ])
+    def test_truncated_or_malformed_documents_raise(self, content):
+        """Test that corrupt documents raise ValueError"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "flights.json"
+            path.write_text(content)
+
+            with pytest.raises(ValueError):
+                list(iter_fare_itineraries(path, chunk_size=8, on_progress=None))
+
+    def test_reports_progress(self):
+        """Test that progress is reported periodically and at the end"""
+        items = [{"n": i} for i in range(5)]
+        calls = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "flights.json"
+            write_document(path, response(items))
+            size = path.stat().st_size
+
+            list(iter_fare_itineraries(path, on_progress=lambda *args: calls.append(args),
+                                       progress_every=2))
+
+        assert [c[0] for c in calls] == [2, 4, 5]
+        assert calls[-1][2] == size
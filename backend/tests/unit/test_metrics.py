@@ -0,0 +1,49 @@
+from app.metrics import Counter, Histogram, MetricsRegistry, span
+
+
+class TestMetrics:
+    """Test suite for the Prometheus metrics registry"""
+
+    def test_counter_render(self):
+        counter = Counter("requests_total", "Requests", ("route",))
+        counter.inc("/a")
+        counter.inc("/a", amount=2)
+        counter.inc('/b"')
+        assert counter.render() == [
+            "# HELP requests_total Requests",
+            "# TYPE requests_total counter",
+            'requests_total{route="/a"} 3',
+            'requests_total{route="/b\\""} 1',
+        ]
+
+    def test_unlabelled_counter_starts_at_zero(self):
+        assert Counter("failures_total", "Failures").render()[-1] == "failures_total 0"
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "load")
+        lines = histogram.render()[2:]
+        assert lines == [
+            'latency_seconds_bucket{stage="load",le="0.1"} 2',
+            'latency_seconds_bucket{stage="load",le="1"} 3',
+            'latency_seconds_bucket{stage="load",le="+Inf"} 4',
+            'latency_seconds_sum{stage="load"} 3.65',
+            'latency_seconds_count{stage="load"} 4',
+        ]
+
+    def test_span_observes_stage(self):
+        histogram = Histogram("stage_seconds", "Stages", ("stage",))
+        with span("search.filter", histogram):
+            pass
+        assert histogram.count("search.filter") == 1
+
+    def test_registry_renders_gauge_functions(self):
+        registry = MetricsRegistry()
+        registry.gauge_function("items", "Items", lambda: 7)
+        registry.gauge_function("hits_total", "Hits", lambda: {("a",): 1, ("b",): 2},
+                                ("kind",), kind="counter")
+        text = registry.render().decode()
+        assert "# TYPE items gauge\nitems 7\n" in text
+        assert "# TYPE hits_total counter" in text
+        assert 'hits_total{kind="b"} 2' in text
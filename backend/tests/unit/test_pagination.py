@@ -0,0 +1,117 @@
+import pytest
+import numpy as np
+import random
+from app.fare_store import top_k, top_k_pairs
+from app.flight_catalog import CatalogSnapshot
+from app.itinerary import Itinerary
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate
+
+
+def make_snapshot(prices, version=1):
+    """Build a snapshot whose records differ only by price"""
+    records = [
+        Itinerary(
+            index=i, airline_code="HV", airline_name="", flight_number="1",
+            departure_airport="RTM", arrival_airport="STN",
+            departure_time=f"2025-12-21T{10 + i:02d}:00:00", arrival_time="",
+            duration=100 - i, price_cents=round(price * 100), stops=0,
+            currency="USD", cabin_class="",
+        )
+        for i, price in enumerate(prices)
+    ]
+    return CatalogSnapshot(records, 0, 0, version)
+
+
+class TestTopK:
+    """Test suite for top-k row selection"""
+
+    def test_selects_smallest_keys_in_order(self):
+        """Test that the k smallest keys come back sorted"""
+        rows = np.arange(6)
+        keys = np.array([5.0, 1.0, 4.0, 2.0, 3.0, 0.5])
+        assert top_k(rows, keys, 3).tolist() == [5, 1, 3]
+
+    def test_boundary_ties_break_by_row(self):
+        """Test that equal keys on the boundary are taken in row order"""
+        rows = np.arange(5)
+        keys = np.array([2.0, 1.0, 2.0, 2.0, 2.0])
+        assert top_k(rows, keys, 3).tolist() == [1, 0, 2]
+
+    def test_no_limit_sorts_everything(self):
+        """Test that a missing k sorts the full input"""
+        assert top_k(np.arange(3), np.array([3, 1, 2]), None).tolist() == [1, 2, 0]
+
+
+class TestTopKPairs:
+    """Test suite for lazy top-k pairing of two ranked lists"""
+
+    def test_matches_full_cross_product(self):
+        """Test that lazy pairing agrees with ranking every pair"""
+        rng = random.Random(7)
+        a = sorted(rng.randint(0, 50) for _ in range(30))
+        b = sorted(rng.randint(0, 50) for _ in range(20))
+
+        expected = sorted((a[i] + b[j], i, j) for i in range(len(a)) for j in range(len(b)))[:25]
+        assert top_k_pairs(a, b, 25) == [(i, j) for _, i, j in expected]
+
+    def test_lexicographic_combine(self):
+        """Test ranking pairs by a tuple instead of a sum"""
+        pairs = top_k_pairs([1, 2], [5, 6], 4, combine=lambda x, y: (x, y))
+        assert pairs == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+    def test_empty_side_has_no_pairs(self):
+        """Test that a missing direction yields no pairs"""
+        assert top_k_pairs([1, 2], [], 3) == []
+        assert top_k_pairs([1], [1], 5) == [(0, 0)]
+
+
+class TestPaginate:
+    """Test suite for cursor pagination"""
+
+    def test_walks_all_pages_without_overlap(self):
+        """Test that following cursors visits every row exactly once"""
+        snapshot = make_snapshot([300.0, 100.0, 200.0, 100.0, 50.0])
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = paginate(snapshot, None, "price", 2, cursor)
+            seen.extend(page.tolist())
+            if cursor is None:
+                break
+        assert seen == [4, 1, 3, 2, 0]
+
+    def test_last_page_has_no_cursor(self):
+        """Test that a page holding the remaining rows ends pagination"""
+        snapshot = make_snapshot([1.0, 2.0])
+        page, cursor = paginate(snapshot, None, "price", 2)
+        assert page.tolist() == [0, 1]
+        assert cursor is None
+
+    def test_sort_by_duration_and_departure(self):
+        """Test the other sort fields"""
+        snapshot = make_snapshot([1.0, 2.0, 3.0])
+        assert paginate(snapshot, None, "duration")[0].tolist() == [2, 1, 0]
+        assert paginate(snapshot, None, "departure")[0].tolist() == [0, 1, 2]
+
+    def test_candidate_rows_are_respected(self):
+        """Test that only the given rows are paginated"""
+        snapshot = make_snapshot([5.0, 4.0, 3.0, 2.0])
+        page, _ = paginate(snapshot, np.array([0, 2]), "price", 1)
+        assert page.tolist() == [2]
+
+    def test_stale_cursor_is_rejected(self):
+        """Test that a cursor from an older catalog version is refused"""
+        cursor = encode_cursor(1, "price", 10.0, 3)
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, 2, "price")
+
+    def test_cursor_for_other_sort_is_rejected(self):
+        """Test that a cursor cannot switch sort order"""
+        cursor = encode_cursor(1, "price", 10.0, 3)
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, 1, "duration")
+
+    def test_malformed_cursor_is_rejected(self):
+        """Test that garbage cursors raise InvalidCursor"""
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor", 1, "price")
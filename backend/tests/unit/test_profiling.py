@@ -0,0 +1,103 @@
+import pstats
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.profiling import ProfileStore, ProfilingMiddleware, StackSampler, profiles_dropped
+
+
+def busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_client(directory: Path, **options) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/work/{item}")
+    async def work(item: str, ms: int = 0):
+        busy(ms / 1000)
+        return {"item": item}
+
+    app.add_middleware(ProfilingMiddleware, directory=directory, **options)
+    return TestClient(app)
+
+
+class TestProfiling:
+    """Test suite for opt-in request profiling"""
+
+    @pytest.fixture
+    def profile_dir(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield Path(temp_dir)
+
+    def test_sampler_stats_load_as_pstats(self, profile_dir):
+        sampler = StackSampler(interval=0.001)
+        sampler.start()
+        busy(0.05)
+        stats = sampler.stop()
+        assert sampler.samples > 0
+
+        store = ProfileStore(profile_dir)
+        name = store.write(stats, {"route": "/work"})
+        functions = {func for _, _, func in pstats.Stats(str(profile_dir / f"{name}.pstats")).stats}
+        assert "busy" in functions
+
+    def test_store_keeps_newest_profiles(self, profile_dir):
+        store = ProfileStore(profile_dir, max_profiles=2)
+        names = [store.write({}, {"route": "/r"}) for _ in range(4)]
+        assert sorted(p.stem for p in profile_dir.glob("*.pstats")) == names[2:]
+        assert sorted(p.stem for p in profile_dir.glob("*.txt")) == names[2:]
+
+    def test_token_forces_profile(self, profile_dir):
+        client = make_client(profile_dir, token="secret")
+        response = client.get("/work/a?ms=20", headers={"X-Profile-Token": "secret"})
+        name = response.headers["x-profile-id"]
+
+        summary = (profile_dir / f"{name}.txt").read_text()
+        assert "reason: forced" in summary
+        assert "route: /work/{item}" in summary
+        assert "query: ms=20" in summary
+        assert (profile_dir / f"{name}.pstats").exists()
+
+    def test_wrong_token_is_not_profiled(self, profile_dir):
+        client = make_client(profile_dir, token="secret")
+        response = client.get("/work/a", headers={"X-Profile-Token": "guess"})
+        assert "x-profile-id" not in response.headers
+        assert not list(profile_dir.iterdir())
+
+    def test_only_slow_requests_are_kept(self, profile_dir):
+        client = make_client(profile_dir, slow_ms=30, mode="cprofile")
+        client.get("/work/fast")
+        assert not list(profile_dir.glob("*.pstats"))
+
+        client.get("/work/slow?ms=60")
+        summaries = [p.read_text() for p in profile_dir.glob("*.txt")]
+        assert len(summaries) == 1
+        assert "reason: slow" in summaries[0]
+        assert "busy" in summaries[0]
+
+    def test_overlapping_slow_request_is_counted_as_dropped(self, profile_dir):
+        client = make_client(profile_dir, slow_ms=30, mode="cprofile")
+        before = profiles_dropped.value("slow")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda _: client.get("/work/slow?ms=200"), range(2)))
+
+        assert len(list(profile_dir.glob("*.pstats"))) == 1
+        assert profiles_dropped.value("slow") == before + 1
+
+    def test_sample_rate(self, profile_dir):
+        client = make_client(profile_dir, sample_rate=1.0)
+        response = client.get("/work/a")
+        assert "x-profile-id" in response.headers
+
+    def test_unknown_mode_is_rejected(self, profile_dir):
+        with pytest.raises(ValueError):
+            ProfilingMiddleware(None, profile_dir, mode="perf")
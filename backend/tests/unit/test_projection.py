@@ -0,0 +1,89 @@
+import pytest
+
+from app.projection import InvalidFields, Nested, Projection, attribute
+
+
+class Leg:
+    def __init__(self, code, number):
+        self.code = code
+        self.number = number
+
+
+def make_projection():
+    segment = Projection("segment", {"code": attribute("code"), "number": attribute("number")})
+    return Projection("flight", {
+        "id": lambda r: r.number * 10,
+        "code": attribute("code"),
+        "segments": Nested(segment, as_list=True),
+    })
+
+
+class TestProjection:
+    """Test suite for cached field projections"""
+
+    def test_full_projection(self):
+        project = make_projection().projector()
+        assert project(Leg("KL", 7)) == {"id": 70, "code": "KL", "segments": [{"code": "KL", "number": 7}]}
+
+    def test_selection_follows_schema_order(self):
+        projection = make_projection()
+        selection = projection.select(" segments.number , id ")
+        assert selection == projection.select("id,segments.number")
+        result = projection.projector(selection)(Leg("KL", 7))
+        assert list(result) == ["id", "segments"]
+        assert result == {"id": 70, "segments": [{"number": 7}]}
+
+    def test_whole_field_wins_over_nested_fields(self):
+        projection = make_projection()
+        assert projection.select("segments.code,segments") == projection.select("segments")
+        assert projection.select("segments") == (("segments", None),)
+
+    def test_none_selects_everything(self):
+        assert make_projection().select(None) is None
+
+    @pytest.mark.parametrize("fields", ["", " , ", "seats", "code.x", "segments.seats"])
+    def test_invalid_fields(self, fields):
+        with pytest.raises(InvalidFields):
+            make_projection().select(fields)
+
+    def test_projectors_are_built_once_and_bounded(self):
+        projection = make_projection()
+        projection.max_cached = 2
+        selection = projection.select("id")
+        assert projection.projector(selection) is projection.projector(selection)
+
+        projection.projector(projection.select("code"))
+        projection.projector(projection.select("segments"))
+        assert len(projection._builders) == 2
+        assert selection not in projection._builders
+
+    def test_from_keys(self):
+        projection = Projection.from_keys("booking", ["pnr", "passenger", "status"], nested={
+            "passenger": Projection.from_keys("passenger", ["first_name", "email"]),
+        })
+        booking = {"pnr": "ABC123", "status": "confirmed",
+                   "passenger": {"first_name": "Ada", "email": "ada@example.com"}}
+        assert projection.projector()(booking) == booking
+        project = projection.projector(projection.select("status,passenger.email"))
+        assert project(booking) == {"passenger": {"email": "ada@example.com"}, "status": "confirmed"}
+
+    def test_context_arguments_reach_nested_getters(self):
+        segment = Projection("segment", {"name": lambda r, names: names[r.code]}, args=("names",))
+        projection = Projection("flight", {
+            "name": lambda r, names: names[r.code],
+            "segments": Nested(segment, as_list=True),
+        }, args=("names",))
+        assert projection.projector()(Leg("KL", 7), {"KL": "KLM"}) == {"name": "KLM", "segments": [{"name": "KLM"}]}
+
+    def test_nested_projections_take_the_same_arguments(self):
+        segment = Projection("segment", {"code": attribute("code")})
+        with pytest.raises(ValueError):
+            Projection("flight", {"segments": Nested(segment)}, args=("names",))
+
+    def test_builders_return_one_dict_literal(self):
+        projection = make_projection()
+        project = projection.projector(projection.select("code,segments.number"))
+        assert project.source == (
+            "def project(r):\n"
+            "    return {'code': r.code, 'segments': [_f0(r)]}\n"
+        )
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.search_cache import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestSearchCache:
+    """Test suite for the search result cache"""
+
+    def test_hit_after_miss(self):
+        cache = SearchCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return b"result"
+
+        async def scenario():
+            return [await cache.get_or_compute("k", compute) for _ in range(3)]
+
+        assert run(scenario()) == [b"result"] * 3
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = SearchCache(ttl=10, clock=clock)
+        values = iter([1, 2])
+
+        async def scenario():
+            first = await cache.get_or_compute("k", lambda: next(values))
+            clock.now = 5
+            cached = await cache.get_or_compute("k", lambda: next(values))
+            clock.now = 11
+            fresh = await cache.get_or_compute("k", lambda: next(values))
+            return first, cached, fresh
+
+        assert run(scenario()) == (1, 1, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SearchCache(max_entries=2)
+
+        async def scenario():
+            await cache.get_or_compute("a", lambda: "a")
+            await cache.get_or_compute("b", lambda: "b")
+            await cache.get_or_compute("a", lambda: "a")
+            await cache.get_or_compute("c", lambda: "c")
+            return await cache.get_or_compute("b", lambda: "b2")
+
+        assert run(scenario()) == "b2"
+        assert cache.stats()["evictions"] == 2
+        assert cache.stats()["entries"] == 2
+
+    def test_newer_generation_invalidates_entries(self):
+        cache = SearchCache()
+
+        async def scenario():
+            await cache.get_or_compute("k", lambda: "v1", generation=1)
+            new = await cache.get_or_compute("k", lambda: "v2", generation=2)
+            # A request still holding the old catalog neither reads nor writes the cache
+            old = await cache.get_or_compute("k", lambda: "v1", generation=1)
+            current = await cache.get_or_compute("k", lambda: "v3", generation=2)
+            return new, old, current
+
+        assert run(scenario()) == ("v2", "v1", "v2")
+
+    def test_concurrent_misses_share_one_computation(self):
+        cache = SearchCache()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "shared"
+
+        async def scenario():
+            tasks = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        assert run(scenario()) == ["shared"] * 5
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 4
+
+    def test_cancelled_owner_does_not_fail_waiters(self):
+        cache = SearchCache()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            return "shared"
+
+        async def scenario():
+            owner = asyncio.create_task(cache.get_or_compute("k", compute))
+            await asyncio.sleep(0.01)
+            waiter = asyncio.create_task(cache.get_or_compute("k", compute))
+            await asyncio.sleep(0.01)
+            owner.cancel()
+            await asyncio.sleep(0.01)
+            release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await owner
+            return await waiter, await cache.get_or_compute("k", lambda: "recomputed")
+
+        assert run(scenario()) == ("shared", "shared")
+        assert cache.stats()["coalesced"] == 1
+
+    def test_failures_are_not_cached(self):
+        cache = SearchCache()
+
+        def fail():
+            raise ValueError("boom")
+
+        async def scenario():
+            with pytest.raises(ValueError):
+                await cache.get_or_compute("k", fail)
+            return await cache.get_or_compute("k", lambda: "ok")
+
+        assert run(scenario()) == "ok"
+        assert cache.stats()["entries"] == 1
+
+    def test_zero_size_disables_storage(self):
+        cache = SearchCache(max_entries=0)
+
+        async def scenario():
+            await cache.get_or_compute("k", lambda: 1)
+            return await cache.get_or_compute("k", lambda: 2)
+
+        assert run(scenario()) == 2
+        assert cache.stats()["entries"] == 0